@@ -5,15 +5,29 @@ The agent generates MLAI content. Validation is run by Python code
 via subprocess — the agent cannot skip or circumvent it.
 
 Flow:
-  1. Agent generates the .mlai file (generation phase)
-  2. Python runs the validator CLI externally
-  3. If errors: Python feeds them back to the agent as a fix prompt
-  4. Repeat 2-3 until validation passes or max attempts exhausted
+  1. Agent generates the .mlai file (generation phase) from the spec and a
+     compact course context pack inlined in the prompt
+  2. Python runs the in-process pre-validator, then (if it passes) the
+     validator CLI externally (as an asyncio subprocess, so concurrent
+     lessons keep running while one is validated)
+  3. If errors: Python repairs the broken top-level components with small
+     one-shot calls when the errors are confined to a few of them, and
+     otherwise feeds them back to the agent as a fix prompt
+  4. Repeat 2-3 until validation passes, the loop stops converging, or a
+     cost/time/turn budget is exhausted
 """
 
 import asyncio
+import contextlib
+import contextvars
 import copy
+import dataclasses
 import json
+import os
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from claude_agent_sdk import (
@@ -21,25 +35,113 @@ from claude_agent_sdk import (
     ClaudeAgentOptions,
     AssistantMessage,
     ResultMessage,
+    SystemMessage,
     TextBlock,
+    UserMessage,
 )
 
 from config import (
     PROJECT_ROOT,
     DEFAULT_MODEL,
     DEFAULT_MAX_TURNS,
+    DEFAULT_CONCURRENCY,
     MAX_VALIDATION_ATTEMPTS,
+    CONVERGENCE_STALL_REPEATS,
+    CONVERGENCE_WINDOW,
+    COMPONENT_REPAIR_MAX_FRAGMENTS,
+    DEFAULT_FIX_MODELS,
+    FIX_ESCALATE_AFTER,
+    FIX_SESSION_MAX_TOKENS,
+    AGENT_MAX_RETRIES,
 )
 from prompts.system import build_system_prompt
 from prompts.generation import build_generation_prompt
 from prompts.fix import build_fix_prompt
-from validator import validate_mlai_file
+from prompts.repair import build_repair_prompt, build_repair_system_prompt
+from prompts.fanout import build_part_prompt, build_part_system_prompt
+from autofix import autofix_mlai_file
+from budget import Budget, BudgetLimits
+from cache import GenerationCache, ValidationCache, lesson_cache_key
+from components import Component, fenced_xml, locate_components, splice, split_components
+from context import CurriculumContext
+from convergence import ConvergenceTracker
+from fanout import PARTS, assemble_lesson, extract_part, lesson_meta
+from hedging import HedgePolicy, TelemetryTap
+from journal import (
+    ProgressJournal,
+    load_journal,
+    PENDING,
+    GENERATING,
+    VALIDATING,
+    SUCCEEDED,
+    FAILED,
+    IN_FLIGHT,
+)
+from ontology import Ontology
+from prerequisites import LessonDigest, digest_mlai, longest_chain, prerequisite_graph, render_digests
+from prevalidator import check_mlai_text, prevalidate_mlai_file
+from ratelimit import THROTTLED, RateLimiter, backoff_delay, classify_error, status_reason
+from replay import lesson_output
+from telemetry import Telemetry, USAGE_FIELDS
+from tiering import ModelLadder, estimate_cost
+import tracing
+from validator import ValidationResult, validate_mlai_file_async
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+# When set, console output is collected here instead of printed directly.
+# Concurrent batch runs give each lesson its own buffer so lines from
+# different lessons never interleave.
+_output_buffer: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar(
+    "_output_buffer", default=None
+)
+
+
+def _log(text: str = "") -> None:
+    """Print a line, or append it to the current lesson's buffer."""
+    buffer = _output_buffer.get()
+    if buffer is None:
+        print(text)
+    else:
+        buffer.append(text)
+
+
+def _flush_output(lesson_id: str, lines: list[str]) -> None:
+    """Print a buffered lesson log in one block, tagged with the lesson ID."""
+    tag = f"[{lesson_id}]"
+    print("\n".join(f"{tag} {line}" for text in lines for line in text.split("\n")))
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+# Every agent run goes through this; replay.Recorder / replay.Replayer
+# can stand in for it (see use_query).
+_query = query
+
+
+def use_query(fn) -> None:
+    """Route agent runs through ``fn``, a callable with ``query``'s signature."""
+    global _query
+    _query = fn
+
+
+# Shared by every agent run in the process, whichever lesson or job it
+# belongs to (see use_limiter).
+_limiter = RateLimiter()
+_max_retries = AGENT_MAX_RETRIES
+
+
+def use_limiter(limiter: RateLimiter, max_retries: int = AGENT_MAX_RETRIES) -> None:
+    """Admit agent runs through ``limiter`` and retry transient failures up to ``max_retries`` times."""
+    global _limiter, _max_retries
+    _limiter = limiter
+    _max_retries = max_retries
+
 
 def _agent_options(
     model: str,
@@ -60,40 +162,252 @@ def _agent_options(
     return opts
 
 
-async def _run_agent(prompt: str, options: ClaudeAgentOptions) -> tuple[bool, str | None]:
-    """Run a single agent invocation.
+def _oneshot_options(model: str, system_prompt: str) -> ClaudeAgentOptions:
+    """Options for a tool-free, single-turn call (component repair, fan-out part)."""
+    return ClaudeAgentOptions(
+        allowed_tools=[],
+        model=model,
+        system_prompt=system_prompt,
+        max_turns=1,
+        cwd=str(PROJECT_ROOT),
+    )
+
+
+@dataclass
+class AgentRun:
+    """What a single agent invocation did and cost."""
+
+    success: bool = False
+    """Whether the agent reported success."""
+
+    session_id: str | None = None
+    """Captured session id for resumption."""
 
-    Returns
-    -------
-    (success, session_id)
-        success: whether the agent reported success
-        session_id: captured session id for resumption
+    wall_s: float = 0.0
+    cost_usd: float = 0.0
+    num_turns: int = 0
+    usage: dict[str, int] = field(default_factory=dict)
+    tool_calls: Counter = field(default_factory=Counter)
+    text: list[str] = field(default_factory=list)
+    """Text blocks from the agent's replies."""
+
+    retry_reason: str | None = None
+    """Why this run failed transiently (see ratelimit.classify_error), if it did."""
+
+    retry_after: float | None = None
+    """Seconds until the API's rate limit resets, when it said so."""
+
+    retries: int = 0
+    throttled: int = 0
+    """Attempts before this one, and how many of those were throttled."""
+
+    def metrics(self) -> dict:
+        """Fields for a telemetry record."""
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "success": self.success,
+            "cost_usd": self.cost_usd,
+            "num_turns": self.num_turns,
+            **{name: self.usage.get(name, 0) for name in USAGE_FIELDS},
+            "tool_calls": dict(self.tool_calls),
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
+
+    def context_tokens(self) -> int:
+        """Rough size of the session's context after this run, in tokens.
+
+        Every turn re-sends the transcript, so the prompt tokens per turn
+        approximate it; what the agent wrote is added on top.
+        """
+        prompt = sum(self.usage.get(name, 0) for name in
+                     ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"))
+        return prompt // max(self.num_turns, 1) + self.usage.get("output_tokens", 0)
+
+    def absorb(self, failed: "AgentRun") -> None:
+        """Add the time, cost and usage of an earlier failed attempt."""
+        self.wall_s += failed.wall_s
+        self.cost_usd += failed.cost_usd
+        self.num_turns += failed.num_turns
+        for name, value in failed.usage.items():
+            self.usage[name] = self.usage.get(name, 0) + value
+        self.tool_calls.update(failed.tool_calls)
+        self.retries += failed.retries
+        self.throttled += failed.throttled
+
+
+async def _run_agent(prompt: str, options: ClaudeAgentOptions, echo: bool = True) -> AgentRun:
+    """Run an agent invocation through the shared limiter, retrying transient failures.
+
+    Rate limits, overload, 5xx responses and dropped connections are
+    retried with jittered exponential backoff; throttling also cuts the
+    limiter's concurrency for every caller. The returned run includes the
+    cost and usage of any failed attempts. Other errors propagate as before.
     """
-    success = False
-    session_id = None
+    system_prompt = options.system_prompt if isinstance(options.system_prompt, str) else ""
+    estimated_tokens = (len(prompt) + len(system_prompt)) // 4
+    spent = AgentRun()
+
+    for attempt in range(_max_retries + 1):
+        async with _limiter.slot(estimated_tokens) as permit:
+            try:
+                with tracing.span("agent", "agent", model=options.model, attempt=attempt) as span:
+                    run = await _run_agent_once(prompt, options, echo)
+                    span.update(success=run.success, cost_usd=run.cost_usd, num_turns=run.num_turns)
+            except Exception as exc:
+                reason = classify_error(exc)
+                if reason in THROTTLED:
+                    permit.settle(0, throttled=True)
+                if reason is None or attempt == _max_retries:
+                    raise
+                run = AgentRun(retry_reason=reason)
+                _log(f"\n⚠️  Agent call failed: {exc}")
+            else:
+                used = sum(run.usage.get(name, 0) for name in
+                           ("input_tokens", "output_tokens", "cache_creation_input_tokens"))
+                permit.settle(used, throttled=run.retry_reason in THROTTLED, retry_after=run.retry_after)
 
-    async for message in query(prompt=prompt, options=options):
-        # Capture session ID from the init message
-        if hasattr(message, "subtype") and message.subtype == "init":
-            if hasattr(message, "session_id"):
-                session_id = message.session_id
+        if run.retry_reason is None or attempt == _max_retries:
+            run.absorb(spent)
+            return run
+
+        spent.absorb(run)
+        spent.retries += 1
+        spent.throttled += run.retry_reason in THROTTLED
+        delay = backoff_delay(attempt, run.retry_after)
+        _log(f"🔁 Transient failure ({run.retry_reason}); retry {attempt + 1}/{_max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def _run_agent_once(prompt: str, options: ClaudeAgentOptions, echo: bool = True) -> AgentRun:
+    """Run a single agent invocation and collect its usage.
+
+    With ``echo=False`` the agent's text is collected but not printed.
+    """
+    run = AgentRun()
+    start = time.perf_counter()
+    tools: dict[str, tuple[str, float]] = {}  # tool use id -> (name, start), when tracing
+
+    async for message in _query(prompt=prompt, options=options):
+        # Capture session ID from the init message (the result repeats it)
+        if isinstance(message, SystemMessage) and message.subtype == "init":
+            run.session_id = (message.data or {}).get("session_id") or run.session_id
+
+        # The API refused the request outright (newer SDKs only)
+        info = getattr(message, "rate_limit_info", None)
+        if info is not None and getattr(info, "status", None) == "rejected":
+            run.retry_reason = "rate_limit"
+            if getattr(info, "resets_at", None):
+                run.retry_after = max(0.0, info.resets_at - time.time())
 
         if isinstance(message, AssistantMessage):
+            if getattr(message, "error", None) in ("rate_limit", "server_error"):
+                run.retry_reason = run.retry_reason or message.error
             for block in message.content:
                 if isinstance(block, TextBlock):
-                    print(block.text)
+                    run.text.append(block.text)
+                    if echo:
+                        _log(block.text)
                 elif hasattr(block, "name"):
-                    print(f"\n🔧 Tool: {block.name}")
+                    _log(f"\n🔧 Tool: {block.name}")
+                    run.tool_calls[block.name] += 1
+                    if tracing.enabled():
+                        tracing.instant(block.name, "tool_use")
+                        tools[getattr(block, "id", "")] = (block.name, time.perf_counter())
+
+        elif isinstance(message, UserMessage) and tools:
+            for block in message.content if isinstance(message.content, list) else []:
+                started = tools.pop(getattr(block, "tool_use_id", None), None)
+                if started is not None:
+                    tracing.complete(started[0], "tool", started[1], error=bool(getattr(block, "is_error", False)))
 
         elif isinstance(message, ResultMessage):
+            run.session_id = run.session_id or getattr(message, "session_id", None)
             if message.subtype == "success":
-                success = True
+                run.success = True
             else:
-                print(f"\n⚠️  Agent finished with status: {message.subtype}")
+                _log(f"\n⚠️  Agent finished with status: {message.subtype}")
             if hasattr(message, "total_cost_usd") and message.total_cost_usd:
-                print(f"💰 Cost: ${message.total_cost_usd:.4f}")
+                _log(f"💰 Cost: ${message.total_cost_usd:.4f}")
+                run.cost_usd = message.total_cost_usd
+            run.num_turns = getattr(message, "num_turns", 0) or 0
+            run.usage = {
+                name: (getattr(message, "usage", None) or {}).get(name, 0)
+                for name in USAGE_FIELDS
+            }
+            if run.success:
+                run.retry_reason = None  # the CLI got through on its own
+            else:
+                run.retry_reason = run.retry_reason or status_reason(getattr(message, "api_error_status", None))
 
-    return success, session_id
+    run.wall_s = time.perf_counter() - start
+    return run
+
+
+async def _validate(
+    output_file: Path,
+    metric=None,
+    results: ValidationCache | None = None,
+    **fields,
+) -> ValidationResult:
+    """Pre-validate in a worker thread; run the node validator only if that passes.
+
+    With ``results``, content that was validated before (say, a fix turn
+    that left the file unchanged) gets its stored result and no validator
+    runs. ``metric``, if given, is called with a ``validation`` telemetry
+    record.
+    """
+    start = time.perf_counter()
+    try:
+        content = output_file.read_bytes() if results is not None else None
+    except FileNotFoundError:
+        content = None
+
+    result = results.get(content) if content is not None else None
+    prevalidate_s = 0.0
+    if result is not None:
+        _log("♻️  File unchanged since an earlier validation; reusing its result")
+        validator = "cache"
+    else:
+        with tracing.span("prevalidator", "validator"):
+            result = await asyncio.to_thread(prevalidate_mlai_file, output_file)
+        prevalidate_s = time.perf_counter() - start
+        if not result.success:
+            _log("⚡ Pre-validator found structural errors (node validator skipped)")
+            validator = "prevalidator"
+        else:
+            result = await validate_mlai_file_async(output_file)
+            validator = "node"
+        if content is not None:
+            results.put(content, result)
+
+    tracing.complete("validation", "phase", start, validator=validator, success=result.success, **fields)
+    if metric is not None:
+        metric(
+            "validation",
+            validator=validator,
+            wall_s=round(time.perf_counter() - start, 4),
+            prevalidate_s=round(prevalidate_s, 4),
+            success=result.success,
+            error_count=result.error_count,
+            **fields,
+        )
+    return result
+
+
+def _repaired_fragment(run: AgentRun, original: Component) -> str | None:
+    """Extract a corrected component from a repair reply, or None if unusable.
+
+    The reply must hold exactly one element with the same name and ``id``
+    as the component it replaces.
+    """
+    fragment = fenced_xml("\n".join(run.text))
+    if fragment is None:
+        return None
+    parsed = split_components(f"<Lesson>\n{fragment}\n</Lesson>")
+    if len(parsed) != 1 or parsed[0].name != original.name or parsed[0].id != original.id:
+        return None
+    return fragment
 
 
 # ---------------------------------------------------------------------------
@@ -101,21 +415,115 @@ async def _run_agent(prompt: str, options: ClaudeAgentOptions) -> tuple[bool, st
 # ---------------------------------------------------------------------------
 
 
+@dataclass
+class LessonResult:
+    """Outcome of generating one lesson. Truthy when the lesson passed."""
+
+    success: bool
+
+    autofix_turns_saved: int = 0
+    """Validation failures resolved by the auto-fixer without an agent turn."""
+
+    cached: bool = False
+    """True if the output was restored from the generation cache."""
+
+    resumed: bool = False
+    """True if a resumed batch found this lesson already finished."""
+
+    attempts: int = 0
+    """Validation attempts made."""
+
+    cost_usd: float = 0.0
+    """Total agent cost across generation and fix turns."""
+
+    cost_saved_usd: float = 0.0
+    """Estimated saving from running fixes on models below the flagship."""
+
+    stop_reason: str = ""
+    """Why the lesson stopped: ``passed``, ``cached``, ``generation_failed``,
+    ``stalled``, ``no_progress``, ``max_attempts``,
+    ``{lesson,global}_budget_{cost,time,turns}``, or ``error`` (an
+    unexpected exception)."""
+
+    hedge: str | None = None
+    """``won`` if a hedged second generation finished first, ``lost`` if one
+    was started but the original got there first (see hedging.py)."""
+
+    def __bool__(self) -> bool:
+        return self.success
+
+
 async def generate_lesson(
     lesson_spec_path: str,
     curriculum_path: str,
     output_dir: str,
     model: str = DEFAULT_MODEL,
     max_turns: int = DEFAULT_MAX_TURNS,
-) -> bool:
+    cache: GenerationCache | None = None,
+    journal: ProgressJournal | None = None,
+    resume_existing: bool = False,
+    context: CurriculumContext | None = None,
+    telemetry: Telemetry | None = None,
+    lesson_limits: BudgetLimits | None = None,
+    global_budget: Budget | None = None,
+    fix_models: tuple[str, ...] = DEFAULT_FIX_MODELS,
+    fix_escalate_after: int = FIX_ESCALATE_AFTER,
+    fix_session_tokens: int = FIX_SESSION_MAX_TOKENS,
+    fanout: bool = False,
+    validation_cache: ValidationCache | None = None,
+    prerequisite_digests: str = "",
+    hedge: HedgePolicy | None = None,
+) -> LessonResult:
     """Generate a single MLAI lesson with externally enforced validation.
 
-    Steps:
-      1. Agent reads spec + curriculum, generates .mlai, writes file
+    If ``cache`` holds a validated output for identical inputs, it is
+    restored to the output path and no agent is run. Otherwise:
+      1. Agent generates .mlai from the inlined spec + context, writes file
+         (skipped when ``resume_existing`` and the file is already on disk)
       2. Python validates via subprocess (agent cannot skip this)
-      3. On failure: Python feeds errors to agent, agent fixes, repeat
-      4. Passes or exhausts MAX_VALIDATION_ATTEMPTS
+      3. On failure: the auto-fixer repairs mechanical errors and Python
+         re-validates; if what is left sits in a few top-level components,
+         those are repaired in isolation and spliced back, otherwise the
+         errors are fed to the agent session to fix; repeat
+      4. Passes, or stops when the loop is no longer converging or a budget
+         runs out (MAX_VALIDATION_ATTEMPTS remains a hard ceiling)
+
+    ``model`` generates the lesson. Fixes start on the first of
+    ``fix_models`` and move up one rung (ending at ``model``) whenever the
+    loop stalls (same errors repeatedly) or goes ``fix_escalate_after``
+    attempts without a new error minimum. Once fixes are on ``model`` and
+    still do not converge, the loop escalates once to a fresh agent session
+    with no fix history; if that stalls too, the lesson is given up. Cost, turns
+    and time are charged to a per-lesson budget from ``lesson_limits`` and
+    to ``global_budget`` (shared across a batch), when given.
+
+    Fixes resume one agent session while its context stays under
+    ``fix_session_tokens`` (0 for no limit). Past that, the next fix starts
+    a fresh session, prompted with the outstanding errors and their
+    excerpts, that re-reads the file from disk instead of carrying the
+    whole history of earlier attempts.
+
+    The spec text and a compact context pack from ``context`` (loaded from
+    ``curriculum_path`` if not given) are inlined in the generation prompt,
+    followed by ``prerequisite_digests`` (see prerequisites.render_digests).
+    Every state transition is appended to ``journal``, and every agent
+    run, validation and auto-fix pass to ``telemetry``, when given.
+
+    With ``fanout``, step 1 instead generates the lesson's parts (see
+    ``fanout.PARTS``) concurrently and assembles them; if any part comes
+    back unusable, it falls back to the single-agent generation.
+
+    With ``validation_cache``, a file whose content was validated before
+    (e.g. a fix turn that changed nothing) is not validated again.
+
+    With ``hedge``, a second, independent generation races this one once
+    the lesson runs past the policy's thresholds (see _generate_hedged).
     """
+    if hedge is not None:
+        # Only the parameters are bound at this point
+        arguments = {name: value for name, value in locals().items() if name != "hedge"}
+        return await _generate_hedged(hedge, arguments)
+
     lesson_path = Path(lesson_spec_path)
     lesson_id = lesson_path.stem
 
@@ -125,86 +533,448 @@ async def generate_lesson(
     # Resolve to absolute path relative to PROJECT_ROOT (the agent's cwd)
     # so both the agent and the Python validator see the same path.
     output_file = (PROJECT_ROOT / output_dir / f"{lesson_id}.mlai").resolve()
+    lesson_output.set(output_file)
+    if tracing.current_track() is None:
+        tracing.set_track(lesson_id)
+
+    _log(f"\n{'=' * 60}")
+    _log(f"Generating: {lesson_id}")
+    _log(f"  Spec:   {lesson_spec_path}")
+    _log(f"  Output: {output_file}")
+    _log(f"  Model:  {model}")
+    _log(f"{'=' * 60}\n")
+
+    if context is None and curriculum_path and Path(curriculum_path).exists():
+        context = CurriculumContext.load(curriculum_path)
+
+    lesson_start = time.perf_counter()
+    budget = Budget(lesson_limits or BudgetLimits())
+    ladder = ModelLadder(list(fix_models), flagship=model)
+    cost_saved = 0.0
+    generation_mode: str | None = None
+    attempt = 0
+
+    def _record(state: str, **fields) -> None:
+        if journal is not None:
+            journal.record(lesson_id, state, **fields)
+
+    def _metric(phase: str, **fields) -> None:
+        if telemetry is not None:
+            telemetry.record(
+                lesson_id=lesson_id,
+                module_id=context.module_id(lesson_id) if context else None,
+                phase=phase,
+                **{"model": model, **fields},
+            )
+
+    def _tier_fields(run_model: str, cost_usd: float, usage: dict[str, int]) -> dict:
+        """Telemetry fields for work on a fix rung; tallies its saving vs. the flagship."""
+        nonlocal cost_saved
+        fields = {"model": run_model}
+        flagship_cost = estimate_cost(ladder.flagship, usage)
+        if run_model != ladder.flagship and flagship_cost is not None:
+            fields["flagship_cost_usd"] = round(flagship_cost, 6)
+            cost_saved += max(0.0, flagship_cost - cost_usd)
+        return fields
+
+    def _finish(lesson_result: LessonResult) -> LessonResult:
+        lesson_result.attempts = attempt
+        lesson_result.cost_usd = budget.cost_usd
+        lesson_result.cost_saved_usd = round(cost_saved, 6)
+        if lesson_result:
+            _record(SUCCEEDED)
+        else:
+            _record(FAILED, stop_reason=lesson_result.stop_reason)
+        tracing.complete("lesson", "phase", lesson_start, success=lesson_result.success,
+                         stop_reason=lesson_result.stop_reason, attempts=attempt)
+        _metric(
+            "lesson",
+            success=lesson_result.success,
+            wall_s=round(time.perf_counter() - lesson_start, 3),
+            cost_usd=budget.cost_usd,
+            attempts=attempt,
+            cached=lesson_result.cached,
+            autofix_turns_saved=lesson_result.autofix_turns_saved,
+            stop_reason=lesson_result.stop_reason,
+            cost_saved_usd=lesson_result.cost_saved_usd,
+            fix_model=ladder.current,
+            generation_mode=generation_mode,
+        )
+        return lesson_result
+
+    def _over_budget() -> str | None:
+        if (exceeded := budget.exceeded()) is not None:
+            return f"lesson_budget_{exceeded}"
+        if global_budget is not None and (exceeded := global_budget.exceeded()) is not None:
+            return f"global_budget_{exceeded}"
+        return None
+
+    async def _run_budgeted(
+        prompt: str,
+        options: ClaudeAgentOptions,
+        echo: bool = True,
+    ) -> AgentRun | None:
+        """Run the agent under the remaining time budget; None on timeout."""
+        deadlines = [budget.remaining_seconds()]
+        if global_budget is not None:
+            deadlines.append(global_budget.remaining_seconds())
+        deadlines = [d for d in deadlines if d is not None]
+        try:
+            run = await asyncio.wait_for(
+                _run_agent(prompt=prompt, options=options, echo=echo),
+                timeout=min(deadlines) if deadlines else None,
+            )
+        except asyncio.TimeoutError:
+            _log("\n⏱️  Time budget ran out during an agent run.")
+            return None
+        budget.charge(run.cost_usd, run.num_turns)
+        if global_budget is not None:
+            global_budget.charge(run.cost_usd, run.num_turns)
+        return run
+
+    async def _repair_components(result: ValidationResult) -> bool:
+        """Fix broken top-level components with one small call each.
+
+        Only attempted when every error lies inside one of at most
+        COMPONENT_REPAIR_MAX_FRAGMENTS components. Returns True if
+        corrected fragments were spliced into the file.
+        """
+        try:
+            source = output_file.read_text(encoding="utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            return False
+        components = split_components(source)
+        located = locate_components(components, result.diagnostics) if components else None
+        if not located or len(located) > COMPONENT_REPAIR_MAX_FRAGMENTS:
+            return False
+
+        start = time.perf_counter()
+        names = ", ".join(
+            f"<{components[i].name}>" + (f" {components[i].id}" if components[i].id else "")
+            for i in located
+        )
+        _log(f"\n🧩 Repairing {len(located)} component(s) in isolation: {names}")
+        repair_model = ladder.current
+        options = _oneshot_options(repair_model, build_repair_system_prompt())
+        runs = await asyncio.gather(*(
+            _run_budgeted(
+                build_repair_prompt(components[i].text(source), errors, components[i].start_line),
+                options,
+                echo=False,
+            )
+            for i, errors in located.items()
+        ))
+
+        replacements = {}
+        for index, run in zip(located, runs):
+            fragment = _repaired_fragment(run, components[index]) if run else None
+            if fragment is not None:
+                replacements[index] = fragment
+
+        repaired = splice(source, components, replacements)
+        # Never accept a splice that makes the structure worse
+        accepted = False
+        if replacements:
+            before, after = await asyncio.gather(
+                asyncio.to_thread(check_mlai_text, source), asyncio.to_thread(check_mlai_text, repaired)
+            )
+            accepted = len(after) <= len(before)
+        if accepted:
+            output_file.write_text(repaired, encoding="utf-8")
+            _log(f"   Spliced {len(replacements)}/{len(located)} repaired component(s) back in")
+        else:
+            _log("   No usable repair; falling back to a full-session fix")
 
-    print(f"\n{'=' * 60}")
-    print(f"Generating: {lesson_id}")
-    print(f"  Spec:   {lesson_spec_path}")
-    print(f"  Output: {output_file}")
-    print(f"  Model:  {model}")
-    print(f"{'=' * 60}\n")
+        done = [run for run in runs if run is not None]
+        cost = sum(run.cost_usd for run in done)
+        usage = {name: sum(run.usage.get(name, 0) for run in done) for name in USAGE_FIELDS}
+        _metric(
+            "component_repair",
+            attempt=attempt,
+            wall_s=round(time.perf_counter() - start, 3),
+            components=len(located),
+            spliced=len(replacements) if accepted else 0,
+            fragment_lines=sum(components[i].end_line - components[i].start_line + 1 for i in located),
+            cost_usd=cost,
+            **usage,
+            **_tier_fields(repair_model, cost, usage),
+        )
+        return accepted
+
+    async def _generate_parts(spec_text: str, context_pack: str) -> bool:
+        """Fan-out generation: write the assembled lesson; False if a part failed."""
+        start = time.perf_counter()
+        options = _oneshot_options(model, build_part_system_prompt())
+        runs = await asyncio.gather(*(
+            _run_budgeted(
+                build_part_prompt(part.title, part.instructions, spec_text, context_pack),
+                options,
+                echo=False,
+            )
+            for part in PARTS
+        ))
+
+        parts, failed = [], []
+        for part, run in zip(PARTS, runs):
+            components = extract_part(part, "\n".join(run.text)) if run else None
+            if run is not None:
+                _metric("generation_part", part=part.name, components=len(components or []), **run.metrics())
+            if components is None:
+                failed.append(part.name)
+            else:
+                parts.append((part, components))
+                _log(f"   🧱 {part.title}: {len(components)} element(s)")
+
+        done = [run for run in runs if run is not None]
+        _metric(
+            "generation",
+            mode="fanout",
+            wall_s=round(time.perf_counter() - start, 3),
+            success=not failed,
+            cost_usd=sum(run.cost_usd for run in done),
+            num_turns=sum(run.num_turns for run in done),
+            **{name: sum(run.usage.get(name, 0) for run in done) for name in USAGE_FIELDS},
+            failed_parts=failed,
+        )
+        if failed:
+            _log(f"\n⚠️  Unusable fan-out part(s): {', '.join(failed)}")
+            return False
+
+        title, tags = lesson_meta(spec_text, context.lesson_slice(lesson_id) if context else {}, lesson_id)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(assemble_lesson(mlai_id, title, tags, parts), encoding="utf-8")
+        _log(f"   Assembled {sum(len(c) for _, c in parts)} element(s) into {output_file}")
+        return True
+
+    cache_key = None
+    if cache is not None:
+        cache_key = lesson_cache_key(
+            lesson_spec_path, context, lesson_id, model, tuple(ladder.models), prerequisite_digests
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            output_file.write_text(cached, encoding="utf-8")
+            _log(f"♻️  Restored from cache ({lesson_id})")
+            _log(f"   Output: {output_file}")
+            _metric("cache_hit", wall_s=round(time.perf_counter() - lesson_start, 4))
+            return _finish(LessonResult(success=True, cached=True, stop_reason="cached"))
+
+    if (reason := _over_budget()) is not None:
+        _log(f"💸 Budget exhausted before starting ({reason}).")
+        return _finish(LessonResult(success=False, stop_reason=reason))
 
     # ------------------------------------------------------------------
     # Phase 1: Generation
     # ------------------------------------------------------------------
-    print("📝 Phase 1: Generating MLAI content...\n")
+    session_id = None
+    session_tokens = 0  # estimated context of session_id (AgentRun.context_tokens)
 
-    gen_prompt = build_generation_prompt(
-        lesson_spec_path=lesson_spec_path,
-        curriculum_path=curriculum_path,
-        output_file=output_file,
-        lesson_id=mlai_id,
-    )
+    if resume_existing and output_file.exists():
+        # Fix turns start a fresh session; the fix prompt names the file.
+        _log(f"⏩ Resuming from existing file (generation skipped): {output_file}")
+        generation_mode = "resumed"
+    else:
+        _record(GENERATING)
+        spec_text = lesson_path.read_text(encoding="utf-8")
+        context_pack = context.context_pack(lesson_id) if context else None
+        if context_pack is not None and prerequisite_digests:
+            context_pack += "\n\n" + prerequisite_digests
 
-    agent_ok, session_id = await _run_agent(
-        prompt=gen_prompt,
-        options=_agent_options(model=model, max_turns=max_turns),
-    )
+        if fanout:
+            _log(f"📝 Phase 1: Generating {len(PARTS)} lesson parts concurrently...\n")
+            with tracing.span("generation", "phase", mode="fanout"):
+                assembled = await _generate_parts(spec_text, context_pack or "")
+            if assembled:
+                generation_mode = "fanout"
+            elif (reason := _over_budget()) is not None:
+                return _finish(LessonResult(success=False, stop_reason=reason))
+            else:
+                _log("   Falling back to single-agent generation")
+
+    if generation_mode is None:
+        _log("📝 Phase 1: Generating MLAI content...\n")
+        generation_mode = "single"
+
+        gen_prompt = build_generation_prompt(
+            lesson_spec_path=lesson_spec_path,
+            curriculum_path=curriculum_path,
+            output_file=output_file,
+            lesson_id=mlai_id,
+            spec_text=spec_text,
+            context_pack=context_pack,
+        )
+
+        with tracing.span("generation", "phase", mode="single"):
+            run = await _run_budgeted(gen_prompt, _agent_options(model=model, max_turns=max_turns))
+        if run is None:
+            return _finish(LessonResult(success=False, stop_reason=_over_budget() or "lesson_budget_time"))
+        session_id = run.session_id
+        session_tokens = run.context_tokens()
+        _metric("generation", mode="single", **run.metrics())
 
-    if not agent_ok:
-        print("\n❌ Agent failed during generation phase.")
-        return False
+        if not run.success:
+            _log("\n❌ Agent failed during generation phase.")
+            return _finish(LessonResult(success=False, stop_reason="generation_failed"))
 
     # ------------------------------------------------------------------
     # Phase 2: External validation loop
     # ------------------------------------------------------------------
+    turns_saved = 0
+    tracker = ConvergenceTracker(CONVERGENCE_STALL_REPEATS, CONVERGENCE_WINDOW)
+    escalated = False
+    sent_keys: set = set()  # diagnostics in the last fix prompt of this session
+    repaired_keys: frozenset | None = None  # diagnostics at the last component repair
+
+    def _give_up(reason: str) -> LessonResult:
+        return _finish(
+            LessonResult(success=False, autofix_turns_saved=turns_saved, stop_reason=reason)
+        )
+
     for attempt in range(1, MAX_VALIDATION_ATTEMPTS + 1):
-        print(f"\n{'─' * 40}")
-        print(f"🔍 Validation attempt {attempt}/{MAX_VALIDATION_ATTEMPTS}")
-        print(f"{'─' * 40}")
+        _log(f"\n{'─' * 40}")
+        _log(f"🔍 Validation attempt {attempt}/{MAX_VALIDATION_ATTEMPTS}")
+        _log(f"{'─' * 40}")
+        _record(VALIDATING, attempt=attempt)
 
-        result = validate_mlai_file(output_file)
+        result = await _validate(output_file, _metric, validation_cache, attempt=attempt)
+
+        if not result.success:
+            start = time.perf_counter()
+            with tracing.span("autofix", "phase", attempt=attempt):
+                repair = await asyncio.to_thread(autofix_mlai_file, output_file)
+            if repair.applied:
+                _metric(
+                    "autofix",
+                    attempt=attempt,
+                    wall_s=round(time.perf_counter() - start, 4),
+                    fixes=repair.fixes,
+                    issues_before=repair.issues_before,
+                    issues_after=repair.issues_after,
+                )
+                _log(f"🩹 Auto-fixed: {'; '.join(repair.fixes)}")
+                result = await _validate(
+                    output_file, _metric, validation_cache, attempt=attempt, after_autofix=True,
+                )
+                if result.success:
+                    turns_saved += 1
 
         if result.success:
-            print(f"\n✅ Validation passed! ({lesson_id})")
-            print(f"   Output: {output_file}")
-            return True
+            _log(f"\n✅ Validation passed! ({lesson_id})")
+            _log(f"   Output: {output_file}")
+            if turns_saved:
+                _log(f"   🩹 Auto-fixer saved {turns_saved} agent fix turn(s)")
+            if cache is not None:
+                cache.put(cache_key, output_file.read_text(encoding="utf-8"))
+            return _finish(
+                LessonResult(success=True, autofix_turns_saved=turns_saved, stop_reason="passed")
+            )
 
-        print(f"\n❌ Validation failed ({result.error_count} error(s)):")
+        _log(f"\n❌ Validation failed ({result.error_count} error(s)):")
         # Show a preview of the errors
         for line in result.raw_output.splitlines()[:20]:
-            print(f"   {line}")
+            _log(f"   {line}")
         if len(result.raw_output.splitlines()) > 20:
-            print(f"   ... ({len(result.raw_output.splitlines()) - 20} more lines)")
+            _log(f"   ... ({len(result.raw_output.splitlines()) - 20} more lines)")
 
         if attempt == MAX_VALIDATION_ATTEMPTS:
-            print(f"\n❌ Exhausted {MAX_VALIDATION_ATTEMPTS} validation attempts for {lesson_id}.")
-            return False
+            _log(f"\n❌ Exhausted {MAX_VALIDATION_ATTEMPTS} validation attempts for {lesson_id}.")
+            return _give_up("max_attempts")
+
+        if (reason := _over_budget()) is not None:
+            _log(f"\n💸 Budget exhausted for {lesson_id} ({reason}).")
+            return _give_up(reason)
+
+        reason = tracker.observe(result)
+        if reason is None and not ladder.at_top and tracker.attempts_without_progress >= fix_escalate_after:
+            reason = "no_progress"
+        if reason is not None and ladder.escalate():
+            # Move fixes up one model tier; the session carries over
+            _log(f"\n⬆️  Fix loop not converging ({reason}); fixing with {ladder.current} from now on.")
+            _metric("escalation", attempt=attempt, reason=reason, fix_model=ladder.current)
+            tracker.reset()
+        elif reason is not None:
+            if escalated:
+                _log(f"\n🛑 Fix loop not converging for {lesson_id} ({reason}); giving up.")
+                return _give_up(reason)
+            # Escalate once: drop the fix history and start a fresh session
+            _log(f"\n🔄 Fix loop not converging ({reason}); retrying in a fresh session.")
+            _metric("escalation", attempt=attempt, reason=reason)
+            escalated = True
+            session_id = None
+            tracker.reset()
 
         # ------------------------------------------------------------------
-        # Phase 3: Feed errors back to agent for fixing
+        # Phase 3a: Repair broken components in isolation. If the previous
+        # repair left exactly the same errors, go straight to a session fix.
         # ------------------------------------------------------------------
-        print(f"\n🔧 Sending errors to agent for fixing (attempt {attempt})...\n")
+        current_keys = frozenset(d.key for d in result.diagnostics)
+        if current_keys != repaired_keys:
+            repaired_keys = current_keys
+            with tracing.span("component repair", "phase", attempt=attempt):
+                repaired = await _repair_components(result)
+            if repaired:
+                continue
+            if (reason := _over_budget()) is not None:
+                return _give_up(reason)
 
+        # ------------------------------------------------------------------
+        # Phase 3b: Feed errors back to agent for fixing
+        # ------------------------------------------------------------------
+        _log(f"\n🔧 Sending errors to agent for fixing (attempt {attempt})...\n")
+
+        rotated = False
+        if session_id and fix_session_tokens and session_tokens >= fix_session_tokens:
+            _log(f"🔁 Fix session context ~{session_tokens:,} tokens; continuing in a fresh session.")
+            session_id = None
+            rotated = True
+
+        try:
+            source = output_file.read_text(encoding="utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            source = None
         fix_prompt = build_fix_prompt(
             output_file=output_file,
             validation_errors=result.raw_output,
             attempt=attempt,
+            diagnostics=result.diagnostics,
+            # A fresh session has seen nothing yet
+            previous=sent_keys if session_id else None,
+            source=source,
+            rotated=rotated,
         )
+        sent_keys = {d.key for d in result.diagnostics}
+        fresh_session = session_id is None
 
         # Resume the same session so the agent has full context
-        fix_ok, session_id = await _run_agent(
-            prompt=fix_prompt,
-            options=_agent_options(
-                model=model,
-                max_turns=max_turns,
-                session_id=session_id,
-            ),
+        with tracing.span("fix", "phase", attempt=attempt, model=ladder.current, fresh_session=fresh_session):
+            run = await _run_budgeted(
+                fix_prompt,
+                _agent_options(
+                    model=ladder.current,
+                    max_turns=max_turns,
+                    session_id=session_id,
+                ),
+            )
+        if run is None:
+            return _give_up(_over_budget() or "lesson_budget_time")
+        session_id = run.session_id
+        _metric(
+            "fix",
+            attempt=attempt,
+            prompt_chars=len(fix_prompt),
+            session_tokens=0 if fresh_session else session_tokens,
+            fresh_session=fresh_session,
+            rotated=rotated,
+            **run.metrics(),
+            **_tier_fields(ladder.current, run.cost_usd, run.usage),
         )
+        session_tokens = run.context_tokens()
 
-        if not fix_ok:
-            print(f"\n⚠️  Agent reported issues during fix attempt {attempt}, re-validating anyway...")
+        if not run.success:
+            _log(f"\n⚠️  Agent reported issues during fix attempt {attempt}, re-validating anyway...")
 
-    return False
+    return _give_up("max_attempts")
 
 
 # ---------------------------------------------------------------------------
@@ -212,71 +982,426 @@ async def generate_lesson(
 # ---------------------------------------------------------------------------
 
 
+async def _generate_hedged(policy: HedgePolicy, arguments: dict) -> LessonResult:
+    """Run ``generate_lesson(**arguments)``, hedged according to ``policy``.
+
+    Once the lesson is past ``policy.latency_s`` or reaches attempt
+    ``policy.attempts``, a second generation starts into a scratch
+    directory beside the output, with a lesson budget of at most
+    ``policy.max_extra_usd``. The first of the two to pass wins: the other
+    run is cancelled (and awaited) before the winner's file is moved to the
+    usual output path, and the scratch files are removed. A run that raises
+    loses without stopping the other. If neither passes, the original's
+    result stands.
+    """
+    lesson_id = Path(arguments["lesson_spec_path"]).stem
+    telemetry: Telemetry | None = arguments["telemetry"]
+    journal: ProgressJournal | None = arguments["journal"]
+    output_file = (PROJECT_ROOT / arguments["output_dir"] / f"{lesson_id}.mlai").resolve()
+    hedge_dir = output_file.parent / ".hedge" / lesson_id
+    start = time.perf_counter()
+
+    primary_tap = TelemetryTap(telemetry)
+    primary = asyncio.create_task(generate_lesson(**{**arguments, "telemetry": primary_tap}))
+    runs: dict[asyncio.Task, str] = {primary: "primary"}
+    hedge_lines: list[str] = []
+
+    try:
+        trigger = None
+        while not primary.done():
+            elapsed = time.perf_counter() - start
+            if policy.latency_s is not None and elapsed >= policy.latency_s:
+                trigger = "latency"
+                break
+            if policy.attempts is not None and primary_tap.attempt >= policy.attempts:
+                trigger = "attempts"
+                break
+            primary_tap.progressed.clear()
+            progressed = asyncio.create_task(primary_tap.progressed.wait())
+            timeout = None if policy.latency_s is None else policy.latency_s - elapsed
+            await asyncio.wait({primary, progressed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            progressed.cancel()
+        if trigger is None:
+            return primary.result()
+
+        hedge_start = time.perf_counter() - start
+        _log(f"\n🏁 Past the {trigger} threshold ({policy.describe()}); starting a hedged generation")
+        limits = arguments["lesson_limits"] or BudgetLimits()
+        hedge_limits = dataclasses.replace(
+            limits, max_cost_usd=min(policy.max_extra_usd, limits.max_cost_usd or policy.max_extra_usd)
+        )
+        hedge_tap = TelemetryTap(telemetry, keep_summary=False, run="hedge")
+
+        hedge_dir.mkdir(parents=True, exist_ok=True)
+
+        async def _hedge() -> LessonResult:
+            _output_buffer.set(hedge_lines)  # kept apart, shown once the race is decided
+            tracing.set_track(f"{lesson_id} (hedge)")
+            return await generate_lesson(**{
+                **arguments,
+                "output_dir": str(hedge_dir),
+                "telemetry": hedge_tap,
+                "lesson_limits": hedge_limits,
+                "journal": None,
+                "resume_existing": False,
+            })
+
+        runs[asyncio.create_task(_hedge())] = "hedge"
+        primary_tap.keep_summary = False  # one summary for the race, below
+
+        results: dict[str, LessonResult] = {}
+        pending = set(runs)
+        while pending and not any(results.values()):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    results[runs[task]] = task.result()
+                except Exception as exc:
+                    # A crashed run loses the race; the other one carries on
+                    _log(f"\n⚠️  {runs[task].capitalize()} run of {lesson_id} crashed: {exc!r}")
+                    results[runs[task]] = LessonResult(success=False, stop_reason="error")
+        # Stop the loser before touching the output: it may still write there
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        hedge_won = bool(results.get("hedge")) and not results.get("primary")
+        if hedge_won:
+            os.replace(hedge_dir / f"{lesson_id}.mlai", output_file)
+    finally:
+        for task in runs:
+            task.cancel()
+        await asyncio.gather(*runs, return_exceptions=True)
+        if hedge_lines:
+            _log("\n".join(f"   ↳ hedge: {line}" for text in hedge_lines for line in text.split("\n")))
+        if "hedge" in runs.values():
+            shutil.rmtree(hedge_dir, ignore_errors=True)
+            with contextlib.suppress(OSError):
+                hedge_dir.parent.rmdir()
+
+    outcome = "won" if hedge_won else "lost"
+    extra = hedge_tap.cost_usd
+    _log(f"🏁 Hedged generation {outcome} (extra ${extra:.4f})")
+    context = arguments["context"]
+    module_id = context.module_id(lesson_id) if context else None
+    if hedge_won:
+        result = dataclasses.replace(results["hedge"], cost_usd=primary_tap.cost_usd + extra, hedge=outcome)
+        if journal is not None:
+            journal.record(lesson_id, SUCCEEDED, hedge=outcome)
+        summary = {**(hedge_tap.summary or {}), "success": True}
+    else:
+        # Neither passed first, or the original did: its result stands
+        result = results["primary"]
+        result.cost_usd += extra
+        result.hedge = outcome
+        summary = dict(primary_tap.summary or {})
+
+    if telemetry is not None:
+        telemetry.record(
+            lesson_id=lesson_id,
+            module_id=module_id,
+            phase="hedge",
+            outcome=outcome,
+            trigger=trigger,
+            started_after_s=round(hedge_start, 3),
+            cost_usd=round(extra, 6),
+            attempts=hedge_tap.attempt,
+        )
+        telemetry.record(**{
+            **summary,
+            "lesson_id": lesson_id,
+            "module_id": module_id,
+            "phase": "lesson",
+            "wall_s": round(time.perf_counter() - start, 3),
+            "cost_usd": result.cost_usd,
+            "hedge": outcome,
+        })
+    return result
+
+
+def _write_enriched_curriculum(curriculum: dict, success_ids: set[str], path: Path) -> None:
+    """Atomically write curriculum.json with mlai_path on each passed lesson."""
+    enriched = copy.deepcopy(curriculum)
+    for module in enriched["modules"]:
+        module_id = module["module_id"]
+        for lesson in module["lessons"]:
+            lesson_id = lesson["lesson_id"]
+            if lesson_id in success_ids:
+                lesson["mlai_path"] = f"{module_id}/{lesson_id}.mlai"
+
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(enriched, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _enriched_lessons(path: Path) -> set[str]:
+    """Lessons an enriched curriculum from an earlier run lists as passed."""
+    try:
+        enriched = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
+    return {
+        lesson["lesson_id"]
+        for module in enriched.get("modules", [])
+        for lesson in module.get("lessons", [])
+        if lesson.get("mlai_path")
+    }
+
+
 async def generate_all_lessons(
     curriculum_path: str,
     output_dir: str,
     module_filter: str | None = None,
     model: str = DEFAULT_MODEL,
     max_turns: int = DEFAULT_MAX_TURNS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: GenerationCache | None = None,
+    resume: bool = False,
+    telemetry: Telemetry | None = None,
+    lesson_limits: BudgetLimits | None = None,
+    global_budget: Budget | None = None,
+    fix_models: tuple[str, ...] = DEFAULT_FIX_MODELS,
+    fix_escalate_after: int = FIX_ESCALATE_AFTER,
+    fix_session_tokens: int = FIX_SESSION_MAX_TOKENS,
+    fanout: bool = False,
+    validation_cache: ValidationCache | None = None,
+    prerequisites: bool = True,
+    hedge: HedgePolicy | None = None,
 ) -> dict:
-    """Generate MLAI lessons for all lessons in the curriculum."""
+    """Generate MLAI lessons for all lessons in the curriculum.
+
+    Up to ``concurrency`` lessons run at once. With ``prerequisites``, a
+    lesson waits for the earlier lessons its ``warmup_callback`` names (see
+    prerequisites.prerequisite_graph); lessons that name none run side by
+    side. Each lesson's prompt then carries compact digests of those of
+    its prerequisites that passed, in this run or (per the journal or
+    enriched curriculum) an earlier one, rather than their files. With
+    ``concurrency > 1`` each lesson's console output is buffered and
+    printed as one block, tagged with its lesson ID, once that lesson
+    finishes. Results are always reported in curriculum order, exactly as
+    in a serial run.
+
+    Progress is journaled to ``<output_dir>/journal.jsonl`` and
+    ``new_curriculum.json`` is rewritten atomically after every lesson, so
+    a crashed run leaves usable partial output. With ``resume=True``,
+    lessons the journal marks as succeeded are skipped, and lessons that
+    were in flight continue from their on-disk ``.mlai``.
+
+    Every lesson gets its own budget from ``lesson_limits`` and all of them
+    draw on ``global_budget``; once that is spent, remaining lessons fail
+    fast with a ``global_budget_*`` stop reason. ``hedge`` is passed on to
+    every lesson (see generate_lesson). A lesson that raises is recorded as
+    failed with stop reason ``error``, and the rest of the batch carries on.
+    """
     curriculum_file = Path(curriculum_path)
     curriculum_dir = curriculum_file.parent
 
     with open(curriculum_file, encoding="utf-8") as f:
         curriculum = json.load(f)
+    context = CurriculumContext(curriculum, Ontology.find(curriculum_dir))
+    if context.ontology is not None:
+        print(f"🦉 Ontology: {context.ontology.source} ({len(context.ontology.concepts)} concepts)")
 
-    results: dict[str, list[str]] = {"success": [], "failed": [], "skipped": []}
+    results: dict = {
+        "success": [],
+        "failed": [],
+        "skipped": [],
+        "cached": [],
+        "resumed": [],
+        "autofix_turns_saved": 0,
+        "cost_saved_usd": 0.0,
+        "stop_reasons": {},
+    }
     output_dir_path = Path(output_dir)
+    output_dir_path.mkdir(parents=True, exist_ok=True)
+    output_curriculum = output_dir_path / "new_curriculum.json"
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
 
-    for module in curriculum["modules"]:
-        module_id = module["module_id"]
+    journal_path = output_dir_path / "journal.jsonl"
+    journal_states = load_journal(journal_path)
+    previous_states = journal_states if resume else {}
+    # Lessons that passed before this run; only their files are digested
+    passed_before = _enriched_lessons(output_curriculum) | {
+        lesson_id for lesson_id, entry in journal_states.items() if entry.get("state") == SUCCEEDED
+    }
+    journal = ProgressJournal(journal_path, fresh=not resume)
+    success_ids: set[str] = set()
 
-        if module_filter and module_id != module_filter:
-            continue
+    graph = prerequisite_graph(curriculum) if prerequisites else {}
+    finished: dict[str, asyncio.Event] = {}  # lessons scheduled in this run
+    digests: dict[str, LessonDigest | None] = {}
+
+    def _digest(lesson_id: str) -> LessonDigest | None:
+        """Digest of a passed lesson (in this run or an earlier one), if any."""
+        if lesson_id not in digests:
+            mlai = PROJECT_ROOT / output_dir_path / (context.module_id(lesson_id) or "") / f"{lesson_id}.mlai"
+            usable = lesson_id in success_ids or (
+                lesson_id not in finished and lesson_id in passed_before and mlai.exists()
+            )
+            digests[lesson_id] = digest_mlai(lesson_id, mlai.read_text(encoding="utf-8")) if usable else None
+        return digests[lesson_id]
 
-        print(f"\n📚 Module: {module['module_title']}")
+    async def _run_one(
+        lesson_id: str,
+        lesson_spec: Path,
+        module_output_dir: Path,
+        resume_existing: bool,
+    ) -> LessonResult:
+        track = tracing.set_track(lesson_id)
+        start = time.perf_counter()
+        try:
+            return await _run_after_prerequisites(lesson_id, lesson_spec, module_output_dir, resume_existing)
+        except Exception as exc:
+            # An unexpected error fails this lesson only; the batch carries on
+            print(f"\n💥 {lesson_id} failed with an unexpected error: {exc!r}")
+            journal.record(lesson_id, FAILED, stop_reason="error", error=repr(exc))
+            if telemetry is not None:
+                telemetry.record(
+                    lesson_id=lesson_id,
+                    module_id=context.module_id(lesson_id),
+                    phase="lesson",
+                    success=False,
+                    wall_s=round(time.perf_counter() - start, 3),
+                    stop_reason="error",
+                    error=repr(exc),
+                )
+            return LessonResult(success=False, stop_reason="error")
+        finally:
+            tracing.reset_track(track)
+            finished[lesson_id].set()
 
-        for lesson in module["lessons"]:
-            lesson_id = lesson["lesson_id"]
-            lesson_spec = curriculum_dir / module_id / f"{lesson_id}.md"
+    async def _run_after_prerequisites(
+        lesson_id: str,
+        lesson_spec: Path,
+        module_output_dir: Path,
+        resume_existing: bool,
+    ) -> LessonResult:
+        start = time.perf_counter()
+        depends = graph.get(lesson_id, [])
+        for prerequisite in depends:
+            if prerequisite in finished:
+                await finished[prerequisite].wait()
+        if depends:
+            tracing.complete("prerequisites", "wait", start, lessons=depends)
+        found = [d for d in map(_digest, depends) if d is not None]
 
-            if not lesson_spec.exists():
-                print(f"  ⚠️  Spec not found: {lesson_spec}")
-                results["skipped"].append(lesson_id)
+        start = time.perf_counter()
+        async with semaphore:
+            tracing.complete("queued", "wait", start)
+            # Serial runs print directly; concurrent runs buffer per lesson
+            lines: list[str] | None = [] if concurrency > 1 else None
+            token = _output_buffer.set(lines)
+            try:
+                if found:
+                    _log(f"🔗 Building on: {', '.join(d.lesson_id for d in found)}")
+                lesson_result = await generate_lesson(
+                    lesson_spec_path=str(lesson_spec),
+                    curriculum_path=curriculum_path,
+                    output_dir=str(module_output_dir),
+                    model=model,
+                    max_turns=max_turns,
+                    cache=cache,
+                    journal=journal,
+                    resume_existing=resume_existing,
+                    context=context,
+                    telemetry=telemetry,
+                    lesson_limits=lesson_limits,
+                    global_budget=global_budget,
+                    fix_models=fix_models,
+                    fix_escalate_after=fix_escalate_after,
+                    fix_session_tokens=fix_session_tokens,
+                    fanout=fanout,
+                    validation_cache=validation_cache,
+                    prerequisite_digests=render_digests(found),
+                    hedge=hedge,
+                )
+            finally:
+                _output_buffer.reset(token)
+                if lines is not None:
+                    _flush_output(lesson_id, lines)
+
+        if lesson_result:
+            success_ids.add(lesson_id)
+            _write_enriched_curriculum(curriculum, success_ids, output_curriculum)
+        return lesson_result
+
+    # (lesson_id, outcome) in curriculum order. The outcome is a LessonResult
+    # for lessons already run, a Task for lessons running concurrently, or
+    # None for skipped lessons.
+    outcomes: list[tuple[str, LessonResult | asyncio.Task | None]] = []
+
+    try:
+        for module in curriculum["modules"]:
+            module_id = module["module_id"]
+
+            if module_filter and module_id != module_filter:
                 continue
 
-            module_output_dir = output_dir_path / module_id
-            module_output_dir.mkdir(parents=True, exist_ok=True)
+            print(f"\n📚 Module: {module['module_title']}")
 
-            ok = await generate_lesson(
-                lesson_spec_path=str(lesson_spec),
-                curriculum_path=curriculum_path,
-                output_dir=str(module_output_dir),
-                model=model,
-                max_turns=max_turns,
-            )
+            for lesson in module["lessons"]:
+                lesson_id = lesson["lesson_id"]
+                lesson_spec = curriculum_dir / module_id / f"{lesson_id}.md"
 
-            if ok:
-                results["success"].append(lesson_id)
-            else:
-                results["failed"].append(lesson_id)
+                if not lesson_spec.exists():
+                    print(f"  ⚠️  Spec not found: {lesson_spec}")
+                    outcomes.append((lesson_id, None))
+                    continue
+
+                module_output_dir = output_dir_path / module_id
+                module_output_dir.mkdir(parents=True, exist_ok=True)
+
+                previous = previous_states.get(lesson_id, {}).get("state")
+                on_disk = (PROJECT_ROOT / module_output_dir / f"{lesson_id}.mlai").exists()
+
+                if previous == SUCCEEDED and on_disk:
+                    print(f"  ⏩ Already done: {lesson_id}")
+                    journal.record(lesson_id, SUCCEEDED, resumed=True)
+                    success_ids.add(lesson_id)
+                    outcomes.append((lesson_id, LessonResult(success=True, resumed=True)))
+                    continue
+
+                journal.record(lesson_id, PENDING)
+                resume_existing = previous in IN_FLIGHT and on_disk
+                finished[lesson_id] = asyncio.Event()
+                run = _run_one(lesson_id, lesson_spec, module_output_dir, resume_existing)
+
+                if concurrency <= 1:
+                    outcomes.append((lesson_id, await run))
+                else:
+                    outcomes.append((lesson_id, asyncio.create_task(run)))
+
+        tasks = [outcome for _, outcome in outcomes if isinstance(outcome, asyncio.Task)]
+        if tasks and graph:
+            chain = longest_chain(graph, list(finished))
+            print(f"\n🔗 Prerequisites: longest chain {chain} of {len(finished)} lessons")
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        journal.close()
+
+    for lesson_id, outcome in outcomes:
+        if outcome is None:
+            results["skipped"].append(lesson_id)
+            continue
+
+        lesson_result = outcome.result() if isinstance(outcome, asyncio.Task) else outcome
+        results["autofix_turns_saved"] += lesson_result.autofix_turns_saved
+        results["cost_saved_usd"] += lesson_result.cost_saved_usd
+        if lesson_result:
+            results["success"].append(lesson_id)
+            if lesson_result.cached:
+                results["cached"].append(lesson_id)
+            if lesson_result.resumed:
+                results["resumed"].append(lesson_id)
+        else:
+            results["failed"].append(lesson_id)
+            results["stop_reasons"][lesson_id] = lesson_result.stop_reason
 
     # ------------------------------------------------------------------
     # Write enriched curriculum.json to output with mlai_path fields
     # ------------------------------------------------------------------
-    success_set = set(results["success"])
-    enriched = copy.deepcopy(curriculum)
-    for module in enriched["modules"]:
-        module_id = module["module_id"]
-        for lesson in module["lessons"]:
-            lesson_id = lesson["lesson_id"]
-            if lesson_id in success_set:
-                lesson["mlai_path"] = f"{module_id}/{lesson_id}.mlai"
-
-    output_curriculum = output_dir_path / "new_curriculum.json"
-    with open(output_curriculum, "w", encoding="utf-8") as f:
-        json.dump(enriched, f, indent=2, ensure_ascii=False)
+    _write_enriched_curriculum(curriculum, success_ids, output_curriculum)
     print(f"\n📄 Curriculum written to {output_curriculum}")
 
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,358 @@
+"""
+Local HTTP job API with streaming progress.
+
+``JobManager`` keeps an in-process queue of jobs (the same job objects as
+``main.py serve``, see ``worker.py``). At most ``concurrency`` jobs run at
+once, and at most ``max_queued`` wait for a slot. Each job's telemetry
+records (generation, validation with its error count, fixes, repairs,
+cost) are turned into progress events, together with its state changes.
+``serve_api`` exposes the manager over plain HTTP/1.1 using only asyncio:
+
+    POST /jobs                 submit a job (JSON body) -> 202 {"id": ...}
+    GET  /jobs                 all jobs with their status
+    GET  /jobs/<id>            status: state, phase, attempt, errors, cost
+    POST /jobs/<id>/cancel     cancel a queued or running job (also DELETE /jobs/<id>)
+    GET  /jobs/<id>/result     the result, once the job has finished
+    GET  /jobs/<id>/events     progress as server-sent events, past ones first
+
+Jobs live in memory only. Run with ``main.py api --replay DIR`` to
+exercise the API offline against recorded agent calls.
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from agent import _output_buffer
+from cache import GenerationCache, ValidationCache
+from config import API_MAX_QUEUED
+from telemetry import Telemetry
+from worker import parse_job, run_job
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+# Telemetry fields passed on in progress events
+PROGRESS_FIELDS = (
+    "lesson_id", "phase", "attempt", "validator", "success", "error_count",
+    "cost_usd", "wall_s", "model", "stop_reason",
+)
+
+MAX_BODY_BYTES = 1 << 20
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+@dataclass
+class ApiJob:
+    """A submitted job and everything observed about it."""
+
+    id: str
+    spec: dict
+    state: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    result: dict | None = None
+    cost_usd: float = 0.0
+    last_progress: dict = field(default_factory=dict)
+    events: list[dict] = field(default_factory=list)
+    log: list[str] = field(default_factory=list)
+    task: asyncio.Task | None = None
+    subscribers: set[asyncio.Queue] = field(default_factory=set)
+
+    def emit(self, event: dict) -> None:
+        event = {"seq": len(self.events), "ts": round(time.time(), 3), **event}
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def set_state(self, state: str, **fields) -> None:
+        self.state = state
+        self.emit({"type": "state", "state": state, **fields})
+
+    def status(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "input": self.spec.get("input"),
+            "created": round(self.created, 3),
+            "started": round(self.started, 3) if self.started else None,
+            "finished": round(self.finished, 3) if self.finished else None,
+            "phase": self.last_progress.get("phase"),
+            "lesson_id": self.last_progress.get("lesson_id"),
+            "attempt": self.last_progress.get("attempt"),
+            "error_count": self.last_progress.get("error_count"),
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+class _ProgressTelemetry:
+    """Telemetry stand-in that turns a job's records into progress events.
+
+    Records are also passed on to the shared ``Telemetry``, when there is one.
+    """
+
+    def __init__(self, job: ApiJob, forward: Telemetry | None) -> None:
+        self.job = job
+        self.forward = forward
+
+    def record(self, **fields) -> None:
+        if self.forward is not None:
+            self.forward.record(**fields)
+        if fields.get("phase") == "lesson":
+            return  # the job's own state events cover it
+        progress = {k: fields[k] for k in PROGRESS_FIELDS if k in fields}
+        if fields.get("phase") != "generation_part":  # the fan-out generation record sums its parts
+            self.job.cost_usd += fields.get("cost_usd") or 0.0
+        self.job.last_progress.update(progress)
+        self.job.emit({"type": "progress", **progress, "total_cost_usd": round(self.job.cost_usd, 6)})
+
+
+class JobManager:
+    """In-process job queue with bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        max_queued: int = API_MAX_QUEUED,
+        cache: GenerationCache | None = None,
+        validation_cache: ValidationCache | None = None,
+        telemetry: Telemetry | None = None,
+    ) -> None:
+        self.concurrency = max(concurrency, 1)
+        self.max_queued = max_queued
+        self.cache = cache
+        self.validation_cache = validation_cache
+        self.telemetry = telemetry
+        self.jobs: dict[str, ApiJob] = {}
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    @property
+    def queued(self) -> int:
+        return sum(job.state == QUEUED for job in self.jobs.values())
+
+    def submit(self, spec: dict) -> ApiJob:
+        """Queue a job. Raises ValueError if it is invalid, OverflowError if the queue is full."""
+        spec = parse_job(spec)
+        job_id = spec.get("id")
+        if job_id is None:
+            job_id = uuid.uuid4().hex[:12]
+        if not isinstance(job_id, str) or not job_id or "/" in job_id:
+            raise ValueError('a job "id" must be a non-empty string without "/"')
+        if self.queued >= self.max_queued:
+            raise OverflowError(f"{self.max_queued} jobs already waiting")
+        job = ApiJob(id=job_id, spec=spec)
+        if job.id in self.jobs:
+            raise ValueError(f"job id already used: {job.id}")
+        self.jobs[job.id] = job
+        job.set_state(QUEUED)
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def cancel(self, job: ApiJob) -> bool:
+        """Cancel a queued or running job; False if it already finished."""
+        if job.state in FINISHED:
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job: ApiJob) -> None:
+        try:
+            async with self._slots:
+                job.started = time.time()
+                job.set_state(RUNNING)
+                _output_buffer.set(job.log)
+                result = await run_job(
+                    job.spec,
+                    self.cache,
+                    self.validation_cache,
+                    _ProgressTelemetry(job, self.telemetry),
+                )
+        except asyncio.CancelledError:
+            job.result = {"success": False, "stop_reason": "cancelled"}
+            self._finish(job, CANCELLED)
+            return
+        except Exception as exc:
+            job.result = {"success": False, "error": f"{type(exc).__name__}: {exc}"}
+            self._finish(job, FAILED, error=job.result["error"])
+            return
+        job.result = result
+        self._finish(job, SUCCEEDED if result.get("success") else FAILED)
+
+    def _finish(self, job: ApiJob, state: str, **fields) -> None:
+        job.finished = time.time()
+        job.set_state(state, cost_usd=round(job.cost_usd, 6), **fields)
+
+    async def close(self) -> None:
+        """Cancel every unfinished job and wait for them to wind down."""
+        tasks = [job.task for job in self.jobs.values() if job.state not in FINISHED]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    method, target, _ = parts
+
+    headers = {}
+    while (line := (await reader.readline()).decode("latin-1").strip()):
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), urlsplit(target).path, body
+
+
+def _response(status: HTTPStatus, payload: dict | list) -> bytes:
+    body = json.dumps(payload, indent=2).encode("utf-8") + b"\n"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _sse(event: dict) -> bytes:
+    return f"event: {event['type']}\nid: {event['seq']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+
+
+async def _stream_events(job: ApiJob, writer: asyncio.StreamWriter) -> None:
+    """Send the job's past events, then new ones until it finishes."""
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/event-stream\r\n"
+        b"Cache-Control: no-cache\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    # Subscribing and taking the backlog happen without yielding, so no
+    # event is missed or sent twice
+    queue: asyncio.Queue = asyncio.Queue()
+    job.subscribers.add(queue)
+    backlog = list(job.events)
+    try:
+        for event in backlog:
+            writer.write(_sse(event))
+        await writer.drain()
+        finished = any(e["type"] == "state" and e["state"] in FINISHED for e in backlog)
+        while not finished:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                writer.write(b": keep-alive\n\n")
+            else:
+                writer.write(_sse(event))
+                finished = event["type"] == "state" and event["state"] in FINISHED
+            await writer.drain()
+    finally:
+        job.subscribers.discard(queue)
+
+
+async def _route(manager: JobManager, method: str, path: str, body: bytes, writer) -> bytes | None:
+    """Handle one request; returns the response, or None if it was streamed."""
+    segments = [s for s in path.split("/") if s]
+    if not segments or segments[0] != "jobs":
+        raise _HttpError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+    if len(segments) == 1:
+        if method == "GET":
+            return _response(HTTPStatus.OK, [job.status() for job in manager.jobs.values()])
+        if method == "POST":
+            try:
+                spec = json.loads(body or b"null")
+                job = manager.submit(spec)
+            except json.JSONDecodeError:
+                raise _HttpError(HTTPStatus.BAD_REQUEST, "body is not valid JSON")
+            except ValueError as exc:
+                raise _HttpError(HTTPStatus.BAD_REQUEST, str(exc))
+            except OverflowError as exc:
+                raise _HttpError(HTTPStatus.TOO_MANY_REQUESTS, str(exc))
+            return _response(HTTPStatus.ACCEPTED, job.status())
+        raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET or POST")
+
+    job = manager.jobs.get(segments[1])
+    if job is None:
+        raise _HttpError(HTTPStatus.NOT_FOUND, f"no job {segments[1]}")
+    action = segments[2] if len(segments) > 2 else None
+
+    if (action, method) in ((None, "DELETE"), ("cancel", "POST")):
+        if not manager.cancel(job):
+            raise _HttpError(HTTPStatus.CONFLICT, f"job already {job.state}")
+        return _response(HTTPStatus.ACCEPTED, job.status())
+    if method != "GET":
+        raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+    if action is None:
+        return _response(HTTPStatus.OK, job.status())
+    if action == "result":
+        if job.state not in FINISHED:
+            raise _HttpError(HTTPStatus.CONFLICT, f"job is {job.state}")
+        return _response(HTTPStatus.OK, {**job.status(), "result": job.result})
+    if action == "events":
+        await _stream_events(job, writer)
+        return None
+    raise _HttpError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+
+async def serve_api(manager: JobManager, host: str, port: int) -> None:
+    """Serve ``manager`` over HTTP until cancelled."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+                response = await _route(manager, method, path, body, writer)
+            except _HttpError as exc:
+                response = _response(exc.status, {"error": str(exc)})
+            except (asyncio.IncompleteReadError, ConnectionError):
+                response = None
+            except Exception as exc:
+                response = _response(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"})
+            if response is not None:
+                writer.write(response)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"🌐 Job API listening on http://{host}:{port} (up to {manager.concurrency} job(s) at once)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await manager.close()
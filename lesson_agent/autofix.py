@@ -0,0 +1,199 @@
+"""
+Deterministic repairs for mechanical MLAI errors.
+
+Some validation failures need no model at all: a ``<=`` left unescaped in
+``<Code>``, an underscore in ``<Id>``, ``<strong>`` in ``<Body>``, headings
+placed directly under ``<Lesson>``. The orchestration loop runs
+``autofix_mlai_file`` after a failed validation and only sends the agent
+what is left.
+
+Every rewrite only escapes, converts or wraps existing content — nothing
+is deleted — and a rewrite is written back only if it strictly reduces
+the pre-validator's issue count and no issue code occurs more often than
+before (a new code counts as an increase). Otherwise the file is left
+untouched.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from prevalidator import SECTION_CONTENT, check_mlai_text
+
+
+@dataclass
+class AutofixResult:
+    """Outcome of an auto-repair pass over one file."""
+
+    fixes: list[str] = field(default_factory=list)
+    """Human-readable description of each rewrite that was applied."""
+
+    issues_before: int = 0
+    """Pre-validator issue count before repairing."""
+
+    issues_after: int = 0
+    """Pre-validator issue count after repairing."""
+
+    @property
+    def applied(self) -> bool:
+        return bool(self.fixes)
+
+
+# ---------------------------------------------------------------------------
+# Rewrites
+# ---------------------------------------------------------------------------
+
+_CODE_RE = re.compile(r"(<Code\b(?:[^>/]|/(?!>))*>)(.*?)(</Code>)", re.S)
+_BODY_RE = re.compile(r"(<Body\b[^>]*>)(.*?)(</Body>)", re.S)
+_ID_RE = re.compile(r"(<Id>)(.*?)(</Id>)", re.S)
+_BARE_AMP_RE = re.compile(r"&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)")
+_TAG_RE = re.compile(r"<!--.*?-->|<\?.*?\?>|<(/?)([A-Za-z][\w.:-]*)[^<>]*?(/?)>", re.S)
+_VALID_ID_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+
+# HTML inline markup and its Markdown equivalent
+_HTML_TO_MARKDOWN = [
+    (re.compile(r"<(strong|b)>(.*?)</\1>", re.S | re.I), r"**\2**"),
+    (re.compile(r"<(em|i)>(.*?)</\1>", re.S | re.I), r"*\2*"),
+    (re.compile(r"<(code)>(.*?)</\1>", re.S | re.I), r"`\2`"),
+    (re.compile(r"<br\s*/?>", re.I), "\n"),
+]
+
+
+def _escape_code_blocks(text: str) -> tuple[str, int]:
+    """Escape ``<``, ``>`` and bare ``&`` in <Code> blocks that need it."""
+    count = 0
+
+    def repl(match: re.Match) -> str:
+        nonlocal count
+        body = match.group(2)
+        if "<" not in body and not _BARE_AMP_RE.search(body):
+            return match.group(0)
+        count += 1
+        body = _BARE_AMP_RE.sub("&amp;", body).replace("<", "&lt;").replace(">", "&gt;")
+        return match.group(1) + body + match.group(3)
+
+    return _CODE_RE.sub(repl, text), count
+
+
+def _escape_ampersands(text: str) -> tuple[str, int]:
+    """Escape any remaining bare ``&`` (never valid in XML)."""
+    return _BARE_AMP_RE.subn("&amp;", text)
+
+
+def _body_html_to_markdown(text: str) -> tuple[str, int]:
+    """Convert inline HTML emphasis/code/line breaks in <Body> to Markdown."""
+    count = 0
+
+    def repl(match: re.Match) -> str:
+        nonlocal count
+        body = match.group(2)
+        for pattern, replacement in _HTML_TO_MARKDOWN:
+            body, n = pattern.subn(replacement, body)
+            count += n
+        return match.group(1) + body + match.group(3)
+
+    return _BODY_RE.sub(repl, text), count
+
+
+def _sanitize_id(text: str) -> tuple[str, int]:
+    """Rewrite an invalid <Id> to letters, digits and hyphens."""
+    count = 0
+
+    def repl(match: re.Match) -> str:
+        nonlocal count
+        value = match.group(2).strip()
+        if _VALID_ID_RE.match(value):
+            return match.group(0)
+        fixed = re.sub(r"[^A-Za-z0-9-]+", "-", value).strip("-")
+        fixed = re.sub(r"-{2,}", "-", fixed)
+        if not fixed or not fixed[0].isalpha():
+            fixed = f"lesson-{fixed}".rstrip("-")
+        count += 1
+        return match.group(1) + fixed + match.group(3)
+
+    return _ID_RE.sub(repl, text, count=1), count
+
+
+def _wrap_loose_content(text: str) -> tuple[str, int]:
+    """Wrap runs of H1/H2/H3/Body/Code directly under <Lesson> in <Section>."""
+    depth = 0
+    runs: list[list[int]] = []  # [start, end] of each run of loose content
+    in_run = False
+
+    for match in _TAG_RE.finditer(text):
+        name = match.group(2)
+        if name is None:
+            continue
+        closing, selfclose = match.group(1), match.group(3)
+
+        if closing:
+            depth -= 1
+            if depth == 1 and in_run and name in SECTION_CONTENT:
+                runs[-1][1] = match.end()
+            continue
+
+        if depth == 1:
+            if name in SECTION_CONTENT:
+                if not in_run:
+                    runs.append([match.start(), match.end()])
+                    in_run = True
+                elif selfclose:
+                    runs[-1][1] = match.end()
+            else:
+                in_run = False
+        if not selfclose:
+            depth += 1
+
+    for start, end in reversed(runs):
+        indent = text[text.rfind("\n", 0, start) + 1:start]
+        if indent.strip():
+            indent = ""
+        text = f"{text[:start]}<Section>\n{indent}{text[start:end]}\n{indent}</Section>{text[end:]}"
+
+    return text, len(runs)
+
+
+_REWRITES = [
+    (_escape_code_blocks, "escaped {n} <Code> block(s)"),
+    (_escape_ampersands, "escaped {n} bare '&'"),
+    (_body_html_to_markdown, "converted {n} HTML tag(s) in <Body> to Markdown"),
+    (_sanitize_id, "sanitized <Id>"),
+    (_wrap_loose_content, "wrapped {n} run(s) of loose content in <Section>"),
+]
+
+
+# ---------------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------------
+
+
+def autofix_text(text: str) -> tuple[str, list[str]]:
+    """Apply every rewrite to MLAI source. Returns (new_text, fixes)."""
+    fixes: list[str] = []
+    for rewrite, description in _REWRITES:
+        text, n = rewrite(text)
+        if n:
+            fixes.append(description.format(n=n))
+    return text, fixes
+
+
+def autofix_mlai_file(file_path: Path) -> AutofixResult:
+    """Repair mechanical errors in a file in place, if that provably helps."""
+    try:
+        original = file_path.read_text(encoding="utf-8")
+    except (FileNotFoundError, UnicodeDecodeError):
+        return AutofixResult()
+
+    before = check_mlai_text(original)
+    fixed, fixes = autofix_text(original)
+    if not fixes:
+        return AutofixResult(issues_before=len(before), issues_after=len(before))
+
+    after = check_mlai_text(fixed)
+    increased = Counter(i.code for i in after) - Counter(i.code for i in before)
+    if len(after) >= len(before) or increased:
+        return AutofixResult(issues_before=len(before), issues_after=len(before))
+
+    file_path.write_text(fixed, encoding="utf-8")
+    return AutofixResult(fixes=fixes, issues_before=len(before), issues_after=len(after))
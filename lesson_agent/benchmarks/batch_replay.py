@@ -0,0 +1,245 @@
+"""
+End-to-end batch benchmark with replayed agent calls, serial vs. concurrent.
+
+Runs ``generate_all_lessons`` over a curriculum with ``replay.Replayer``
+standing in for the model, once per concurrency level, so the numbers are
+the orchestrator's own overhead plus validation: no network or API key is
+needed. For each run it reports batch wall time, validation latency (from
+the run's telemetry), event-loop stalls (how late a 5 ms ticker woke up)
+and memory (peak traced Python allocations and the process's peak RSS).
+
+Recordings come from ``--recordings`` (a ``main.py --record`` directory)
+or, by default, are synthesized from a finished output tree: one
+generation call per lesson that writes the corpus file after
+``--generation-seconds``.
+
+``--validator prevalidator`` counts a pre-validator pass as a pass, for
+machines without the course-engine build; ``auto`` (the default) picks
+``node`` when the validator CLI is present.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/batch_replay.py
+    uv run python benchmarks/batch_replay.py --concurrency 1,4,8 --speed 0
+    uv run python benchmarks/batch_replay.py --recordings ../recordings --speed 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from config import DEFAULT_VALIDATOR_WORKERS, PROJECT_ROOT, VALIDATOR_CLI  # noqa: E402
+from replay import Replayer, write_synthetic_recording  # noqa: E402
+from telemetry import Telemetry, load_metrics, percentile  # noqa: E402
+from validator import ValidationResult, ValidatorPool  # noqa: E402
+
+TICK_S = 0.005
+# Fewer ticks than this and the loop was busy (or the run short) for most
+# of the run: stall numbers say little. Runs shorter than MIN_COMPARE_S are
+# not compared for throughput; start-up and noise dominate them.
+MIN_TICKS = 20
+MIN_COMPARE_S = 1.0
+
+
+async def _prevalidated(file_path: Path, timeout: float = 0) -> ValidationResult:
+    """Stands in for the node validator: the pre-validator already passed."""
+    return ValidationResult(success=True, raw_output="", error_count=0)
+
+
+class StallMonitor:
+    """Measures event-loop stalls as the lateness of a fixed-interval ticker.
+
+    A tick that is still waiting when the monitor stops is counted too, with
+    the lag it had built up by then, so a run that blocks the loop from start
+    to finish shows one long stall rather than none.
+    """
+
+    def __init__(self, threshold_s: float) -> None:
+        self.threshold_s = threshold_s
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+        self._expected: float | None = None  # when the pending tick should wake
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._expected = loop.time() + TICK_S
+            await asyncio.sleep(TICK_S)
+            self.lags.append(max(0.0, loop.time() - self._expected))
+            self._expected = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self) -> None:
+        late = asyncio.get_running_loop().time() - self._expected if self._expected is not None else 0.0
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        if late > 0:
+            self.lags.append(late)
+
+    @property
+    def sampled(self) -> bool:
+        """Whether enough ticks ran for the lags to describe the run."""
+        return len(self.lags) >= MIN_TICKS
+
+    @property
+    def stalls(self) -> list[float]:
+        return [lag for lag in self.lags if lag >= self.threshold_s]
+
+
+def _synthesize(curriculum_path: Path, corpus: Path, directory: Path, seconds: float) -> int:
+    """Write one synthetic recording per curriculum lesson found in ``corpus``."""
+    curriculum = json.loads(curriculum_path.read_text(encoding="utf-8"))
+    count = 0
+    for module in curriculum["modules"]:
+        for lesson in module["lessons"]:
+            lesson_id = lesson["lesson_id"]
+            source = corpus / module["module_id"] / f"{lesson_id}.mlai"
+            if source.exists():
+                write_synthetic_recording(directory, lesson_id, source.read_text(encoding="utf-8"), seconds)
+                count += 1
+    return count
+
+
+async def _batch(args, recordings: Path, output_dir: Path, concurrency: int) -> dict:
+    replayer = Replayer(recordings, speed=args.speed)
+    agent.use_query(replayer)
+    telemetry = Telemetry(output_dir / "metrics.jsonl")
+    monitor = StallMonitor(args.stall_ms / 1000)
+
+    async with ValidatorPool(args.validator_workers):
+        monitor.start()
+        tracemalloc.start()
+        start = time.perf_counter()
+        log = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+            results = await agent.generate_all_lessons(
+                curriculum_path=str(args.curriculum),
+                output_dir=str(output_dir),
+                module_filter=args.module,
+                concurrency=concurrency,
+                telemetry=telemetry,
+            )
+        wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await monitor.stop()
+    telemetry.close()
+
+    records = load_metrics(telemetry.path, run_id=telemetry.run_id)
+    validations = [r for r in records if r.get("phase") == "validation"]
+    return {
+        "wall_s": wall,
+        "passed": len(results["success"]),
+        "failed": len(results["failed"]),
+        "agent_calls": replayer.calls,
+        "unrecorded_calls": replayer.misses,
+        "validation_s": [r["wall_s"] for r in validations],
+        "node_validations": sum(r.get("validator") == "node" for r in validations),
+        "stalls": monitor.stalls,
+        "stall_ms": args.stall_ms,
+        "max_lag_s": max(monitor.lags, default=0.0),
+        "ticks": len(monitor.lags),
+        "sampled": monitor.sampled,
+        "traced_peak_mb": peak / 2**20,
+        # ru_maxrss is in KiB on Linux and never decreases within a process
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _print(concurrency: int, run: dict) -> None:
+    samples = run["validation_s"]
+    validation = (
+        f"n={len(samples)} ({run['node_validations']} past the pre-validator) "
+        f"p50={percentile(samples, 50) * 1000:.1f}ms p95={percentile(samples, 95) * 1000:.1f}ms "
+        f"mean={statistics.mean(samples) * 1000:.1f}ms"
+        if samples else "n=0"
+    )
+    stalls = run["stalls"]
+    print(f"concurrency={concurrency}")
+    print(f"  batch       {run['wall_s']:.2f}s, {run['passed']} passed, {run['failed']} failed, "
+          f"{run['agent_calls']} agent calls ({run['unrecorded_calls']} without a recording)")
+    print(f"  validation  {validation}")
+    print(f"  loop stalls {len(stalls)} over {run['stall_ms']:g}ms, "
+          f"total {sum(stalls) * 1000:.0f}ms, max lag {run['max_lag_s'] * 1000:.1f}ms"
+          + ("" if run["sampled"] else f" (only {run['ticks']} ticks ran: too few to sample the loop)"))
+    print(f"  memory      traced peak {run['traced_peak_mb']:.1f} MiB, process peak RSS {run['peak_rss_mb']:.1f} MiB")
+
+
+async def _run(args, recordings: Path) -> None:
+    runs = {}
+    for concurrency in args.concurrency:
+        with tempfile.TemporaryDirectory(prefix="batch-replay-") as tmp:
+            runs[concurrency] = await _batch(args, recordings, Path(tmp), concurrency)
+        _print(concurrency, runs[concurrency])
+
+    serial = runs.get(1)
+    if serial and len(runs) > 1:
+        print()
+        if args.speed == 0:
+            print("With --speed 0 no generation time is replayed, so there is little for concurrency to overlap.")
+        for concurrency, run in runs.items():
+            if concurrency == 1:
+                continue
+            if not (serial["sampled"] and run["sampled"]) or min(serial["wall_s"], run["wall_s"]) < MIN_COMPARE_S:
+                print(f"concurrency={concurrency}: not compared; a run was too short or blocked the loop "
+                      f"throughout (replay more lessons, or at a lower, nonzero --speed)")
+                continue
+            print(f"concurrency={concurrency}: {serial['wall_s'] / run['wall_s']:.2f}x serial throughput")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--curriculum", type=Path, default=PROJECT_ROOT / "test_curriculum" / "curriculum.json")
+    parser.add_argument("--corpus", type=Path, default=PROJECT_ROOT / "test_output",
+                        help="Finished lessons to synthesize recordings from")
+    parser.add_argument("--recordings", type=Path, default=None,
+                        help="Replay these recordings instead of synthesizing them")
+    parser.add_argument("--module", default=None)
+    parser.add_argument("--concurrency", default="1,4",
+                        help="Comma-separated concurrency levels to compare (default: 1,4)")
+    parser.add_argument("--speed", type=float, default=100.0,
+                        help="Replay speed; 0 replays without delay (default: 100)")
+    parser.add_argument("--generation-seconds", type=float, default=60.0,
+                        help="Length of a synthesized generation call at speed 1 (default: 60)")
+    parser.add_argument("--validator", choices=("auto", "node", "prevalidator"), default="auto")
+    parser.add_argument("--validator-workers", type=int, default=DEFAULT_VALIDATOR_WORKERS)
+    parser.add_argument("--stall-ms", type=float, default=20.0,
+                        help="Lag above which a tick counts as a stall (default: 20)")
+    parser.add_argument("--verbose", action="store_true", help="Show the batch's own output")
+    args = parser.parse_args()
+    args.curriculum = args.curriculum.resolve()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    validator = args.validator
+    if validator == "auto":
+        validator = "node" if VALIDATOR_CLI.exists() else "prevalidator"
+    if validator == "prevalidator":
+        agent.validate_mlai_file_async = _prevalidated
+    print(f"Validator: {validator}")
+
+    with tempfile.TemporaryDirectory(prefix="recordings-") as tmp:
+        recordings = args.recordings.resolve() if args.recordings else Path(tmp)
+        if args.recordings is None:
+            count = _synthesize(args.curriculum, args.corpus.resolve(), recordings, args.generation_seconds)
+            print(f"Synthesized {count} recordings from {args.corpus} "
+                  f"({args.generation_seconds:g}s per generation at speed {args.speed:g})")
+        print()
+        asyncio.run(_run(args, recordings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Lesson load time: parsing .mlai XML vs. reading a compiled bundle.
+
+For every lesson in a corpus that parses, times what a server does to get
+a lesson ready for a session:
+
+* ``xml``: read the file, parse the XML and separate content from answer
+  keys (``bundle.split_lesson``), as at request time today;
+* ``bundle``: decode the content and answer-key sections from the mmapped
+  bundle (``bundle.BundleReader``), compiled once up front.
+
+Both paths return the same lesson, which the benchmark checks first.
+SortQuiz items and MatchPairs rights are shuffled on each split, so the
+check compares them by what the answer key points at, not by position.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/bundle_loader.py --corpus ../test_output
+    uv run python benchmarks/bundle_loader.py --corpus ../output2 --rounds 20
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bundle import BundleReader, compile_bundles, split_lesson  # noqa: E402
+from telemetry import percentile  # noqa: E402
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    return (
+        f"  {name:<8} p50={percentile(samples, 50) * 1000:7.3f}ms  "
+        f"p95={percentile(samples, 95) * 1000:7.3f}ms  mean={statistics.mean(samples) * 1000:7.3f}ms"
+    )
+
+
+def _resolved(content: list, answer_key: dict) -> tuple[list, dict]:
+    """Lesson with shuffled lists sorted and the key's positions replaced by the nodes they name."""
+    key = json.loads(json.dumps(answer_key))
+    by_id = {}
+
+    def walk(node: list) -> None:
+        tag, attrs, children = node
+        if attrs.get("id") in key:
+            by_id[attrs["id"]] = {child[0]: child for child in children if isinstance(child, list)}
+        for child in children:
+            if isinstance(child, list):
+                walk(child)
+
+    walk(content)
+    for id_, entry in key.items():
+        parts = by_id.get(id_, {})
+        if entry["type"] == "SortQuiz" and "SortedItems" in parts:
+            items = parts["SortedItems"][2]
+            entry["order"] = [items[position] for position in entry["order"]]
+            items.sort(key=json.dumps)
+        elif entry["type"] == "MatchPairs" and "Rights" in parts:
+            lefts, rights = parts["Lefts"][2], parts["Rights"][2]
+            entry["pairs"] = [[lefts[left], rights[right]] for left, right in entry["pairs"]]
+            rights.sort(key=json.dumps)
+    return content, key
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=Path(__file__).resolve().parents[2] / "test_output")
+    parser.add_argument("--rounds", type=int, default=10, help="Loads per lesson per mode (default: 10)")
+    args = parser.parse_args()
+
+    files = sorted(args.corpus.resolve().rglob("*.mlai"))
+    lessons = [(path.stem, path.parent.name, path) for path in files]
+
+    with tempfile.TemporaryDirectory(prefix="bundles-") as tmp:
+        out = Path(tmp)
+        start = time.perf_counter()
+        report = compile_bundles(out, lessons)
+        compile_s = time.perf_counter() - start
+        start = time.perf_counter()
+        again = compile_bundles(out, lessons)
+        recompile_s = time.perf_counter() - start
+
+        paths = {lesson_id: path for lesson_id, _, path in lessons if lesson_id not in report.failed}
+        source_bytes = sum(path.stat().st_size for path in paths.values())
+        print(f"Corpus: {len(paths)} lessons ({len(report.failed)} not well-formed, skipped), "
+              f"{source_bytes / 1024:.0f} KiB of XML -> {report.bytes / 1024:.0f} KiB bundle")
+        print(f"Compile: {compile_s:.2f}s cold, {recompile_s * 1000:.0f}ms with nothing changed "
+              f"({len(again.reused)} reused)")
+
+        start = time.perf_counter()
+        reader = BundleReader(out / "bundles")
+        open_s = time.perf_counter() - start
+
+        for lesson_id, path in paths.items():
+            bundled = _resolved(reader.content(lesson_id), reader.answer_key(lesson_id))
+            if _resolved(*split_lesson(path.read_bytes())) != bundled:
+                sys.exit(f"Bundle and XML disagree for {lesson_id}")
+
+        xml_s: list[float] = []
+        bundle_s: list[float] = []
+        for _ in range(args.rounds):
+            for lesson_id, path in paths.items():
+                start = time.perf_counter()
+                split_lesson(path.read_bytes())
+                xml_s.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                reader.content(lesson_id)
+                reader.answer_key(lesson_id)
+                bundle_s.append(time.perf_counter() - start)
+        reader.close()
+
+    print(f"Open index + mmap: {open_s * 1000:.2f}ms")
+    print(f"\nPer-lesson load ({args.rounds} rounds x {len(paths)} lessons)")
+    print(_summary("xml", xml_s))
+    print(_summary("bundle", bundle_s))
+    print(f"\nbundle is {statistics.mean(xml_s) / statistics.mean(bundle_s):.1f}x faster (mean)")
+
+
+if __name__ == "__main__":
+    main()
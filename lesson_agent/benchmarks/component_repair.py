@@ -0,0 +1,90 @@
+"""
+Estimate the input tokens of a targeted component repair vs. a session fix.
+
+For every .mlai file in a corpus, each top-level component (except
+``<Meta>``) is treated in turn as the one broken component. A session fix
+resumes the generation session (which holds the whole file, written by
+the agent), then the agent Reads the file and Edits it: three model calls,
+each re-sending the conversation so far. A component repair is one
+tool-free call with the repair system prompt and that component only.
+
+No model is called: tokens are estimated as characters / 4, and the
+generation prompt itself is left out of the session (so the session fix
+estimate is a lower bound).
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/component_repair.py
+    uv run python benchmarks/component_repair.py --corpus ../output2
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components import split_components  # noqa: E402
+from config import PROJECT_ROOT  # noqa: E402
+from diagnostics import Diagnostic  # noqa: E402
+from prompts.fix import build_fix_prompt  # noqa: E402
+from prompts.repair import build_repair_prompt, build_repair_system_prompt  # noqa: E402
+from prompts.system import build_system_prompt  # noqa: E402
+
+READ_GUTTER_CHARS = 8  # "  1234→" prefix per line in Read tool output
+EDIT_CALL_CHARS = 400  # a typical Edit tool call and its result
+
+
+def _tokens(chars: int) -> int:
+    return chars // 4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=str(PROJECT_ROOT / "test_output"))
+    args = parser.parse_args()
+
+    system = len(build_system_prompt())
+    repair_system = len(build_repair_system_prompt())
+    files = sorted(Path(args.corpus).resolve().rglob("*.mlai"))
+    session_totals, repair_totals = [], []
+
+    print(f"{'lesson':<14} {'lines':>5} {'parts':>5} {'session fix':>11} "
+          f"{'repair mean':>11} {'repair max':>10}")
+
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        components = [c for c in split_components(text) if c.name != "Meta"]
+        if not components:
+            continue
+
+        read_result = len(text) + READ_GUTTER_CHARS * (text.count("\n") + 1)
+        repairs, sessions = [], []
+        for component in components:
+            diagnostic = Diagnostic("EXAMPLE", "example error", line=component.start_line)
+            fix_prompt = len(build_fix_prompt(path, diagnostic.format(), 1))
+            history = system + len(text) + fix_prompt
+            sessions.append(history + (history + read_result) + (history + read_result + EDIT_CALL_CHARS))
+            repairs.append(repair_system + len(build_repair_prompt(
+                component.text(text), [diagnostic], component.start_line,
+            )))
+
+        session = _tokens(int(statistics.mean(sessions)))
+        repair = _tokens(int(statistics.mean(repairs)))
+        session_totals.append(session)
+        repair_totals.append(repair)
+        print(f"{path.stem:<14} {text.count(chr(10)) + 1:>5} {len(components):>5} {session:>11} "
+              f"{repair:>11} {_tokens(max(repairs)):>10}")
+
+    if not session_totals:
+        print("No .mlai files in corpus.")
+        return
+
+    session, repair = statistics.mean(session_totals), statistics.mean(repair_totals)
+    print()
+    print(f"Input tokens per fix, mean over lessons: {session:.0f} (session) -> {repair:.0f} "
+          f"(component repair), {100 * (session - repair) / session:.0f}% fewer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare fix-prompt input tokens: full validator dump vs. delta diagnostics.
+
+For every .mlai file in a corpus, the real validation errors (pre-validator,
+then node if the validator CLI is built) drive a simulated fix loop: each
+attempt the agent fixes one kind of error, until none are left. The legacy
+prompt pastes the full validator output every attempt; the delta prompt is
+what ``generate_lesson`` sends: grouped, deduplicated diagnostics, with
+source excerpts only for errors the session has not seen yet.
+
+Fixes resume the generating session as the live loop does (checked against
+a replayed message stream by benchmarks/fix_sessions.py), so the first fix
+prompt of a session is always full. Once a session's estimated context
+(the generated file plus the prompts sent so far) reaches
+``--fix-session-tokens``, the next fix starts a fresh session with a full
+prompt, in both modes.
+
+These are estimates, not measurements: no model is called, tokens are
+characters / 4, and fix replies and tool results are left out (they are
+the same in both modes). A resumed session re-sends every earlier prompt,
+so "session" sums the conversation prefix over all attempts.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/fix_prompts.py
+    uv run python benchmarks/fix_prompts.py --corpus ../output2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import FIX_SESSION_MAX_TOKENS, PROJECT_ROOT, VALIDATOR_CLI  # noqa: E402
+from prevalidator import prevalidate_mlai_file  # noqa: E402
+from prompts.fix import build_fix_prompt  # noqa: E402
+from validator import validate_mlai_file  # noqa: E402
+
+
+def _tokens(chars: int) -> int:
+    return chars // 4
+
+
+class _Session:
+    """Input tokens of a fix loop that resumes one session until it passes ``limit``."""
+
+    def __init__(self, file_tokens: int, limit: int) -> None:
+        self.file_tokens = file_tokens
+        self.limit = limit
+        self.prompts: list[int] = []
+        self.total = 0
+        self.rotations = 0
+
+    def rotate(self) -> bool:
+        """Start a fresh session if this one has grown past the limit (as the fix loop does)."""
+        if self.limit and self.prompts and self.file_tokens + sum(self.prompts) >= self.limit:
+            self.prompts = []
+            self.rotations += 1
+            return True
+        return False
+
+    def send(self, chars: int) -> None:
+        self.prompts.append(_tokens(chars))
+        self.total += sum(self.prompts)
+
+
+def _simulate(path: Path, diagnostics: list, limit: int) -> dict:
+    """Prompt sizes over a fix loop that fixes one kind of error per attempt."""
+    source = path.read_text(encoding="utf-8")
+    kinds = list(dict.fromkeys(d.key for d in diagnostics if d.severity == "error"))
+    legacy, delta = _Session(_tokens(len(source)), limit), _Session(_tokens(len(source)), limit)
+    legacy_first = delta_first = 0
+    previous: set = set()
+
+    for attempt in range(1, len(kinds) + 1):
+        remaining = [d for d in diagnostics if d.key in kinds[attempt - 1:]]
+        raw = "\n".join(d.format() for d in remaining)
+        legacy_prompt = len(build_fix_prompt(path, raw, attempt))
+        legacy.rotate()
+        legacy.send(legacy_prompt)
+        rotated = delta.rotate()
+        if rotated:
+            previous = set()  # a fresh session has seen nothing yet
+        delta_prompt = len(build_fix_prompt(
+            path, raw, attempt, diagnostics=remaining, previous=previous, source=source, rotated=rotated,
+        ))
+        delta.send(delta_prompt)
+        previous = {d.key for d in remaining}
+        if attempt == 1:
+            legacy_first, delta_first = _tokens(legacy_prompt), _tokens(delta_prompt)
+
+    return {
+        "attempts": len(kinds),
+        "rotations": delta.rotations,
+        "legacy_first": legacy_first,
+        "delta_first": delta_first,
+        "legacy_session": legacy.total,
+        "delta_session": delta.total,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=str(PROJECT_ROOT / "test_output"))
+    parser.add_argument("--fix-session-tokens", type=int, default=FIX_SESSION_MAX_TOKENS,
+                        help="Session context at which fixes move to a fresh session (0: never)")
+    args = parser.parse_args()
+
+    files = sorted(Path(args.corpus).resolve().rglob("*.mlai"))
+    totals = {"attempts": 0, "rotations": 0, "legacy_first": 0, "delta_first": 0, "legacy_session": 0, "delta_session": 0}
+    print(f"{'lesson':<14} {'errors':>6} {'kinds':>5} {'legacy 1st':>10} {'delta 1st':>9} "
+          f"{'legacy sess':>11} {'delta sess':>10}")
+
+    for path in files:
+        result = prevalidate_mlai_file(path)
+        if result.success and VALIDATOR_CLI.exists():
+            result = validate_mlai_file(path)
+        if result.success or not result.diagnostics:
+            continue
+
+        row = _simulate(path, result.diagnostics, args.fix_session_tokens)
+        for name in totals:
+            totals[name] += row[name]
+        print(f"{path.stem:<14} {result.error_count:>6} {row['attempts']:>5} {row['legacy_first']:>10} "
+              f"{row['delta_first']:>9} {row['legacy_session']:>11} {row['delta_session']:>10}")
+
+    if not totals["attempts"]:
+        print("No failing files in corpus.")
+        return
+
+    def saved(legacy: int, delta: int) -> str:
+        return f"{legacy} -> {delta} tokens ({100 * (legacy - delta) / legacy:.0f}% fewer)"
+
+    print()
+    print("Estimated input tokens (characters / 4; replies and tool results left out):")
+    print(f"First fix prompt:    {saved(totals['legacy_first'], totals['delta_first'])}")
+    print(f"Whole fix loops:     {saved(totals['legacy_session'], totals['delta_session'])}, "
+          f"{totals['rotations']} session rotation(s) at {args.fix_session_tokens:,} tokens")
+
+
+if __name__ == "__main__":
+    main()
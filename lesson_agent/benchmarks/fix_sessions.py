@@ -0,0 +1,137 @@
+"""
+Check fix-session resumption and rotation against a replayed message stream.
+
+Replays one lesson through ``generate_lesson`` with ``replay.Replayer``
+standing in for the model. The lesson is generated broken and needs four
+fix calls. The recorded calls report SDK-shaped session ids (on the init
+SystemMessage and the ResultMessage) and enough usage that the session
+crosses ``--fix-session-tokens`` after the second fix:
+
+    generation  new session A
+    fix 1       resumes A; full prompt (the first errors A is told about)
+    fix 2       resumes A; delta prompt
+    fix 3       A is over the limit: fresh session B, full prompt
+    fix 4       resumes B; delta prompt
+
+It prints the session each agent call asked to resume and the prompt it
+was given, and exits non-zero if the run does not go as above. No network
+or API key is needed.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/fix_sessions.py
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from autofix import autofix_text  # noqa: E402
+from config import FIX_SESSION_MAX_TOKENS, PROJECT_ROOT, VALIDATOR_CLI  # noqa: E402
+from replay import Replayer, synthetic_call  # noqa: E402
+from telemetry import Telemetry, load_metrics  # noqa: E402
+from validator import ValidationResult  # noqa: E402
+
+LESSON = "module_01/lesson_01_01"
+DELTA_MARKER = "fixed since your last edit"  # only in prompts built with ``previous``
+
+
+async def _prevalidated(file_path: Path, timeout: float = 0) -> ValidationResult:
+    """Stands in for the node validator: the pre-validator already passed."""
+    return ValidationResult(success=True, raw_output="", error_count=0)
+
+
+def _broken(text: str, unclosed: int) -> str:
+    """``text`` with its first ``unclosed`` </Body> tags dropped (the auto-fixer cannot repair this)."""
+    for _ in range(unclosed):
+        text = text.replace("</Body>", "", 1)
+    return text
+
+
+def _usage(context_tokens: int) -> dict:
+    """Usage of a two-turn call that leaves the session at ``context_tokens`` (see AgentRun.context_tokens)."""
+    return {"input_tokens": 2 * (context_tokens - 1000), "output_tokens": 1000}
+
+
+def _recordings(directory: Path, corpus: Path, limit: int) -> None:
+    lesson_id = Path(LESSON).name
+    good = (corpus / f"{LESSON}.mlai").read_text(encoding="utf-8")
+    calls = [
+        synthetic_call(_broken(good, 4), 1, session_id="session-A", usage=_usage(limit // 2)),
+        synthetic_call(_broken(good, 3), 1, session_id="session-A", usage=_usage(limit * 3 // 4)),
+        synthetic_call(_broken(good, 2), 1, session_id="session-A", usage=_usage(limit + limit // 10)),
+        synthetic_call(_broken(good, 1), 1, session_id="session-B", usage=_usage(limit // 4)),
+        synthetic_call(autofix_text(good)[0], 1, session_id="session-B", usage=_usage(limit // 2)),
+    ]
+    with open(directory / f"{lesson_id}.jsonl", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(call, ensure_ascii=False) + "\n" for call in calls)
+
+
+async def _run(args, recordings: Path, output_dir: Path) -> tuple[list[dict], list[dict]]:
+    replayer = Replayer(recordings, speed=0)
+    calls: list[dict] = []
+
+    async def spy(*, prompt, options=None, **kwargs):
+        if options is not None and options.allowed_tools:  # component repairs are tool-free
+            calls.append({"resume": options.resume, "delta": DELTA_MARKER in prompt, "chars": len(prompt)})
+        async for message in replayer(prompt=prompt, options=options, **kwargs):
+            yield message
+
+    agent.use_query(spy)
+    telemetry = Telemetry(output_dir / "metrics.jsonl")
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        result = await agent.generate_lesson(
+            lesson_spec_path=str(args.curriculum.parent / f"{LESSON}.md"),
+            curriculum_path=str(args.curriculum),
+            output_dir=str(output_dir),
+            telemetry=telemetry,
+            fix_session_tokens=args.fix_session_tokens,
+        )
+    telemetry.close()
+    if not result.success:
+        sys.exit(f"Lesson did not pass ({result.stop_reason}); the replay did not go as scripted.")
+    fixes = [r for r in load_metrics(telemetry.path, run_id=telemetry.run_id) if r.get("phase") == "fix"]
+    return calls, fixes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--curriculum", type=Path, default=PROJECT_ROOT / "test_curriculum" / "curriculum.json")
+    parser.add_argument("--corpus", type=Path, default=PROJECT_ROOT / "test_output")
+    parser.add_argument("--fix-session-tokens", type=int, default=FIX_SESSION_MAX_TOKENS)
+    parser.add_argument("--verbose", action="store_true", help="Show the lesson's own output")
+    args = parser.parse_args()
+    args.curriculum = args.curriculum.resolve()
+    if not VALIDATOR_CLI.exists():
+        agent.validate_mlai_file_async = _prevalidated
+
+    with tempfile.TemporaryDirectory(prefix="fix-sessions-") as tmp:
+        recordings, output_dir = Path(tmp) / "recordings", Path(tmp) / "output"
+        recordings.mkdir()
+        _recordings(recordings, args.corpus.resolve(), args.fix_session_tokens)
+        calls, fixes = asyncio.run(_run(args, recordings, output_dir))
+
+    print(f"{'call':<12} {'resumes':<10} {'prompt':<6} {'chars':>6} {'session tok':>11} {'rotated':>7}")
+    names = ["generation"] + [f"fix {n}" for n in range(1, len(calls))]
+    for index, (name, call) in enumerate(zip(names, calls)):
+        fix = fixes[index - 1] if 0 < index <= len(fixes) else {}
+        prompt = "-" if not index else "delta" if call["delta"] else "full"
+        print(f"{name:<12} {call['resume'] or '-':<10} {prompt:<6} {call['chars']:>6} "
+              f"{fix.get('session_tokens', '-'):>11} {str(fix.get('rotated', '-')):>7}")
+
+    expected = [(None, False), ("session-A", False), ("session-A", True), (None, False), ("session-B", True)]
+    observed = [(call["resume"], call["delta"]) for call in calls]
+    if observed != expected:
+        sys.exit(f"\nExpected (resume, delta) per call {expected}, got {observed}")
+    print("\nOK: fixes 1-2 resumed the generation session, fix 3 rotated to a fresh one, fix 4 resumed that.")
+
+
+if __name__ == "__main__":
+    main()
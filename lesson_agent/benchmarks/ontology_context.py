@@ -0,0 +1,81 @@
+"""
+Measure the ontology section of the context pack.
+
+For every lesson in a curriculum, reports how many of its key concepts the
+course ontology defines (matched concepts) and the size of the inlined
+ontology section, against the agent Reading the whole .owl file for the
+same definitions (one more turn, re-sending the conversation so far).
+Also times a cold parse of the ontology against a load from its cache.
+
+No model is called: tokens are estimated as characters / 4, as in
+benchmarks/prompt_context.py.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/ontology_context.py
+    uv run python benchmarks/ontology_context.py --curriculum ../test_curriculum2/curriculum.json
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import PROJECT_ROOT  # noqa: E402
+from context import CurriculumContext  # noqa: E402
+from ontology import Ontology  # noqa: E402
+
+READ_GUTTER_CHARS = 8  # "  1234→" prefix per line in Read tool output
+
+
+def _tokens(chars: int) -> int:
+    return chars // 4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--curriculum", default=str(PROJECT_ROOT / "test_curriculum" / "curriculum.json"))
+    args = parser.parse_args()
+
+    curriculum_path = Path(args.curriculum).resolve()
+    context = CurriculumContext.load(curriculum_path)
+    ontology = context.ontology
+    if ontology is None:
+        sys.exit(f"No parseable .owl file next to {curriculum_path}")
+    owl_path = curriculum_path.parent / ontology.source
+    owl_text = owl_path.read_text(encoding="utf-8")
+    owl_read = len(owl_text) + READ_GUTTER_CHARS * (owl_text.count("\n") + 1)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        Ontology.load(owl_path, Path(cache_dir))
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        Ontology.load(owl_path, Path(cache_dir))
+        cached = time.perf_counter() - start
+
+    print(f"{ontology.source}: {len(ontology.concepts)} concepts, ~{_tokens(owl_read):,} tokens to Read")
+    print(f"Parse {cold * 1000:.1f} ms cold, {cached * 1000:.1f} ms from cache\n")
+    print(f"{'lesson':<14} {'key concepts':>12} {'matched':>8} {'section tok':>11}")
+
+    lessons = keys = matched_keys = section_tokens = 0
+    for module in context.curriculum["modules"]:
+        for lesson in module["lessons"]:
+            key_concepts = lesson.get("key_concepts") or []
+            matched = sum(1 for key in key_concepts if ontology.match([key]))
+            tokens = _tokens(len(ontology.section(key_concepts)))
+            lessons += 1
+            keys += len(key_concepts)
+            matched_keys += matched
+            section_tokens += tokens
+            print(f"{lesson['lesson_id']:<14} {len(key_concepts):>12} {matched:>8} {tokens:>11,}")
+
+    print(f"\nKey concepts defined by the ontology: {matched_keys}/{keys}")
+    print(f"Ontology section: ~{section_tokens // max(lessons, 1):,} tokens per lesson, inlined; "
+          f"Reading the .owl instead: 1 more turn and ~{_tokens(owl_read):,} tokens per lesson.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Estimate the turn and input-token savings of inlined prompt context.
+
+For every lesson in a curriculum, compares the legacy path-only generation
+prompt against the inlined prompt (spec + context pack). The turn counts
+are assumptions, not measurements: the legacy agent is assumed to Read the
+spec, then the whole curriculum.json, then Write (3 turns), and the inlined
+one to Write straight away (1 turn). Tokens are estimated as characters / 4,
+and a Read tool result is counted as the file plus the line-number gutter
+the Read tool adds. Each turn re-sends the system prompt and the
+conversation so far.
+
+With ``--recordings`` (a ``main.py --record`` directory), the generation
+call recorded for each lesson is measured as well: its Read calls, its
+turns and the input tokens it reported. That shows what the agent
+actually did, for whichever prompt the recorded run used.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/prompt_context.py
+    uv run python benchmarks/prompt_context.py --curriculum ../test_curriculum2/curriculum.json
+    uv run python benchmarks/prompt_context.py --recordings ../recordings
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import PROJECT_ROOT  # noqa: E402
+from context import CurriculumContext  # noqa: E402
+from prompts.generation import build_generation_prompt  # noqa: E402
+from prompts.system import build_system_prompt  # noqa: E402
+
+READ_GUTTER_CHARS = 8  # "  1234→" prefix per line in Read tool output
+
+
+def _tokens(chars: int) -> int:
+    return chars // 4
+
+
+def _read_result_chars(path: Path) -> int:
+    text = path.read_text(encoding="utf-8")
+    return len(text) + READ_GUTTER_CHARS * (text.count("\n") + 1)
+
+
+def _recorded_generation(recordings: Path, lesson_id: str) -> dict | None:
+    """Read calls, turns and input tokens of a lesson's first recorded agent call."""
+    path = recordings / f"{lesson_id}.jsonl"
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        calls = [json.loads(line) for line in f if line.strip()]
+    call = next((c for c in calls if c.get("kind", "agent") == "agent"), None)
+    if call is None:
+        return None
+    measured = {"reads": 0, "turns": 0, "input_tokens": 0}
+    for entry in call["messages"]:
+        message = entry["message"]
+        if message.get("_type") == "AssistantMessage":
+            measured["reads"] += sum(
+                1 for block in message.get("content", [])
+                if block.get("_type") == "ToolUseBlock" and block.get("name") == "Read"
+            )
+        elif message.get("_type") == "ResultMessage":
+            usage = message.get("usage") or {}
+            measured["turns"] = message.get("num_turns") or 0
+            measured["input_tokens"] = sum(usage.get(name, 0) for name in
+                                           ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"))
+    return measured
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--curriculum", default=str(PROJECT_ROOT / "test_curriculum" / "curriculum.json"))
+    parser.add_argument("--recordings", type=Path, default=None,
+                        help="Also measure the generation calls recorded here (main.py --record)")
+    args = parser.parse_args()
+
+    curriculum_path = Path(args.curriculum).resolve()
+    context = CurriculumContext.load(curriculum_path)
+    system = len(build_system_prompt())
+    curriculum_read = _read_result_chars(curriculum_path)
+
+    totals = {"legacy_turns": 0, "inline_turns": 0, "legacy_tokens": 0, "inline_tokens": 0}
+    recorded: list[dict] = []
+    print("Assumed turns (legacy: Read spec, Read curriculum, Write; inline: Write) and estimated tokens:")
+    header = f"{'lesson':<14} {'legacy turns':>12} {'inline turns':>12} {'legacy tok':>11} {'inline tok':>11}"
+    if args.recordings:
+        header += f" {'rec reads':>9} {'rec turns':>9} {'rec tok':>9}"
+    print(header)
+
+    for module in context.curriculum["modules"]:
+        for lesson in module["lessons"]:
+            lesson_id = lesson["lesson_id"]
+            spec = curriculum_path.parent / module["module_id"] / f"{lesson_id}.md"
+            if not spec.exists():
+                continue
+            out = Path("/out") / f"{lesson_id}.mlai"
+            mlai_id = lesson_id.replace("_", "-")
+
+            legacy_prompt = len(build_generation_prompt(str(spec), str(curriculum_path), out, mlai_id))
+            inline_prompt = len(build_generation_prompt(
+                str(spec), str(curriculum_path), out, mlai_id,
+                spec_text=spec.read_text(encoding="utf-8"),
+                context_pack=context.context_pack(lesson_id),
+            ))
+
+            # Legacy: Read spec -> Read curriculum -> Write; context grows each turn
+            spec_read = _read_result_chars(spec)
+            legacy = (
+                (system + legacy_prompt)
+                + (system + legacy_prompt + spec_read)
+                + (system + legacy_prompt + spec_read + curriculum_read)
+            )
+            inline = system + inline_prompt
+
+            totals["legacy_turns"] += 3
+            totals["inline_turns"] += 1
+            totals["legacy_tokens"] += _tokens(legacy)
+            totals["inline_tokens"] += _tokens(inline)
+            row = f"{lesson_id:<14} {3:>12} {1:>12} {_tokens(legacy):>11,} {_tokens(inline):>11,}"
+            measured = _recorded_generation(args.recordings, lesson_id) if args.recordings else None
+            if measured is not None:
+                recorded.append(measured)
+                row += f" {measured['reads']:>9} {measured['turns']:>9} {measured['input_tokens']:>9,}"
+            print(row)
+
+    saved = 1 - totals["inline_tokens"] / totals["legacy_tokens"]
+    print(
+        f"\n{'total':<14} {totals['legacy_turns']:>12} {totals['inline_turns']:>12} "
+        f"{totals['legacy_tokens']:>11,} {totals['inline_tokens']:>11,}"
+    )
+    print(f"Estimated input tokens before the Write turn: {saved:.0%} fewer; "
+          f"{totals['legacy_turns'] - totals['inline_turns']} fewer agent turns, if the assumed turns hold.")
+    if recorded:
+        count = len(recorded)
+        print(f"Recorded generation calls ({count} lesson(s)): "
+              f"{sum(r['reads'] for r in recorded) / count:.1f} Read calls, "
+              f"{sum(r['turns'] for r in recorded) / count:.1f} turns and "
+              f"{sum(r['input_tokens'] for r in recorded) // count:,} input tokens per lesson.")
+    elif args.recordings:
+        print(f"No recorded generation calls for these lessons in {args.recordings}.")
+
+
+if __name__ == "__main__":
+    main()
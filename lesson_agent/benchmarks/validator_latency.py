@@ -0,0 +1,89 @@
+"""
+Per-validation latency: one-shot node CLI vs persistent validator workers.
+
+Validates every .mlai file in a corpus sequentially, once through a fresh
+``node cli.js`` process per file and once through a ``ValidatorPool``, and
+prints latency statistics for both.
+
+Usage (from lesson_agent/):
+    uv run python benchmarks/validator_latency.py
+    uv run python benchmarks/validator_latency.py --corpus ../output2 --rounds 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import validator  # noqa: E402
+from config import PROJECT_ROOT  # noqa: E402
+from telemetry import percentile  # noqa: E402
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<10} n={len(samples):<4} "
+        f"mean={statistics.mean(samples) * 1000:8.1f}ms  "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms  "
+        f"p95={percentile(samples, 95) * 1000:8.1f}ms  "
+        f"total={sum(samples):7.2f}s"
+    )
+
+
+async def _time_all(files: list[Path], rounds: int) -> tuple[list[float], list[bool]]:
+    samples: list[float] = []
+    outcomes: list[bool] = []
+    for _ in range(rounds):
+        for path in files:
+            start = time.perf_counter()
+            result = await validator.validate_mlai_file_async(path)
+            samples.append(time.perf_counter() - start)
+            outcomes.append(result.success)
+    return samples, outcomes
+
+
+async def _run(files: list[Path], rounds: int, workers: int) -> None:
+    oneshot, oneshot_ok = await _time_all(files, rounds)
+    _report("one-shot", oneshot)
+
+    async with validator.ValidatorPool(workers) as pool:
+        if not pool.available:
+            print("daemon    unavailable (see warning above); skipped")
+            return
+        daemon, daemon_ok = await _time_all(files, rounds)
+    _report("daemon", daemon)
+
+    print(f"speedup    {statistics.mean(oneshot) / statistics.mean(daemon):.1f}x (mean)")
+    if oneshot_ok != daemon_ok:
+        print("⚠️  One-shot and daemon results disagree on pass/fail for some files.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=str(PROJECT_ROOT / "test_output"))
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cli", default=None, help="Override the validator cli.js path")
+    args = parser.parse_args()
+
+    if args.cli:
+        validator.VALIDATOR_CLI = Path(args.cli).resolve()
+    if not validator.VALIDATOR_CLI.exists():
+        print(f"Validator CLI not found at {validator.VALIDATOR_CLI}")
+        sys.exit(1)
+
+    files = sorted(Path(args.corpus).rglob("*.mlai"))
+    if not files:
+        print(f"No .mlai files under {args.corpus}")
+        sys.exit(1)
+
+    print(f"Corpus: {args.corpus} ({len(files)} files, {args.rounds} round(s))\n")
+    asyncio.run(_run(files, args.rounds, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Spend limits for lessons and whole batch runs.
+
+A ``Budget`` tracks cost, agent turns and elapsed time against optional
+limits (``None`` means unlimited). Each lesson gets its own budget from
+``BudgetLimits``; a batch run additionally shares one global budget across
+all lessons, so the run as a whole has a predictable upper bound.
+
+Limits are checked between agent invocations, and the remaining time is
+also enforced as a timeout on each invocation. A lesson can therefore
+overshoot a cost or turn limit by at most one agent run, but never a time
+limit.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class BudgetLimits:
+    """Upper bounds for a budget. ``None`` disables a limit."""
+
+    max_cost_usd: float | None = None
+    max_seconds: float | None = None
+    max_turns: int | None = None
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_cost_usd is None and self.max_seconds is None and self.max_turns is None
+
+
+@dataclass
+class Budget:
+    """Running totals checked against ``limits``."""
+
+    limits: BudgetLimits = field(default_factory=BudgetLimits)
+    cost_usd: float = 0.0
+    turns: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def charge(self, cost_usd: float, turns: int) -> None:
+        self.cost_usd += cost_usd
+        self.turns += turns
+
+    def remaining_seconds(self) -> float | None:
+        if self.limits.max_seconds is None:
+            return None
+        return max(0.0, self.limits.max_seconds - (time.monotonic() - self.started))
+
+    def exceeded(self) -> str | None:
+        """Name of the first exhausted limit (``cost``, ``time``, ``turns``), or None."""
+        limits = self.limits
+        if limits.max_cost_usd is not None and self.cost_usd >= limits.max_cost_usd:
+            return "cost"
+        if limits.max_seconds is not None and self.remaining_seconds() <= 0:
+            return "time"
+        if limits.max_turns is not None and self.turns >= limits.max_turns:
+            return "turns"
+        return None
@@ -0,0 +1,82 @@
+"""
+Validate a whole output tree without generating anything.
+
+``validate_tree`` checks every .mlai under a directory. The pre-validator
+runs in a process pool across cores, and files that pass it go to the node
+validator through a ``ValidatorPool`` of the same size. Results are looked
+up in and stored to a ``ValidationCache`` by content hash, so a re-run only
+validates files that changed. Nothing here imports the agent SDK, which
+keeps ``main.py validate`` quick to start.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from cache import ValidationCache
+from prevalidator import prevalidate_mlai_file
+from validator import ValidatorPool, validate_mlai_file_async
+
+
+async def _validate_one(
+    path: Path,
+    root: Path,
+    executor: ProcessPoolExecutor,
+    cache: ValidationCache | None,
+) -> dict:
+    start = time.perf_counter()
+    content = path.read_bytes()
+    result = cache.get(content) if cache is not None else None
+    stage = "cache"
+    if result is None:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor, prevalidate_mlai_file, path)
+        stage = "prevalidator"
+        if result.success:
+            result = await validate_mlai_file_async(path)
+            stage = "node"
+        if cache is not None:
+            cache.put(content, result)
+
+    entry = {
+        "path": str(path.relative_to(root)),
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "success": result.success,
+        "error_count": result.error_count,
+        "stage": stage,
+        "wall_s": round(time.perf_counter() - start, 4),
+        "diagnostics": [dataclasses.asdict(d) for d in result.diagnostics],
+    }
+    if not result.success and not result.diagnostics:
+        entry["output"] = result.raw_output
+    return entry
+
+
+async def validate_tree(root: Path, jobs: int | None = None, cache: ValidationCache | None = None) -> dict:
+    """Validate every .mlai under ``root`` and return a JSON-serializable report.
+
+    ``jobs`` (default: one per CPU) sizes both the pre-validator process
+    pool and the node validator pool.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    files = sorted(root.rglob("*.mlai"))
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        async with ValidatorPool(jobs):
+            results = await asyncio.gather(*(_validate_one(p, root, executor, cache) for p in files))
+
+    return {
+        "root": str(root),
+        "jobs": jobs,
+        "files": len(results),
+        "passed": sum(r["success"] for r in results),
+        "failed": sum(not r["success"] for r in results),
+        "cached": sum(r["stage"] == "cache" for r in results),
+        "wall_s": round(time.perf_counter() - start, 3),
+        "results": results,
+    }
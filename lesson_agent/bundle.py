@@ -0,0 +1,346 @@
+"""
+Pre-parsed serving bundles for validated lessons.
+
+The course server parses every lesson's XML and separates answers from
+content at request time (see docs/mlai_spec.md, "Answer Isolation").
+``compile_bundles`` does that once, after generation, and writes:
+
+    <output>/bundles/
+        lessons-<hash>.bin  # per lesson: content section, then answer-key section
+        index.json          # lesson_id -> byte offsets into the data file, source hash
+
+Both sections are compact UTF-8 JSON. Content is the element tree as
+``[tag, attrs, children]`` lists (text nodes are strings, whitespace
+collapsed outside ``<Code>``), with everything a client must not see taken
+out: ``correct`` on options, blank answers and rubrics. SortQuiz items and
+the right-hand side of a MatchPairs (distractors included) are shuffled at
+compile time, so neither the correct order nor the pairing can be read off
+the content; the answer key holds the permutation. The answer key maps
+each assessment's id to what grading needs. A server can mmap the data
+file and decode one section of one lesson without touching the rest
+(``BundleReader``).
+
+Compilation is incremental: a lesson whose source hash matches the
+existing index is copied from the old data file without re-parsing. The
+data file is named by its own hash and the index, which names it, is
+replaced atomically after it is written, so a reader always sees a
+matching pair; superseded data files are removed afterwards (a server that
+still has one mapped keeps reading it).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+
+FORMAT_VERSION = 2
+BUNDLE_DIR = "bundles"
+INDEX_FILE = "index.json"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_RANDOM = random.SystemRandom()
+
+
+def _node(element: ET.Element, verbatim: bool = False) -> list:
+    """``[tag, attrs, children]`` for an element and everything under it."""
+    verbatim = verbatim or element.tag == "Code"
+    children: list = []
+
+    def add_text(text: str | None) -> None:
+        if text and (verbatim or text.strip()):
+            children.append(text if verbatim else _WHITESPACE_RE.sub(" ", text))
+
+    add_text(element.text)
+    for child in element:
+        children.append(_node(child, verbatim))
+        add_text(child.tail)
+    if not verbatim and children:
+        if isinstance(children[0], str):
+            children[0] = children[0].lstrip()
+        if isinstance(children[-1], str):
+            children[-1] = children[-1].rstrip()
+    return [element.tag, dict(element.attrib), children]
+
+
+def _plain(element: ET.Element | None) -> str:
+    return " ".join("".join(element.itertext()).split()) if element is not None else ""
+
+
+# ---------------------------------------------------------------------------
+# Answer extraction, per assessment type: strip the element in place and
+# return its answer key.
+# ---------------------------------------------------------------------------
+
+
+def _select_key(element: ET.Element) -> dict:
+    correct = []
+    for index, option in enumerate(element.iter("Option")):
+        if option.attrib.pop("correct", "false") == "true":
+            correct.append(index)
+    return {"correct": correct}
+
+
+def _fill_blanks_key(element: ET.Element) -> dict:
+    answers = []
+    for index, blank in enumerate(element.iter("Blank")):
+        answers.append(_plain(blank))
+        blank.clear()
+        blank.set("index", str(index))
+    return {"blanks": answers}
+
+
+def _shuffled(count: int) -> list[int]:
+    """A random permutation of ``range(count)``; never the identity when ``count > 1``."""
+    order = list(range(count))
+    while count > 1 and order == sorted(order):
+        _RANDOM.shuffle(order)
+    return order
+
+
+def _sort_quiz_key(element: ET.Element) -> dict:
+    # Items are written in the correct order: show them shuffled and keep,
+    # for each step of the correct order, the position it is shown at
+    items = element.find("SortedItems")
+    if items is None:
+        return {"order": []}
+    correct = list(items)
+    shown = _shuffled(len(correct))
+    for item in correct:
+        items.remove(item)
+    items.extend(correct[source] for source in shown)
+    return {"order": [shown.index(source) for source in range(len(correct))]}
+
+
+def _match_pairs_key(element: ET.Element) -> dict:
+    pairs = element.find("Pairs")
+    if pairs is None:
+        return {"pairs": []}
+    lefts, right_items = ET.Element("Lefts"), []
+    for pair in list(pairs):
+        left, right = pair.find("Left"), pair.find("Right")
+        if left is not None and right is not None:
+            lefts.append(left)
+            right_items.append(right)
+    matched = len(right_items)
+    distractors = element.find("RightDistractors")
+    if distractors is not None:
+        element.remove(distractors)
+        for distractor in distractors.iter("Distractor"):
+            distractor.tag = "Right"
+            right_items.append(distractor)
+    shown = _shuffled(len(right_items))
+    rights = ET.Element("Rights")
+    rights.extend(right_items[source] for source in shown)
+    position = list(element).index(pairs)
+    element.remove(pairs)
+    element.insert(position, rights)
+    element.insert(position, lefts)
+    return {"pairs": [[index, shown.index(index)] for index in range(matched)]}
+
+
+def _subjective_key(element: ET.Element) -> dict:
+    rubric = element.find("Rubric")
+    if rubric is None:
+        return {"rubric": []}
+    element.remove(rubric)
+    return {
+        "rubric": [
+            {
+                "points": float(criterion.get("points", 0)),
+                "required": criterion.get("required") == "true",
+                "requirement": _plain(criterion.find("Requirement")),
+                "indicators": [
+                    term.strip() for term in _plain(criterion.find("Indicators")).split(",") if term.strip()
+                ],
+            }
+            for criterion in rubric.iter("Criterion")
+        ]
+    }
+
+
+_ANSWER_KEYS = {
+    "SingleSelect": _select_key,
+    "MultiSelect": _select_key,
+    "FillBlanks": _fill_blanks_key,
+    "SortQuiz": _sort_quiz_key,
+    "MatchPairs": _match_pairs_key,
+    "Subjective": _subjective_key,
+}
+
+
+def split_lesson(source: str | bytes) -> tuple[list, dict]:
+    """Parse one .mlai and split it into (content tree, answer key by element id)."""
+    root = ET.fromstring(source)
+    answer_key: dict[str, dict] = {}
+    for element in root:
+        extract = _ANSWER_KEYS.get(element.tag)
+        if extract is not None:
+            answer_key[element.get("id", "")] = {"type": element.tag, **extract(element)}
+    return _node(root), answer_key
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Compiling
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class CompileReport:
+    compiled: list[str] = field(default_factory=list)
+    reused: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    """Lesson id -> why it could not be parsed."""
+
+    bytes: int = 0
+
+
+def _load_index(bundle_dir: Path) -> dict:
+    try:
+        index = json.loads((bundle_dir / INDEX_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return index if index.get("format") == FORMAT_VERSION else {}
+
+
+def _replace(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def compile_bundles(output_dir: Path, lessons: list[tuple[str, str, Path]]) -> CompileReport:
+    """Compile ``(lesson_id, module_id, mlai_path)`` entries into ``<output_dir>/bundles``.
+
+    The index lists exactly these lessons, in this order.
+    """
+    bundle_dir = output_dir / BUNDLE_DIR
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    previous_index = _load_index(bundle_dir)
+    previous = previous_index.get("lessons", {})
+    try:
+        old_data = (bundle_dir / previous_index["data"]).read_bytes() if previous else b""
+    except (KeyError, FileNotFoundError):
+        previous, old_data = {}, b""
+
+    report = CompileReport()
+    data = bytearray()
+    index: dict[str, dict] = {}
+    for lesson_id, module_id, path in lessons:
+        source = path.read_bytes()
+        sha = hashlib.sha256(source).hexdigest()
+        entry = previous.get(lesson_id)
+        if entry and entry["sha256"] == sha and entry["content"][0] + entry["length"] <= len(old_data):
+            start = entry["content"][0]
+            blob = old_data[start:start + entry["length"]]
+            content_length = entry["content"][1]
+            title = entry.get("title", "")
+            report.reused.append(lesson_id)
+        else:
+            try:
+                content, answer_key = split_lesson(source)
+            except ET.ParseError as exc:
+                report.failed[lesson_id] = str(exc)
+                continue
+            content_bytes = _encode(content)
+            blob = content_bytes + _encode(answer_key)
+            content_length = len(content_bytes)
+            title = _title(content)
+            report.compiled.append(lesson_id)
+
+        offset = len(data)
+        data += blob
+        index[lesson_id] = {
+            "module_id": module_id,
+            "title": title,
+            "sha256": sha,
+            "content": [offset, content_length],
+            "answer_key": [offset + content_length, len(blob) - content_length],
+            "length": len(blob),
+        }
+
+    report.bytes = len(data)
+    if report.compiled or index != previous:
+        data_file = f"lessons-{hashlib.sha256(data).hexdigest()[:16]}.bin"
+        _replace(bundle_dir / data_file, bytes(data))
+        _replace(bundle_dir / INDEX_FILE, json.dumps(
+            {"format": FORMAT_VERSION, "data": data_file, "lessons": index}, indent=1, ensure_ascii=False
+        ).encode("utf-8"))
+        for stale in bundle_dir.glob("lessons-*.bin"):
+            if stale.name != data_file:
+                stale.unlink(missing_ok=True)
+    return report
+
+
+def _title(content: list) -> str:
+    """The lesson title from a content tree's ``<Meta><Title>``."""
+    for child in content[2]:
+        if isinstance(child, list) and child[0] == "Meta":
+            for item in child[2]:
+                if isinstance(item, list) and item[0] == "Title":
+                    return "".join(part for part in item[2] if isinstance(part, str))
+    return ""
+
+
+def validated_lessons(output_dir: Path) -> list[tuple[str, str, Path]] | None:
+    """Lessons ``new_curriculum.json`` marks as passed, or None if there is no such file."""
+    try:
+        curriculum = json.loads((output_dir / "new_curriculum.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    return [
+        (lesson["lesson_id"], module["module_id"], output_dir / lesson["mlai_path"])
+        for module in curriculum.get("modules", [])
+        for lesson in module.get("lessons", [])
+        if lesson.get("mlai_path") and (output_dir / lesson["mlai_path"]).exists()
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+
+class BundleReader:
+    """Serve lessons from a compiled bundle directory via mmap."""
+
+    def __init__(self, bundle_dir: Path) -> None:
+        index = json.loads((bundle_dir / INDEX_FILE).read_text(encoding="utf-8"))
+        self.lessons: dict[str, dict] = index["lessons"]
+        self._file = open(bundle_dir / index["data"], "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _section(self, lesson_id: str, name: str):
+        offset, length = self.lessons[lesson_id][name]
+        return json.loads(self._map[offset:offset + length])
+
+    def content(self, lesson_id: str) -> list:
+        """The lesson's answer-free element tree."""
+        return self._section(lesson_id, "content")
+
+    def answer_key(self, lesson_id: str) -> dict:
+        """Answer keys by assessment id."""
+        return self._section(lesson_id, "answer_key")
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
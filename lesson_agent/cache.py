@@ -0,0 +1,211 @@
+"""
+Content-addressed cache of validated lesson outputs.
+
+A lesson's cache key hashes everything that determines what the agent is
+asked to produce: the spec text, the lesson's slice of the curriculum
+(course header, its module header and its own entry) and the context pack
+rendered from it, the system prompt
+(which embeds ``mlai_format_guide.md``), the generation, fix, repair and
+fan-out prompt templates, the generation and fix models, and the lesson ID. Paths are deliberately left out,
+so an identical spec in another curriculum or output directory hits the
+same entry.
+
+Layout under the cache root:
+
+    keys/<key>              -> sha256 of the validated .mlai content
+    objects/<ab>/<sha256>   -> the .mlai content itself
+
+Objects are shared between keys, so identical outputs are stored once.
+When the objects exceed ``max_bytes``, the least recently used are evicted.
+
+``ValidationCache`` separately remembers validation results by the hash of
+the file content (and of the validators), so an unchanged file is never
+validated twice:
+
+    <ab>/<sha256>.json      -> the ValidationResult for that content
+"""
+
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import diagnostics
+import prevalidator
+import prompts.fanout
+import prompts.fix
+import prompts.generation
+import prompts.repair
+import validator
+from config import VALIDATOR_CLI
+from context import CurriculumContext
+from diagnostics import Diagnostic
+from prompts.system import build_system_prompt
+from validator import ValidationResult
+
+
+def lesson_cache_key(
+    lesson_spec_path: str,
+    context: CurriculumContext | None,
+    lesson_id: str,
+    model: str,
+    fix_models: tuple[str, ...] = (),
+    prerequisite_digests: str = "",
+) -> str:
+    """Hash every input that shapes a lesson's generated content."""
+    curriculum_slice = context.lesson_slice(lesson_id) if context else {}
+    context_pack = context.context_pack(lesson_id) if context else ""
+    parts = [
+        Path(lesson_spec_path).read_bytes(),
+        json.dumps(curriculum_slice, sort_keys=True).encode("utf-8"),
+        context_pack.encode("utf-8"),
+        build_system_prompt().encode("utf-8"),
+        Path(prompts.generation.__file__).read_bytes(),
+        Path(prompts.fix.__file__).read_bytes(),
+        Path(prompts.repair.__file__).read_bytes(),
+        Path(prompts.fanout.__file__).read_bytes(),
+        model.encode("utf-8"),
+        ",".join(fix_models).encode("utf-8"),
+        lesson_id.encode("utf-8"),
+    ]
+    if prerequisite_digests:
+        # Only when present, so keys of lessons without prerequisites are unchanged
+        parts.append(prerequisite_digests.encode("utf-8"))
+    digest = hashlib.sha256()
+    for part in parts:
+        # Length-prefix each part so boundaries cannot be shifted between parts
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class GenerationCache:
+    """Validated .mlai outputs keyed by ``lesson_cache_key``.
+
+    Parameters
+    ----------
+    root:
+        Cache directory (created on first write).
+    max_bytes:
+        Upper bound on the total size of stored objects.
+    refresh:
+        If True, lookups always miss but new results are still stored,
+        overwriting stale entries.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, refresh: bool = False) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.root / "objects" / content_hash[:2] / content_hash
+
+    def get(self, key: str) -> str | None:
+        """Return the cached .mlai content for ``key``, or None on a miss."""
+        if self.refresh:
+            return None
+        try:
+            content_hash = (self.root / "keys" / key).read_text(encoding="utf-8").strip()
+            obj = self._object_path(content_hash)
+            content = obj.read_text(encoding="utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+        if hashlib.sha256(content.encode("utf-8")).hexdigest() != content_hash:
+            return None
+        os.utime(obj)  # mark as recently used for eviction
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        """Store validated content under ``key`` and enforce the size bound."""
+        data = content.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        obj = self._object_path(content_hash)
+        if obj.exists():
+            os.utime(obj)
+        else:
+            _atomic_write(obj, data)
+        _atomic_write(self.root / "keys" / key, content_hash.encode("utf-8"))
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used objects until under ``max_bytes``.
+
+        Keys pointing at evicted objects are left behind; they simply miss.
+        """
+        objects = [
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in (self.root / "objects").glob("*/*")
+        ]
+        total = sum(size for _, size, _ in objects)
+        for _, size, path in sorted(objects):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+@functools.cache
+def _validator_fingerprint() -> bytes:
+    """Identifies the validators: a rebuilt CLI or changed checks invalidate results."""
+    digest = hashlib.sha256()
+    for module in (prevalidator, validator, diagnostics):
+        digest.update(Path(module.__file__).read_bytes())
+    try:
+        stat = VALIDATOR_CLI.stat()
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    except FileNotFoundError:
+        digest.update(b"no-cli")
+    return digest.digest()
+
+
+class ValidationCache:
+    """Validation results keyed by the sha256 of the validated content.
+
+    Results where the validator itself failed (``validator_error``) are
+    never stored. Entries are small and are not evicted.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    @staticmethod
+    def key(content: bytes) -> str:
+        return hashlib.sha256(_validator_fingerprint() + content).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, content: bytes) -> ValidationResult | None:
+        """The stored result for ``content``, or None on a miss."""
+        try:
+            entry = json.loads(self._path(self.key(content)).read_text(encoding="utf-8"))
+            return ValidationResult(
+                success=entry["success"],
+                raw_output=entry["raw_output"],
+                error_count=entry["error_count"],
+                diagnostics=[Diagnostic(**d) for d in entry["diagnostics"]],
+            )
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def put(self, content: bytes, result: ValidationResult) -> None:
+        if result.validator_error:
+            return
+        entry = {
+            "success": result.success,
+            "raw_output": result.raw_output,
+            "error_count": result.error_count,
+            "diagnostics": [dataclasses.asdict(d) for d in result.diagnostics],
+        }
+        _atomic_write(self._path(self.key(content)), json.dumps(entry).encode("utf-8"))
@@ -0,0 +1,130 @@
+"""
+Top-level component splitting for targeted repairs.
+
+An .mlai file is ``<Lesson>`` with a flat list of top-level components
+(``<Meta>``, ``<Section>``, ``<FlashCard>``, ``<MatchPairs>``, ...). When
+every error in a failed validation falls inside a few of them, only those
+fragments need fixing: ``split_components`` finds each component's span,
+``locate_components`` maps diagnostics onto them, and ``splice`` puts
+corrected fragments back without touching the rest of the file.
+``fenced_xml`` pulls a fragment out of a model's reply.
+"""
+
+import re
+from dataclasses import dataclass
+
+from diagnostics import Diagnostic
+
+_FENCE_RE = re.compile(r"```(?:xml)?\s*\n(.*?)```", re.S)
+_TAG_RE = re.compile(r"<!--.*?-->|<\?.*?\?>|<(/?)([A-Za-z][\w.:-]*)[^<>]*?(/?)>", re.S)
+_ID_ATTR_RE = re.compile(r"""\bid\s*=\s*["']([^"']*)["']""")
+
+
+@dataclass
+class Component:
+    """One direct child element of ``<Lesson>``."""
+
+    name: str
+    start: int
+    """Offset of the opening ``<``, from the start of its line's indentation."""
+
+    end: int
+    """Offset just past the closing ``>``."""
+
+    start_line: int
+    end_line: int
+    id: str | None = None
+
+    def text(self, source: str) -> str:
+        return source[self.start:self.end]
+
+
+def fenced_xml(reply: str) -> str | None:
+    """The first fenced (```xml) block in a model reply, or None."""
+    match = _FENCE_RE.search(reply)
+    return match.group(1).strip("\n") if match else None
+
+
+def split_components(text: str) -> list[Component]:
+    """Spans of the direct children of the root element, in document order.
+
+    Returns an empty list if the nesting is too broken to split reliably
+    (a close tag that does not match, or an element left open).
+    """
+    components: list[Component] = []
+    stack: list[str] = []
+    opening: tuple[str, int, str | None] | None = None
+
+    for match in _TAG_RE.finditer(text):
+        name = match.group(2)
+        if name is None:
+            continue
+        closing, selfclose = match.group(1), match.group(3)
+
+        if closing:
+            if not stack or stack[-1] != name:
+                return []
+            stack.pop()
+            if len(stack) == 1 and opening is not None:
+                components.append(_component(text, opening, match.end()))
+                opening = None
+            continue
+
+        if len(stack) == 1:
+            id_attr = _ID_ATTR_RE.search(match.group(0))
+            opening = (name, match.start(), id_attr.group(1) if id_attr else None)
+            if selfclose:
+                components.append(_component(text, opening, match.end()))
+                opening = None
+        if not selfclose:
+            stack.append(name)
+
+    return components if not stack else []
+
+
+def _component(text: str, opening: tuple[str, int, str | None], end: int) -> Component:
+    name, start, id_attr = opening
+    line_start = text.rfind("\n", 0, start) + 1
+    if not text[line_start:start].strip():
+        start = line_start  # take the indentation along with the element
+    return Component(
+        name=name,
+        start=start,
+        end=end,
+        start_line=text.count("\n", 0, start) + 1,
+        end_line=text.count("\n", 0, end) + 1,
+        id=id_attr,
+    )
+
+
+def locate_components(
+    components: list[Component],
+    diagnostics: list[Diagnostic],
+) -> dict[int, list[Diagnostic]] | None:
+    """Group error diagnostics by the index of the component they fall in.
+
+    Returns None if any error cannot be pinned to a single component (no
+    line number, or a line outside every component), since a targeted
+    repair could not fix it.
+    """
+    located: dict[int, list[Diagnostic]] = {}
+    for diagnostic in diagnostics:
+        if diagnostic.severity != "error":
+            continue
+        if diagnostic.line is None:
+            return None
+        for index, component in enumerate(components):
+            if component.start_line <= diagnostic.line <= component.end_line:
+                located.setdefault(index, []).append(diagnostic)
+                break
+        else:
+            return None
+    return located
+
+
+def splice(text: str, components: list[Component], replacements: dict[int, str]) -> str:
+    """Replace the given components (by index) with new fragments."""
+    for index in sorted(replacements, reverse=True):
+        component = components[index]
+        text = text[:component.start] + replacements[index] + text[component.end:]
+    return text
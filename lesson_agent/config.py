@@ -17,11 +17,77 @@ VALIDATOR_CLI = (
     / "dist"
     / "cli.js"
 )
+# Long-lived validator worker script (see validator.ValidatorPool)
+VALIDATOR_DAEMON = Path(__file__).resolve().parent / "validator_daemon.mjs"
 MLAI_FORMAT_GUIDE = Path(__file__).resolve().parent / "prompts" / "mlai_format_guide.md"
+# Local caches (generation outputs, ...)
+CACHE_DIR = PROJECT_ROOT / ".cache"
 
 # ---------------------------------------------------------------------------
 # Defaults
 # ---------------------------------------------------------------------------
 DEFAULT_MODEL = "claude-opus-4-5"
+# Fix attempts start on the first model and move up one rung each time the
+# loop stops converging (or after FIX_ESCALATE_AFTER attempts without a new
+# error minimum); the generation model is always the top rung.
+DEFAULT_FIX_MODELS = ("claude-haiku-4-5", "claude-sonnet-4-5")
+FIX_ESCALATE_AFTER = 2
+# USD per million (input, output) tokens, for estimating tiering savings
+MODEL_PRICES = {
+    "claude-opus-4-5": (5.0, 25.0),
+    "claude-sonnet-4-5": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+}
 DEFAULT_MAX_TURNS = 30
-MAX_VALIDATION_ATTEMPTS = 500
\ No newline at end of file
+MAX_VALIDATION_ATTEMPTS = 500  # hard ceiling; convergence/budgets stop earlier
+# A fix loop is "stalled" after this many identical error sets in a row, and
+# makes "no progress" after this many attempts without a new error minimum.
+CONVERGENCE_STALL_REPEATS = 3
+CONVERGENCE_WINDOW = 6
+# Fix prompts: source lines shown around each new error, and errors listed
+FIX_PROMPT_CONTEXT_LINES = 2
+FIX_PROMPT_MAX_DIAGNOSTICS = 25
+# A fix session is rotated once its context (estimated from its last run) passes
+# this many tokens: the next fix starts a fresh session that is given the
+# outstanding errors and re-reads the file from disk. 0 keeps resuming the same session.
+FIX_SESSION_MAX_TOKENS = 60_000
+# Broken top-level components repaired by targeted one-shot calls before
+# falling back to a full-session fix
+COMPONENT_REPAIR_MAX_FRAGMENTS = 4
+DEFAULT_CONCURRENCY = 1
+VALIDATOR_TIMEOUT = 30  # seconds
+VALIDATOR_STARTUP_TIMEOUT = 15  # seconds
+DEFAULT_VALIDATOR_WORKERS = 2
+GENERATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# main.py serve: how often the queue is re-read, and how long a job lease
+# lasts without renewal (renewed every third of that while the job runs)
+WORKER_POLL_SECONDS = 2.0
+WORKER_LEASE_SECONDS = 120.0
+# main.py api: listening port, and jobs allowed to wait for a free slot
+API_DEFAULT_PORT = 8765
+API_MAX_QUEUED = 100
+# Agent calls: retries of a transiently failed call (rate limit, overload,
+# 5xx, dropped connection), their jittered exponential backoff in seconds,
+# and the ceiling for the adaptive cap on concurrent calls in one process
+AGENT_MAX_RETRIES = 4
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+AGENT_MAX_CONCURRENT_CALLS = 16
+# Hedged generation (--hedge): a second generation starts once a lesson runs
+# past this percentile of earlier lessons' wall time or attempts, learned
+# from at least HEDGE_MIN_SAMPLES lesson records; it may spend this much
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 5
+HEDGE_MAX_EXTRA_USD = 2.0
+
+# Minimum component counts requested by prompts/generation.py; enforced by
+# the pre-validator so a short lesson is sent back before node runs.
+MIN_COMPONENT_COUNTS = {
+    "FlashCard": 4,
+    "SingleSelect": 2,
+    "MultiSelect": 1,
+    "SortQuiz": 1,
+    "MatchPairs": 1,
+    "FillBlanks": 1,
+    "Subjective": 1,
+}
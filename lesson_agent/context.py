@@ -0,0 +1,95 @@
+"""
+Compact per-lesson context packs built from curriculum.json.
+
+The curriculum is parsed once per run. For each lesson we extract only what
+the generator needs — the course header, the lesson's module, and the
+titles and key insights of neighbouring lessons — and inline it in the
+generation prompt together with the spec text. The agent then never spends
+turns (or input tokens) reading the whole curriculum file. When the
+curriculum ships an ontology, the pack also defines the lesson's key
+concepts from it (see ontology.py).
+"""
+
+import json
+from pathlib import Path
+
+from ontology import Ontology
+
+
+class CurriculumContext:
+    """A parsed curriculum that can render per-lesson context packs."""
+
+    def __init__(self, curriculum: dict, ontology: Ontology | None = None) -> None:
+        self.curriculum = curriculum
+        self.ontology = ontology
+        self.course = {k: v for k, v in curriculum.items() if k != "modules"}
+        # (module, lesson) pairs in course order
+        self._lessons: list[tuple[dict, dict]] = [
+            (module, lesson)
+            for module in curriculum.get("modules", [])
+            for lesson in module.get("lessons", [])
+        ]
+        self._index = {lesson["lesson_id"]: i for i, (_, lesson) in enumerate(self._lessons)}
+
+    @classmethod
+    def load(cls, curriculum_path: str | Path) -> "CurriculumContext":
+        """Load a curriculum and the ontology in its directory, if any."""
+        with open(curriculum_path, encoding="utf-8") as f:
+            curriculum = json.load(f)
+        return cls(curriculum, Ontology.find(Path(curriculum_path).parent))
+
+    def module_id(self, lesson_id: str) -> str | None:
+        """The module a lesson belongs to, or None if it is not in the curriculum."""
+        if lesson_id not in self._index:
+            return None
+        return self._lessons[self._index[lesson_id]][0]["module_id"]
+
+    def lesson_slice(self, lesson_id: str) -> dict:
+        """The raw curriculum data relevant to one lesson."""
+        if lesson_id not in self._index:
+            return {"course": self.course}
+        module, lesson = self._lessons[self._index[lesson_id]]
+        module_header = {k: v for k, v in module.items() if k != "lessons"}
+        return {"course": self.course, "module": module_header, "lesson": lesson}
+
+    def context_pack(self, lesson_id: str) -> str:
+        """Render the compact Markdown context for one lesson."""
+        course = self.course
+        lines = [f"**Course**: {course.get('course_title', '')}"]
+        if course.get("course_description"):
+            lines.append(f"**Description**: {course['course_description']}")
+        if course.get("target_audience"):
+            lines.append(f"**Target audience**: {course['target_audience']}")
+        if course.get("prerequisites"):
+            lines.append(f"**Prerequisites**: {'; '.join(course['prerequisites'])}")
+
+        if lesson_id not in self._index:
+            return "\n".join(lines)
+
+        position = self._index[lesson_id]
+        module, this_lesson = self._lessons[position]
+        lines += ["", f"**Module**: {module.get('module_title', module['module_id'])}"]
+        if module.get("module_description"):
+            lines.append(module["module_description"])
+
+        # Module siblings, plus the lesson just before this module starts
+        neighbours = [(m, l) for m, l in self._lessons if m is module]
+        first = self._index[neighbours[0][1]["lesson_id"]]
+        if first > 0:
+            neighbours.insert(0, self._lessons[first - 1])
+
+        lines += ["", "**Neighbouring lessons**:"]
+        for _, lesson in neighbours:
+            title = lesson.get("lesson_title", lesson["lesson_id"])
+            if lesson["lesson_id"] == lesson_id:
+                lines.append(f"- {lesson['lesson_id']}: {title} ← this lesson")
+            else:
+                insight = lesson.get("key_insight", "")
+                lines.append(f"- {lesson['lesson_id']}: {title}" + (f" — {insight}" if insight else ""))
+
+        if self.ontology is not None:
+            section = self.ontology.section(this_lesson.get("key_concepts") or [])
+            if section:
+                lines += ["", section]
+
+        return "\n".join(lines)
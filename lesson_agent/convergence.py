@@ -0,0 +1,71 @@
+"""
+Convergence detection for the validation/fix loop.
+
+A fix loop that is getting somewhere keeps shrinking its error set. The
+tracker watches the validator output across attempts and flags two ways
+a loop stops converging:
+
+- ``stalled``: exactly the same errors for ``stall_repeats`` attempts in a row
+- ``no_progress``: the error count has not reached a new minimum for
+  ``window`` attempts (covers oscillating counts)
+
+Errors are compared by their parsed diagnostics (or, if the output could
+not be parsed, by its text with all digits masked), so the same error on a
+shifted line still counts as the same error.
+"""
+
+import re
+
+from validator import ValidationResult
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def error_signature(result: ValidationResult) -> frozenset:
+    """Line-number-insensitive set of the errors in a validation result."""
+    if result.diagnostics:
+        return frozenset(d.key for d in result.diagnostics)
+    return frozenset(
+        _DIGITS_RE.sub("#", line.strip())
+        for line in result.raw_output.splitlines()
+        if line.strip()
+    )
+
+
+class ConvergenceTracker:
+    """Detects a fix loop that has stopped converging."""
+
+    def __init__(self, stall_repeats: int, window: int) -> None:
+        self.stall_repeats = stall_repeats
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget history (e.g. after escalating to a different strategy)."""
+        self._last: frozenset | None = None
+        self._repeats = 0
+        self._best: int | None = None
+        self._since_best = 0
+
+    @property
+    def attempts_without_progress(self) -> int:
+        """Attempts since the error count last reached a new minimum."""
+        return self._since_best
+
+    def observe(self, result: ValidationResult) -> str | None:
+        """Record a failed validation; return a stop reason if not converging."""
+        signature = error_signature(result)
+        self._repeats = self._repeats + 1 if signature == self._last else 1
+        self._last = signature
+
+        if self._best is None or result.error_count < self._best:
+            self._best = result.error_count
+            self._since_best = 0
+        else:
+            self._since_best += 1
+
+        if self._repeats >= self.stall_repeats:
+            return "stalled"
+        if self._since_best >= self.window:
+            return "no_progress"
+        return None
@@ -0,0 +1,96 @@
+"""
+Structured validator diagnostics.
+
+Both validators report one problem per line as
+``[severity] Line N: CODE - message``. ``parse_diagnostics`` turns that
+into deduplicated ``Diagnostic`` records, so the fix loop can tell which
+errors are new, which are still unresolved since the last attempt and
+which were fixed — and send the agent only what it has not seen, with a
+few lines of the surrounding source, instead of the full output.
+"""
+
+import re
+from dataclasses import dataclass
+
+_LINE_RE = re.compile(
+    r"^\s*(?:\[(?P<severity>\w+)\]\s*)?"
+    r"(?:Line (?P<line>\d+|\?):\s*)?"
+    r"(?P<code>[A-Za-z][\w.-]*) - (?P<message>.+?)\s*$"
+)
+_ELEMENT_RE = re.compile(r"<([A-Z][A-Za-z]*)\b")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """One problem reported by a validator."""
+
+    code: str
+    """Error class, e.g. ``UNESCAPED_LT`` or a parser code."""
+
+    message: str
+    """Human-readable description."""
+
+    line: int | None = None
+    """1-indexed source line, or None for whole-document issues."""
+
+    element: str | None = None
+    """Element the problem belongs to, if known."""
+
+    severity: str = "error"
+
+    @property
+    def key(self) -> tuple[str, str | None, str]:
+        """Identity across attempts: ignores line numbers, which shift as the file is edited."""
+        return (self.code, self.element, _DIGITS_RE.sub("#", self.message))
+
+    def format(self) -> str:
+        where = f"Line {self.line}: " if self.line else ""
+        return f"[{self.severity}] {where}{self.code} - {self.message}"
+
+
+def parse_diagnostics(output: str) -> list[Diagnostic]:
+    """Parse validator output into diagnostics, dropping exact duplicates.
+
+    If no line has the structured format (e.g. the one-shot CLI crashed),
+    every line mentioning an error becomes a ``VALIDATOR`` diagnostic.
+    """
+    parsed: list[Diagnostic] = []
+    for raw in output.splitlines():
+        match = _LINE_RE.match(raw)
+        if not match or not (match.group("severity") or match.group("line")):
+            continue
+        line = match.group("line")
+        element = _ELEMENT_RE.search(match.group("message"))
+        parsed.append(Diagnostic(
+            code=match.group("code"),
+            message=match.group("message"),
+            line=int(line) if line and line.isdigit() else None,
+            element=element.group(1) if element else None,
+            severity=(match.group("severity") or "error").lower(),
+        ))
+
+    if not parsed:
+        parsed = [
+            Diagnostic(code="VALIDATOR", message=raw.strip())
+            for raw in output.splitlines()
+            if "error" in raw.lower() and not raw.strip().startswith("#")
+        ]
+    return list(dict.fromkeys(parsed))
+
+
+def source_excerpt(source_lines: list[str], line: int, context: int, width: int = 160) -> str:
+    """Numbered lines around ``line``, with the offending line marked.
+
+    Lines longer than ``width`` characters are cut off.
+    """
+    start = max(1, line - context)
+    end = min(len(source_lines), line + context)
+    digits = len(str(end))
+    rows = []
+    for n in range(start, end + 1):
+        text = source_lines[n - 1]
+        if len(text) > width:
+            text = text[:width] + " …"
+        rows.append(f"{'>' if n == line else ' '} {n:>{digits}} | {text}")
+    return "\n".join(rows)
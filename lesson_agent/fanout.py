@@ -0,0 +1,185 @@
+"""
+Fan-out generation: lesson parts written concurrently, then assembled.
+
+Instead of one agent writing the whole lesson serially, each ``Part`` is
+generated by its own tool-free call from the same spec and context pack.
+``extract_part`` keeps only the elements a part is allowed to contribute,
+and ``assemble_lesson`` puts the parts together in a fixed order under a
+``<Meta>`` built from the curriculum, giving every top-level component a
+unique id. The result then goes through the normal validation loop.
+"""
+
+import re
+from dataclasses import dataclass
+from xml.sax.saxutils import escape
+
+from components import fenced_xml, split_components
+from config import MIN_COMPONENT_COUNTS
+from prevalidator import ASSESSMENTS
+
+_OPEN_TAG_RE = re.compile(r"<([A-Za-z][\w.:-]*)([^<>]*?)(/?)>", re.S)
+_ID_ATTR_RE = re.compile(r"""(\bid\s*=\s*)(["'])([^"']*)\2""")
+_ANY_ID_RE = re.compile(r"""<[A-Za-z][^<>]*?\bid\s*=\s*["']([^"']*)["']""")
+_VALID_ID_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+
+MAX_TAGS = 6
+
+
+@dataclass(frozen=True)
+class Part:
+    """One independently generated slice of a lesson."""
+
+    name: str
+    title: str
+    elements: frozenset[str]
+    """Top-level elements this part may contribute; anything else is dropped."""
+
+    id_prefix: str | None
+    """Prefix for ids assigned to this part's components, if they need one."""
+
+    instructions: str
+
+
+def _at_least(*names: str) -> str:
+    return ", ".join(f"{MIN_COMPONENT_COUNTS[n]} <{n}>" for n in names)
+
+
+PARTS = (
+    Part(
+        name="sections",
+        title="Instructional sections",
+        elements=frozenset({"Section"}),
+        id_prefix=None,
+        instructions=(
+            "Write the instructional content as a sequence of <Section> elements, starting with an "
+            "introductory section that has the lesson title as its <H1>. Cover every item of the "
+            "content outline, all key concepts and the practical examples, with <Code> and LaTeX "
+            "where they help. Do not write FlashCards or assessments — other writers cover those."
+        ),
+    ),
+    Part(
+        name="flashcards",
+        title="FlashCards",
+        elements=frozenset({"FlashCard"}),
+        id_prefix="fc",
+        instructions=(
+            f"Write at least {_at_least('FlashCard')} elements covering the key concepts and "
+            "terms of the lesson. Give each an id (fc1, fc2, ...)."
+        ),
+    ),
+    Part(
+        name="objective",
+        title="Objective assessments",
+        elements=frozenset(ASSESSMENTS - {"Subjective"}),
+        id_prefix="q",
+        instructions=(
+            "Write auto-graded questions testing genuine understanding of the learning objectives: "
+            f"at least {_at_least('SingleSelect', 'MultiSelect', 'SortQuiz', 'MatchPairs', 'FillBlanks')}. "
+            "Give each a unique id (q1, q2, ...)."
+        ),
+    ),
+    Part(
+        name="subjective",
+        title="Subjective questions",
+        elements=frozenset({"Subjective"}),
+        id_prefix="sq",
+        instructions=(
+            f"Write at least {_at_least('Subjective')} open-ended question(s) that ask the learner "
+            "to explain, derive or apply the lesson's ideas, each with a detailed <Rubric> of "
+            "<Criterion> elements. Give each an id (sq1, sq2, ...)."
+        ),
+    ),
+)
+
+
+def extract_part(part: Part, reply: str) -> list[str] | None:
+    """The allowed top-level elements from a part generator's reply.
+
+    Returns None if the reply has no fenced XML, cannot be split into
+    elements, or contains none this part may contribute.
+    """
+    fragment = fenced_xml(reply)
+    if fragment is None:
+        return None
+    wrapped = f"<Lesson>\n{fragment}\n</Lesson>"
+    kept = [c.text(wrapped) for c in split_components(wrapped) if c.name in part.elements]
+    return kept or None
+
+
+def lesson_meta(spec_text: str, lesson_slice: dict, lesson_id: str) -> tuple[str, list[str]]:
+    """Title and tags for ``<Meta>``, from the curriculum entry or the spec."""
+    lesson = lesson_slice.get("lesson", {})
+    title = lesson.get("lesson_title")
+    if not title:
+        heading = re.search(r"^#\s+(.+)$", spec_text, re.M)
+        title = heading.group(1).strip() if heading else lesson_id
+    tags = []
+    for concept in lesson.get("key_concepts", []):
+        tag = re.sub(r"[^a-z0-9]+", "-", concept.lower()).strip("-")
+        if tag and tag not in tags:
+            tags.append(tag)
+    return title, tags[:MAX_TAGS]
+
+
+def _with_id(component: str, new_id: str) -> str:
+    """Set the id attribute on a component's opening tag."""
+    tag = _OPEN_TAG_RE.search(component)
+    attrs = tag.group(2)
+    if _ID_ATTR_RE.search(attrs):
+        attrs = _ID_ATTR_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{new_id}{m.group(2)}", attrs, count=1)
+    else:
+        attrs = f' id="{new_id}"' + attrs
+    return component[:tag.start()] + f"<{tag.group(1)}{attrs}{tag.group(3)}>" + component[tag.end():]
+
+
+def assemble_lesson(mlai_id: str, title: str, tags: list[str], parts: list[tuple[Part, list[str]]]) -> str:
+    """Join generated parts into one lesson with a fresh ``<Meta>``.
+
+    Top-level components with a missing, malformed or already used id get
+    a new one from their part's prefix, so ids are unique across parts.
+    """
+    # Ids at any depth, so new ones never collide with nested elements
+    used: set[str] = {i for _, components in parts for c in components for i in _ANY_ID_RE.findall(c)}
+    seen: set[str] = set()
+    counters: dict[str, int] = {}
+    body: list[str] = []
+
+    for part, components in parts:
+        for component in components:
+            tag = _OPEN_TAG_RE.search(component)
+            current = _ID_ATTR_RE.search(tag.group(2))
+            value = current.group(3) if current else None
+            needs_id = value is not None or tag.group(1) in ASSESSMENTS
+            if needs_id and (value is None or value in seen or not _VALID_ID_RE.match(value)):
+                prefix = part.id_prefix or tag.group(1).lower()
+                while True:
+                    counters[prefix] = counters.get(prefix, 0) + 1
+                    value = f"{prefix}{counters[prefix]}"
+                    if value not in used:
+                        break
+                used.add(value)
+                component = _with_id(component, value)
+            if value is not None:
+                seen.add(value)
+            body.append(component)
+
+    meta = [
+        "  <Meta>",
+        f"    <Id>{escape(mlai_id)}</Id>",
+        f"    <Title>{escape(title)}</Title>",
+        "    <Version>1</Version>",
+    ]
+    if tags:
+        meta += ["    <Tags>", *(f"      <Tag>{escape(tag)}</Tag>" for tag in tags), "    </Tags>"]
+    meta.append("  </Meta>")
+
+    return "\n".join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "<Lesson>",
+        *meta,
+        "",
+        "\n\n".join(body),
+        "",
+        "</Lesson>",
+        "",
+    ])
@@ -0,0 +1,98 @@
+"""
+Hedged generation: when to start a second attempt at a slow lesson.
+
+A ``HedgePolicy`` is learned from earlier telemetry. Its thresholds are a
+percentile (HEDGE_PERCENTILE by default) of the wall time and of the
+validation attempts of lessons that actually ran. Cache hits are left out,
+since they say nothing about generation. Once a lesson is past either
+threshold, ``agent.generate_lesson`` starts an independent second
+generation into a scratch directory. The first of the two to validate
+wins, and the other is cancelled. The hedge's own budget caps the extra
+spend at ``max_extra_usd``.
+
+``TelemetryTap`` stands in for ``Telemetry`` on each of the two runs. It
+tallies their progress (latest attempt, cost so far) and passes records
+on, tagged for the hedge.
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+from config import HEDGE_MAX_EXTRA_USD, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE
+from telemetry import Telemetry
+from telemetry import percentile as _percentile  # the parameter below shadows the name
+
+
+@dataclass
+class HedgePolicy:
+    """When to hedge a lesson, and how much the hedge may spend."""
+
+    latency_s: float | None
+    """Start the hedge once the lesson has run this long."""
+
+    attempts: int | None
+    """...or once it reaches this validation attempt."""
+
+    max_extra_usd: float = HEDGE_MAX_EXTRA_USD
+    percentile: float = HEDGE_PERCENTILE
+    samples: int = 0
+    """Lesson records the thresholds were learned from."""
+
+    @classmethod
+    def from_metrics(
+        cls,
+        records: list[dict],
+        percentile: float = HEDGE_PERCENTILE,
+        max_extra_usd: float = HEDGE_MAX_EXTRA_USD,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+    ) -> "HedgePolicy | None":
+        """Thresholds from ``lesson`` records, or None with too few samples."""
+        lessons = [
+            r for r in records
+            if r.get("phase") == "lesson" and not r.get("cached") and r.get("attempts") and "wall_s" in r
+        ]
+        if len(lessons) < min_samples:
+            return None
+        return cls(
+            latency_s=round(_percentile([r["wall_s"] for r in lessons], percentile), 3),
+            attempts=max(1, round(_percentile([r["attempts"] for r in lessons], percentile))),
+            max_extra_usd=max_extra_usd,
+            percentile=percentile,
+            samples=len(lessons),
+        )
+
+    def describe(self) -> str:
+        return (
+            f"p{self.percentile:g} of {self.samples} earlier lessons: {self.latency_s:.0f}s or "
+            f"attempt {self.attempts}; up to ${self.max_extra_usd:.2f} extra per lesson"
+        )
+
+
+class TelemetryTap:
+    """Telemetry stand-in that tracks one run of a lesson.
+
+    Records go on to ``forward`` with ``tags`` added. The run's own
+    ``lesson`` summary is kept in ``summary`` and only passed on while
+    ``keep_summary`` is set, so that once a lesson is hedged a single
+    summary can be written for the race as a whole.
+    """
+
+    def __init__(self, forward: Telemetry | None, keep_summary: bool = True, **tags) -> None:
+        self.forward = forward
+        self.keep_summary = keep_summary
+        self.tags = tags
+        self.attempt = 0
+        self.cost_usd = 0.0
+        self.summary: dict | None = None
+        self.progressed = asyncio.Event()
+
+    def record(self, **fields) -> None:
+        phase = fields.get("phase")
+        if phase not in ("lesson", "generation_part"):  # the fan-out generation record sums its parts
+            self.cost_usd += fields.get("cost_usd") or 0.0
+        if phase == "lesson":
+            self.summary = fields
+        self.attempt = max(self.attempt, fields.get("attempt") or 0)
+        self.progressed.set()
+        if self.forward is not None and (phase != "lesson" or self.keep_summary):
+            self.forward.record(**{**fields, **self.tags})
@@ -0,0 +1,96 @@
+"""
+Append-only progress journal for batch runs.
+
+Each line of ``journal.jsonl`` records one state transition of one lesson:
+
+    {"ts": 1718000000.0, "lesson_id": "lesson_01_01", "state": "validating", "attempt": 3}
+
+States: ``pending`` -> ``generating`` -> ``validating`` (with attempt
+number) -> ``succeeded`` | ``failed``. Every line is written and flushed
+before the run moves on, so after a crash of the process the last line for
+a lesson is its last known state. ``--resume`` uses that to skip finished
+lessons and pick up in-flight ones from their on-disk ``.mlai``.
+
+Lines are fsynced by a background thread, one fsync for whatever was
+written meanwhile, so the event loop never waits on the disk. A machine
+crash can lose the last few lines, which leaves those lessons at an
+earlier state that ``--resume`` redoes.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+PENDING = "pending"
+GENERATING = "generating"
+VALIDATING = "validating"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+IN_FLIGHT = {GENERATING, VALIDATING}
+
+
+class ProgressJournal:
+    """Writer for a batch run's journal file.
+
+    Parameters
+    ----------
+    path:
+        Journal file location.
+    fresh:
+        If True, discard any existing journal (a new, non-resumed run).
+    """
+
+    def __init__(self, path: Path, fresh: bool = False) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "w" if fresh else "a", encoding="utf-8")
+        self._dirty = threading.Event()
+        self._closing = False
+        self._syncer = threading.Thread(target=self._sync, name="journal-fsync", daemon=True)
+        self._syncer.start()
+
+    def record(self, lesson_id: str, state: str, **fields) -> None:
+        """Append one state transition; it is fsynced in the background."""
+        entry = {"ts": round(time.time(), 3), "lesson_id": lesson_id, "state": state, **fields}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._dirty.set()
+
+    def _sync(self) -> None:
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            if self._closing:
+                return
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Fsync what is left and close the file."""
+        self._closing = True
+        self._dirty.set()
+        self._syncer.join()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def load_journal(path: Path) -> dict[str, dict]:
+    """Return the last recorded entry for each lesson.
+
+    A torn final line (crash mid-write) is ignored.
+    """
+    states: dict[str, dict] = {}
+    if not path.exists():
+        return states
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            states[entry["lesson_id"]] = entry
+    return states
@@ -13,18 +13,408 @@ Usage:
 
     # Generate all lessons from a specific module
     uv run python main.py --module module_01 test_curriculum/curriculum.json
+
+    # Generate all lessons, four at a time
+    uv run python main.py --all --concurrency 4 test_curriculum/curriculum.json
+
+    # ...within 50 requests and 400k tokens per minute
+    uv run python main.py --all -j 8 --rpm 50 --tpm 400000 test_curriculum/curriculum.json
+
+    # Record a timeline of the run for a trace viewer
+    uv run python main.py --all -j 4 --trace output/trace.json test_curriculum/curriculum.json
+
+    # Summarize latency, cost and attempts from a run's metrics
+    uv run python main.py report output/metrics.jsonl
+
+    # Re-validate an existing output tree
+    uv run python main.py validate test_output
+
+    # Compile its passed lessons into serving bundles
+    uv run python main.py compile test_output
+
+    # Run queued jobs as they arrive (JSONL file or spool directory)
+    uv run python main.py serve jobs.jsonl --concurrency 2
+
+    # HTTP job API with server-sent progress events
+    uv run python main.py api --port 8765
 """
 
 import asyncio
 import argparse
+import contextlib
+import json
 import sys
 from pathlib import Path
 
-from config import DEFAULT_MODEL, DEFAULT_MAX_TURNS, PROJECT_ROOT
-from agent import generate_lesson, generate_all_lessons
+from config import (
+    DEFAULT_MODEL,
+    DEFAULT_FIX_MODELS,
+    FIX_ESCALATE_AFTER,
+    FIX_SESSION_MAX_TOKENS,
+    DEFAULT_MAX_TURNS,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_VALIDATOR_WORKERS,
+    CACHE_DIR,
+    GENERATION_CACHE_MAX_BYTES,
+    PROJECT_ROOT,
+    WORKER_LEASE_SECONDS,
+    WORKER_POLL_SECONDS,
+    API_DEFAULT_PORT,
+    API_MAX_QUEUED,
+    AGENT_MAX_RETRIES,
+    AGENT_MAX_CONCURRENT_CALLS,
+    HEDGE_MAX_EXTRA_USD,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+)
+from budget import Budget, BudgetLimits
+from bulk_validate import validate_tree
+from bundle import compile_bundles, validated_lessons
+from cache import GenerationCache, ValidationCache
+from hedging import HedgePolicy
+from ratelimit import RateLimiter
+from telemetry import Telemetry, format_report, load_metrics, summarize_metrics
+from tracing import Tracer
+from validator import ValidatorPool
+
+
+async def _with_validator_pool(coro, workers: int, trace: Path | None = None):
+    """Run ``coro`` with persistent validator workers available, traced to ``trace`` if given."""
+    with Tracer(trace) if trace else contextlib.nullcontext():
+        async with ValidatorPool(workers):
+            return await coro
+
+
+def _add_rate_limit_args(parser: argparse.ArgumentParser) -> None:
+    """Flags for the process-wide agent call limiter (see ratelimit.py)."""
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Agent calls allowed per minute across the process (default: unlimited)",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Input+output tokens allowed per minute across the process (default: unlimited)",
+    )
+    parser.add_argument(
+        "--max-agent-calls",
+        type=int,
+        default=AGENT_MAX_CONCURRENT_CALLS,
+        help="Ceiling for concurrent agent calls; halved on throttling, then regrown "
+        f"(default: {AGENT_MAX_CONCURRENT_CALLS})",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=AGENT_MAX_RETRIES,
+        help="Retries of an agent call that hit a rate limit, overload or transient error "
+        f"(default: {AGENT_MAX_RETRIES})",
+    )
+
+
+def _apply_rate_limits(args: argparse.Namespace) -> None:
+    from agent import use_limiter
+
+    use_limiter(RateLimiter(args.rpm, args.tpm, args.max_agent_calls), max_retries=args.max_retries)
+
+
+def report_main(argv: list[str]) -> None:
+    """``main.py report``: aggregate a metrics JSONL file."""
+    parser = argparse.ArgumentParser(
+        prog="main.py report",
+        description="Summarize per-lesson telemetry: p50/p95 latency, cost per lesson, "
+        "and attempts-to-pass per module.",
+    )
+    parser.add_argument(
+        "metrics",
+        nargs="?",
+        default="output/metrics.jsonl",
+        help="Metrics file written by a generation run (default: output/metrics.jsonl)",
+    )
+    parser.add_argument("--run", default=None, help="Only include records from this run_id")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    metrics_path = Path(args.metrics)
+    if not metrics_path.is_absolute():
+        metrics_path = (PROJECT_ROOT / metrics_path).resolve()
+    if not metrics_path.exists():
+        print(f"Error: {metrics_path} not found")
+        sys.exit(1)
+
+    summary = summarize_metrics(load_metrics(metrics_path, run_id=args.run))
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+def validate_main(argv: list[str]) -> None:
+    """``main.py validate``: validate every .mlai in a directory tree."""
+    parser = argparse.ArgumentParser(
+        prog="main.py validate",
+        description="Validate every .mlai file under a directory in parallel, without "
+        "generating anything. Unchanged files reuse their cached result.",
+    )
+    parser.add_argument("directory", help="Output tree to check, e.g. test_output")
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Parallel pre-validator processes and node validator workers (default: CPU count)",
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Where to write the JSON report (default: <directory>/validation_report.json)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write cached results")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    root = Path(args.directory)
+    if not root.is_absolute():
+        root = (PROJECT_ROOT / root).resolve()
+    if not root.is_dir():
+        print(f"Error: {root} is not a directory")
+        sys.exit(1)
+
+    cache = None if args.no_cache else ValidationCache(CACHE_DIR / "validation")
+    report = asyncio.run(validate_tree(root, jobs=args.jobs, cache=cache))
+
+    report_path = Path(args.report) if args.report else root / "validation_report.json"
+    report_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report["results"]:
+            if not entry["success"]:
+                detail = entry["diagnostics"][0]["message"] if entry["diagnostics"] else entry.get("output", "")
+                print(f"❌ {entry['path']}: {entry['error_count']} error(s) — {detail.splitlines()[0] if detail else '?'}")
+        print(
+            f"\n✅ {report['passed']} passed, ❌ {report['failed']} failed, "
+            f"♻️  {report['cached']} from cache ({report['files']} files in {report['wall_s']:.2f}s)"
+        )
+        print(f"📄 Report: {report_path}")
+    sys.exit(0 if report["failed"] == 0 else 1)
+
+
+def _cached_passes(root: Path, cache: ValidationCache) -> list[tuple[str, str, Path]]:
+    """.mlai files under ``root`` whose cached validation result is a pass."""
+    lessons = []
+    for path in sorted(root.rglob("*.mlai")):
+        result = cache.get(path.read_bytes())
+        if result is not None and result.success:
+            lessons.append((path.stem, path.parent.name, path))
+    return lessons
+
+
+def _print_bundles(root: Path, report) -> None:
+    for lesson_id, error in report.failed.items():
+        print(f"❌ {lesson_id}: not compiled ({error})")
+    print(
+        f"📦 Bundles: {len(report.compiled)} compiled, {len(report.reused)} unchanged, "
+        f"{report.bytes / 1024:.0f} KiB → {root / 'bundles'}"
+    )
+
+
+def compile_main(argv: list[str]) -> None:
+    """``main.py compile``: build serving bundles from validated lessons."""
+    parser = argparse.ArgumentParser(
+        prog="main.py compile",
+        description="Compile validated lessons into pre-parsed serving bundles "
+        "(<directory>/bundles). Lessons whose source is unchanged are not re-parsed.",
+    )
+    parser.add_argument("directory", help="Output tree, e.g. output")
+    args = parser.parse_args(argv)
+
+    root = Path(args.directory)
+    if not root.is_absolute():
+        root = (PROJECT_ROOT / root).resolve()
+    if not root.is_dir():
+        print(f"Error: {root} is not a directory")
+        sys.exit(1)
+
+    # Passed lessons from the run's new_curriculum.json; failing that, files
+    # that passed `main.py validate`
+    lessons = validated_lessons(root)
+    if lessons is None:
+        lessons = _cached_passes(root, ValidationCache(CACHE_DIR / "validation"))
+        print(f"No new_curriculum.json; compiling {len(lessons)} file(s) with a cached passing validation")
+        if not lessons:
+            print(f"Run `main.py validate {args.directory}` first")
+            sys.exit(1)
+
+    report = compile_bundles(root, lessons)
+    _print_bundles(root, report)
+    sys.exit(1 if report.failed else 0)
+
+
+def serve_main(argv: list[str]) -> None:
+    """``main.py serve``: run jobs from a queue until stopped."""
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Serve a queue of lesson/curriculum jobs: a JSONL file (one job per line, "
+        "tailed for new lines) or a spool directory of *.json job files. Several workers, "
+        "on any machines sharing the state directory, can serve the same queue.",
+    )
+    parser.add_argument("queue", help="Job queue: a .jsonl file or a spool directory")
+    parser.add_argument(
+        "--state",
+        default=None,
+        help="Shared directory for leases, results and metrics (default: <queue>.state)",
+    )
+    parser.add_argument(
+        "--concurrency", "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Jobs this worker runs at once (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--validator-workers",
+        type=int,
+        default=DEFAULT_VALIDATOR_WORKERS,
+        help=f"Persistent node validator processes (default: {DEFAULT_VALIDATOR_WORKERS})",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=WORKER_POLL_SECONDS,
+        help=f"Seconds between queue reads (default: {WORKER_POLL_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=WORKER_LEASE_SECONDS,
+        help="How long a job stays leased after this worker stops renewing it "
+        f"(default: {WORKER_LEASE_SECONDS:g})",
+    )
+    parser.add_argument("--once", action="store_true", help="Exit once the queue is drained")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the caches")
+    _add_rate_limit_args(parser)
+    args = parser.parse_args(argv)
+
+    from worker import Worker, open_queue
+
+    _apply_rate_limits(args)
+
+    queue_path = Path(args.queue)
+    if not queue_path.is_absolute():
+        queue_path = (PROJECT_ROOT / queue_path).resolve()
+    if not queue_path.exists():
+        print(f"Error: {queue_path} not found")
+        sys.exit(1)
+    state_dir = (PROJECT_ROOT / args.state).resolve() if args.state else queue_path.with_name(queue_path.name + ".state")
+
+    cache = validation_cache = None
+    if not args.no_cache:
+        cache = GenerationCache(CACHE_DIR / "generation", max_bytes=GENERATION_CACHE_MAX_BYTES)
+        validation_cache = ValidationCache(CACHE_DIR / "validation")
+
+    worker = Worker(
+        open_queue(queue_path),
+        state_dir,
+        concurrency=args.concurrency,
+        poll_seconds=args.poll,
+        lease_seconds=args.lease_seconds,
+        cache=cache,
+        validation_cache=validation_cache,
+        once=args.once,
+    )
+    asyncio.run(_with_validator_pool(worker.run(), args.validator_workers))
+
+
+def api_main(argv: list[str]) -> None:
+    """``main.py api``: HTTP job API with server-sent progress events."""
+    parser = argparse.ArgumentParser(
+        prog="main.py api",
+        description="Serve a local HTTP API to submit, watch, cancel and collect "
+        "lesson/curriculum jobs. See api.py for the endpoints.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=API_DEFAULT_PORT,
+        help=f"Port to listen on (default: {API_DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--concurrency", "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Jobs run at once (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=API_MAX_QUEUED,
+        help=f"Jobs allowed to wait for a free slot before submissions are refused (default: {API_MAX_QUEUED})",
+    )
+    parser.add_argument(
+        "--validator-workers",
+        type=int,
+        default=DEFAULT_VALIDATOR_WORKERS,
+        help=f"Persistent node validator processes (default: {DEFAULT_VALIDATOR_WORKERS})",
+    )
+    parser.add_argument("--metrics", default=None, help="Telemetry JSONL file (default: output/metrics.jsonl)")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the caches")
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Play agent calls back from recordings in DIR instead of calling the API",
+    )
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Playback speed for --replay (default: 1)")
+    _add_rate_limit_args(parser)
+    args = parser.parse_args(argv)
+
+    from agent import use_query
+    from api import JobManager, serve_api
+    from replay import Replayer
+
+    if args.replay:
+        use_query(Replayer((PROJECT_ROOT / args.replay).resolve(), speed=args.replay_speed))
+    _apply_rate_limits(args)
+
+    cache = validation_cache = None
+    if not args.no_cache:
+        cache = GenerationCache(CACHE_DIR / "generation", max_bytes=GENERATION_CACHE_MAX_BYTES)
+        validation_cache = ValidationCache(CACHE_DIR / "validation")
+    metrics_path = (PROJECT_ROOT / (args.metrics or "output/metrics.jsonl")).resolve()
+
+    async def _serve() -> None:
+        manager = JobManager(
+            concurrency=args.concurrency,
+            max_queued=args.max_queued,
+            cache=cache,
+            validation_cache=validation_cache,
+            telemetry=Telemetry(metrics_path),
+        )
+        await serve_api(manager, args.host, args.port)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_with_validator_pool(_serve(), args.validator_workers))
+
+
+SUBCOMMANDS = {
+    "report": report_main,
+    "validate": validate_main,
+    "compile": compile_main,
+    "serve": serve_main,
+    "api": api_main,
+}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
+    # Imported here so subcommands start without loading the agent SDK
+    from agent import generate_lesson, generate_all_lessons, use_query
+    from replay import Recorder, Replayer
+
     parser = argparse.ArgumentParser(
         description="Generate MLAI lessons from curriculum specs using Claude Agent SDK.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -38,6 +428,22 @@ Examples:
 
   # All lessons from a specific module
   uv run python main.py --all --module module_01 ../test_curriculum/curriculum.json
+
+  # All lessons, four at a time
+  uv run python main.py --all --concurrency 4 ../test_curriculum/curriculum.json
+
+  # Latency / cost / attempts report for a previous run
+  uv run python main.py report output/metrics.jsonl
+
+  # Re-validate an existing output tree (parallel, cached by content hash)
+  uv run python main.py validate test_output
+
+  # Pre-parsed serving bundles for its passed lessons
+  uv run python main.py compile test_output
+
+  # Record a run, then replay it offline at 10x speed
+  uv run python main.py --all --record recordings/ ../test_curriculum/curriculum.json
+  uv run python main.py --all --replay recordings/ --replay-speed 10 --no-cache ../test_curriculum/curriculum.json
         """,
     )
     parser.add_argument(
@@ -62,7 +468,28 @@ Examples:
     parser.add_argument(
         "--model",
         default=DEFAULT_MODEL,
-        help=f"Claude model to use (default: {DEFAULT_MODEL})",
+        help=f"Claude model for generation; also the top fix tier (default: {DEFAULT_MODEL})",
+    )
+    parser.add_argument(
+        "--fix-models",
+        default=",".join(DEFAULT_FIX_MODELS),
+        help="Comma-separated fix models, cheapest first; empty to fix with --model only "
+        f"(default: {','.join(DEFAULT_FIX_MODELS)})",
+    )
+    parser.add_argument(
+        "--fix-escalate-after",
+        type=int,
+        default=FIX_ESCALATE_AFTER,
+        help="Fix attempts without a new error minimum before moving to the next fix model "
+        f"(default: {FIX_ESCALATE_AFTER})",
+    )
+    parser.add_argument(
+        "--fix-session-tokens",
+        type=int,
+        default=FIX_SESSION_MAX_TOKENS,
+        help="Estimated context size at which a fix session is replaced by a fresh one that is "
+        "given the errors and re-reads the file from disk; 0 to never rotate "
+        f"(default: {FIX_SESSION_MAX_TOKENS})",
     )
     parser.add_argument(
         "--max-turns",
@@ -70,23 +497,213 @@ Examples:
         default=DEFAULT_MAX_TURNS,
         help=f"Max agent turns per phase (default: {DEFAULT_MAX_TURNS})",
     )
+    parser.add_argument(
+        "--concurrency", "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Lessons to generate in parallel when using --all (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--validator-workers",
+        type=int,
+        default=DEFAULT_VALIDATOR_WORKERS,
+        help="Persistent node validator processes; 0 spawns node per validation "
+        f"(default: {DEFAULT_VALIDATOR_WORKERS})",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted --all run from the journal in the output directory",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Telemetry JSONL file (default: <output>/metrics.jsonl)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the generation and validation caches",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Regenerate every lesson, then update the generation cache",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=None,
+        help="Write a timeline of the run (phases, agent calls, tool uses, validator calls, "
+        "waits) to FILE in Chrome trace-event format",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Start a second, competing generation for lessons that run past a latency or "
+        "attempt percentile of earlier lessons in the metrics file; the first to pass wins",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=HEDGE_PERCENTILE,
+        help=f"Percentile of earlier lessons that triggers a hedge (default: {HEDGE_PERCENTILE})",
+    )
+    parser.add_argument(
+        "--hedge-budget-usd",
+        type=float,
+        default=HEDGE_MAX_EXTRA_USD,
+        help=f"Most a lesson's hedged generation may spend (default: {HEDGE_MAX_EXTRA_USD:g})",
+    )
+    parser.add_argument(
+        "--no-bundles",
+        action="store_true",
+        help="Skip compiling passed lessons into serving bundles after an --all run",
+    )
+    parser.add_argument(
+        "--ignore-prerequisites",
+        action="store_true",
+        help="With --all, schedule lessons without waiting for their prerequisites "
+        "and without prerequisite digests in their prompts",
+    )
+    parser.add_argument(
+        "--fanout",
+        action="store_true",
+        help="Generate sections, flashcards, objective and subjective assessments "
+        "concurrently, then assemble them",
+    )
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument(
+        "--record",
+        metavar="DIR",
+        default=None,
+        help="Save every agent call's message stream to DIR/<lesson_id>.jsonl",
+    )
+    replay_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Play agent calls back from recordings in DIR instead of calling the API",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Playback speed for --replay; 0 plays back without delay (default: 1)",
+    )
+    parser.add_argument(
+        "--lesson-budget-usd",
+        type=float,
+        default=None,
+        help="Stop a lesson once its agent cost reaches this many USD",
+    )
+    parser.add_argument(
+        "--lesson-budget-minutes",
+        type=float,
+        default=None,
+        help="Stop a lesson after this many minutes",
+    )
+    parser.add_argument(
+        "--lesson-budget-turns",
+        type=int,
+        default=None,
+        help="Stop a lesson after this many agent turns",
+    )
+    parser.add_argument(
+        "--budget-usd",
+        type=float,
+        default=None,
+        help="Total agent cost allowed for the whole run",
+    )
+    parser.add_argument(
+        "--budget-minutes",
+        type=float,
+        default=None,
+        help="Wall-clock limit for the whole run",
+    )
+    parser.add_argument(
+        "--budget-turns",
+        type=int,
+        default=None,
+        help="Total agent turns allowed for the whole run",
+    )
+    _add_rate_limit_args(parser)
 
     args = parser.parse_args()
+    if args.record:
+        use_query(Recorder((PROJECT_ROOT / args.record).resolve()))
+    elif args.replay:
+        use_query(Replayer((PROJECT_ROOT / args.replay).resolve(), speed=args.replay_speed))
+    _apply_rate_limits(args)
+    fix_models = tuple(m.strip() for m in args.fix_models.split(",") if m.strip())
+
+    lesson_limits = BudgetLimits(
+        max_cost_usd=args.lesson_budget_usd,
+        max_seconds=args.lesson_budget_minutes * 60 if args.lesson_budget_minutes else None,
+        max_turns=args.lesson_budget_turns,
+    )
+    global_budget = Budget(
+        BudgetLimits(
+            max_cost_usd=args.budget_usd,
+            max_seconds=args.budget_minutes * 60 if args.budget_minutes else None,
+            max_turns=args.budget_turns,
+        )
+    )
+
+    cache = validation_cache = None
+    if not args.no_cache:
+        validation_cache = ValidationCache(CACHE_DIR / "validation")
+        cache = GenerationCache(
+            CACHE_DIR / "generation",
+            max_bytes=GENERATION_CACHE_MAX_BYTES,
+            refresh=args.refresh,
+        )
 
     # Ensure output directory exists (resolve relative to PROJECT_ROOT)
     output_dir = (PROJECT_ROOT / args.output).resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    metrics_path = (PROJECT_ROOT / args.metrics).resolve() if args.metrics else output_dir / "metrics.jsonl"
+    hedge = None
+    if args.hedge:
+        # Learned from earlier runs only: read before this run appends to the file
+        earlier = load_metrics(metrics_path) if metrics_path.exists() else []
+        hedge = HedgePolicy.from_metrics(earlier, args.hedge_percentile, args.hedge_budget_usd)
+        if hedge is None:
+            print(f"⚠️  --hedge needs at least {HEDGE_MIN_SAMPLES} earlier lessons in {metrics_path}; not hedging")
+        else:
+            print(f"🏁 Hedging at {hedge.describe()}")
+    telemetry = Telemetry(metrics_path)
+    trace_path = (PROJECT_ROOT / args.trace).resolve() if args.trace else None
+
     if args.all:
         # Batch mode: generate from curriculum.json
         curriculum_input = (PROJECT_ROOT / args.input).resolve() if not Path(args.input).is_absolute() else Path(args.input)
         results = asyncio.run(
-            generate_all_lessons(
-                curriculum_path=str(curriculum_input),
-                output_dir=str(output_dir),
-                module_filter=args.module,
-                model=args.model,
-                max_turns=args.max_turns,
+            _with_validator_pool(
+                generate_all_lessons(
+                    curriculum_path=str(curriculum_input),
+                    output_dir=str(output_dir),
+                    module_filter=args.module,
+                    model=args.model,
+                    max_turns=args.max_turns,
+                    concurrency=args.concurrency,
+                    cache=cache,
+                    resume=args.resume,
+                    telemetry=telemetry,
+                    lesson_limits=lesson_limits,
+                    global_budget=global_budget,
+                    fix_models=fix_models,
+                    fix_escalate_after=args.fix_escalate_after,
+                    fix_session_tokens=args.fix_session_tokens,
+                    fanout=args.fanout,
+                    validation_cache=validation_cache,
+                    prerequisites=not args.ignore_prerequisites,
+                    hedge=hedge,
+                ),
+                args.validator_workers,
+                trace_path,
             )
         )
         print(f"\n{'=' * 60}")
@@ -95,10 +712,24 @@ Examples:
         print(f"✅ Success: {len(results['success'])} lessons")
         print(f"❌ Failed:  {len(results['failed'])} lessons")
         print(f"⚠️  Skipped: {len(results['skipped'])} lessons")
+        print(f"♻️  From cache: {len(results['cached'])} lessons")
+        if results["resumed"]:
+            print(f"⏩ Already done before resume: {len(results['resumed'])} lessons")
+        print(f"🩹 Agent fix turns saved by auto-fixer: {results['autofix_turns_saved']}")
+        print(f"💰 Agent cost: ${global_budget.cost_usd:.4f} ({global_budget.turns} turns)")
+        if results["cost_saved_usd"]:
+            print(f"🪜 Est. saved by cheaper fix models: ${results['cost_saved_usd']:.4f}")
         if results["failed"]:
-            print(f"\nFailed lessons: {', '.join(results['failed'])}")
+            print("\nFailed lessons:")
+            for lesson_id in results["failed"]:
+                print(f"  {lesson_id}: {results['stop_reasons'].get(lesson_id) or '?'}")
         if results["skipped"]:
             print(f"Skipped lessons: {', '.join(results['skipped'])}")
+        if not args.no_bundles:
+            _print_bundles(output_dir, compile_bundles(output_dir, validated_lessons(output_dir) or []))
+        print(f"\n📈 Metrics: {metrics_path} (run {telemetry.run_id})")
+        if trace_path:
+            print(f"🧵 Trace: {trace_path}")
     else:
         # Single lesson mode — resolve relative to PROJECT_ROOT
         input_path = Path(args.input)
@@ -117,14 +748,33 @@ Examples:
             curriculum_path = None
 
         ok = asyncio.run(
-            generate_lesson(
-                lesson_spec_path=str(input_path),
-                curriculum_path=str(curriculum_path) if curriculum_path else "",
-                output_dir=str(output_dir),
-                model=args.model,
-                max_turns=args.max_turns,
+            _with_validator_pool(
+                generate_lesson(
+                    lesson_spec_path=str(input_path),
+                    curriculum_path=str(curriculum_path) if curriculum_path else "",
+                    output_dir=str(output_dir),
+                    model=args.model,
+                    max_turns=args.max_turns,
+                    cache=cache,
+                    telemetry=telemetry,
+                    lesson_limits=lesson_limits,
+                    global_budget=global_budget,
+                    fix_models=fix_models,
+                    fix_escalate_after=args.fix_escalate_after,
+                    fix_session_tokens=args.fix_session_tokens,
+                    fanout=args.fanout,
+                    validation_cache=validation_cache,
+                    hedge=hedge,
+                ),
+                args.validator_workers,
+                trace_path,
             )
         )
+        if not ok:
+            print(f"\n🛑 Stopped: {ok.stop_reason}")
+        print(f"\n📈 Metrics: {metrics_path} (run {telemetry.run_id})")
+        if trace_path:
+            print(f"🧵 Trace: {trace_path}")
         sys.exit(0 if ok else 1)
 
 
@@ -0,0 +1,199 @@
+"""
+Course ontology retrieval for the generation prompt.
+
+Each curriculum directory ships an OWL ontology (RDF/XML) of the course's
+concepts, which the agent would otherwise only see by grepping the file.
+``Ontology.load`` parses it once into an index of classes and named
+individuals: label, comment, and parents (``rdfs:subClassOf`` for classes,
+``rdf:type`` for individuals), with the reverse child edges. The index is
+cached under ``.cache/ontology/`` by the file's hash, so an unchanged
+ontology is never parsed twice.
+
+``Ontology.section`` picks the concepts a lesson's ``key_concepts`` name,
+adds their direct parents and children, and renders them as a short
+prompt section (see context.CurriculumContext.context_pack). Matching
+compares word sets after light stemming, so "Gating variables (m, h, n)"
+finds "Gating Variable m" (and h, n) and "Deterministic vs. stochastic
+dynamics" finds "Deterministic Dynamical System", but "Fixed point" does
+not pull in "Point Model".
+"""
+
+import hashlib
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from config import CACHE_DIR
+
+FORMAT_VERSION = 1
+
+_RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+_RDFS = "{http://www.w3.org/2000/01/rdf-schema#}"
+_OWL = "{http://www.w3.org/2002/07/owl#}"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(.+?[.!?])(\s|$)")
+_STOPWORDS = frozenset({"a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "vs", "versus"})
+_SUFFIXES = (("ical", "ic"), ("ies", "y"), ("s", ""))
+
+# A key concept matches a label with the same words, or one it shares at
+# least two words and this fraction of the label's words with (key concepts
+# often trail symbols or a formula: "Membrane time constant τ = C/g_L")
+MATCH_THRESHOLD = 2 / 3
+# Section size caps: matched concepts, and broader/narrower concepts in total
+MAX_MATCHED = 8
+MAX_RELATED = 12
+
+
+def _stem(word: str) -> str:
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def _terms(text: str) -> frozenset[str]:
+    return frozenset(_stem(w) for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS)
+
+
+def _first_sentence(text: str) -> str:
+    match = _SENTENCE_RE.match(text)
+    return match.group(1) if match else text
+
+
+def _local_name(reference: str) -> str:
+    """``neuro:Attractor`` or ``http://...#Attractor`` -> ``Attractor``."""
+    return re.split(r"[#:/]", reference)[-1]
+
+
+@dataclass
+class Concept:
+    """A class or named individual of the ontology."""
+
+    name: str
+    label: str
+    comment: str = ""
+    parents: list[str] = field(default_factory=list)
+    individual: bool = False
+
+
+def parse_owl(source: str | bytes) -> dict[str, Concept]:
+    """Index the classes and named individuals of an RDF/XML ontology by local name."""
+    concepts: dict[str, Concept] = {}
+    for element in ET.fromstring(source):
+        if element.tag not in (f"{_OWL}Class", f"{_OWL}NamedIndividual"):
+            continue
+        reference = element.get(f"{_RDF}about") or element.get(f"{_RDF}ID")
+        if not reference:
+            continue
+        name = _local_name(reference)
+        individual = element.tag == f"{_OWL}NamedIndividual"
+        edge = f"{_RDF}type" if individual else f"{_RDFS}subClassOf"
+        label = element.findtext(f"{_RDFS}label") or name
+        concepts[name] = Concept(
+            name=name,
+            label=" ".join(label.split()),
+            comment=" ".join((element.findtext(f"{_RDFS}comment") or "").split()),
+            parents=[_local_name(p.get(f"{_RDF}resource")) for p in element.iter(edge) if p.get(f"{_RDF}resource")],
+            individual=individual,
+        )
+    return concepts
+
+
+class Ontology:
+    """An indexed ontology that renders per-lesson concept sections."""
+
+    def __init__(self, concepts: dict[str, Concept], source: str = "") -> None:
+        self.concepts = concepts
+        self.source = source
+        self.children: dict[str, list[str]] = {}
+        for concept in concepts.values():
+            for parent in concept.parents:
+                if parent in concepts:
+                    self.children.setdefault(parent, []).append(concept.name)
+        self._terms = {name: _terms(concept.label) for name, concept in concepts.items()}
+
+    @classmethod
+    def load(cls, path: Path, cache_dir: Path | None = CACHE_DIR / "ontology") -> "Ontology":
+        """Parse ``path``, or reuse the index cached for its content hash."""
+        source = path.read_bytes()
+        cached = cache_dir / f"{hashlib.sha256(source).hexdigest()}.json" if cache_dir else None
+        try:
+            index = json.loads(cached.read_text(encoding="utf-8")) if cached else None
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = None
+        if index is not None and index.get("format") == FORMAT_VERSION:
+            concepts = {name: Concept(**fields) for name, fields in index["concepts"].items()}
+            return cls(concepts, path.name)
+
+        concepts = parse_owl(source)
+        if cached is not None:
+            try:
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cached.with_name(f".{cached.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps({
+                    "format": FORMAT_VERSION,
+                    "concepts": {name: asdict(concept) for name, concept in concepts.items()},
+                }, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, cached)
+            except OSError:
+                pass  # an unwritable cache only costs a re-parse next time
+        return cls(concepts, path.name)
+
+    @classmethod
+    def find(cls, directory: Path, cache_dir: Path | None = CACHE_DIR / "ontology") -> "Ontology | None":
+        """The ontology shipped in a curriculum directory, or None if it has none that parses."""
+        for path in sorted(directory.glob("*.owl")):
+            try:
+                return cls.load(path, cache_dir)
+            except ET.ParseError:
+                continue
+        return None
+
+    def match(self, key_concepts: list[str]) -> list[str]:
+        """Names of the concepts ``key_concepts`` refer to, best matches first."""
+        scores: dict[str, float] = {}
+        for key in key_concepts:
+            wanted = _terms(key)
+            if not wanted:
+                continue
+            for name, terms in self._terms.items():
+                if not terms:
+                    continue
+                shared = len(wanted & terms)
+                score = shared / len(terms)
+                if wanted == terms or (shared >= 2 and score >= MATCH_THRESHOLD):
+                    scores[name] = max(scores.get(name, 0.0), score)
+        return sorted(scores, key=lambda name: -scores[name])[:MAX_MATCHED]
+
+    def section(self, key_concepts: list[str]) -> str:
+        """The prompt section for a lesson's key concepts; empty if none match."""
+        matched = self.match(key_concepts)
+        if not matched:
+            return ""
+        lines = [
+            "**Course ontology**: the lesson's key concepts as the course defines them, with "
+            "broader and narrower concepts. Use these names and definitions.",
+        ]
+        related: list[str] = []
+        for name in matched:
+            concept = self.concepts[name]
+            lines.append(f"- {concept.label}: {_first_sentence(concept.comment)}" if concept.comment
+                         else f"- {concept.label}")
+            broader = [p for p in concept.parents if p in self.concepts]
+            narrower = [c for c in self.children.get(name, []) if not self.concepts[c].individual]
+            examples = [c for c in self.children.get(name, []) if self.concepts[c].individual]
+            for title, names in (("Broader", broader), ("Narrower", narrower), ("Examples", examples)):
+                if names:
+                    lines.append(f"  - {title}: {'; '.join(self.concepts[n].label for n in names)}")
+            related += [n for n in broader + narrower + examples if n not in matched and n not in related]
+
+        definitions = [self.concepts[n] for n in related[:MAX_RELATED] if self.concepts[n].comment]
+        if definitions:
+            lines.append("- Related: " + " ".join(
+                f"{concept.label}: {_first_sentence(concept.comment)}" for concept in definitions
+            ))
+        return "\n".join(lines)
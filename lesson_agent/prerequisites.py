@@ -0,0 +1,164 @@
+"""
+Lesson prerequisites and the digests passed between lessons.
+
+``prerequisite_graph`` reads a curriculum into a DAG: each lesson depends on
+the earlier lessons its ``warmup_callback`` names ("lesson_01_04", or
+"lesson 1.4"), and on nothing else. Lessons with no references between
+them are independent, so a batch runs them side by side, while a lesson
+that builds on another waits for it.
+
+When a lesson passes, ``digest_mlai`` boils its file down to what later
+lessons need to stay consistent with it: the concepts it covers (its
+headings), the notation it introduced (equations from plaintext code
+blocks) and what its assessments asked. ``render_digests`` formats a few
+digests for the generation prompt, at a few hundred tokens each instead of
+the whole file.
+"""
+
+import html
+import re
+from dataclasses import dataclass, field
+
+from components import split_components
+from prevalidator import ASSESSMENTS
+
+_LESSON_ID_RE = re.compile(r"\blesson_(\d+)_(\d+)\b")
+_LESSON_NUMBER_RE = re.compile(r"\blesson\s+(\d+)\.(\d+)\b", re.I)
+_TITLE_RE = re.compile(r"<Title>(.*?)</Title>", re.S)
+_HEADING_RE = re.compile(r"<H2>(.*?)</H2>", re.S)
+_PLAINTEXT_CODE_RE = re.compile(r"""<Code\s+lang=["']plaintext["']\s*>(.*?)</Code>""", re.S)
+_PROMPT_RE = re.compile(r"<Prompt>(.*?)</Prompt>", re.S)
+_SENTENCE_RE = re.compile(r"[^.?!]+[.?!]?")
+# Headings that name a lesson's structure rather than its content
+_GENERIC_HEADING_RE = re.compile(
+    r"^(summary|key takeaways|knowledge (check|assessment)|common (pitfalls|misconceptions)|introduction)\b",
+    re.I,
+)
+
+# Digest size caps: items per field, and characters per item
+MAX_CONCEPTS = 10
+MAX_NOTATION = 6
+MAX_ASSESSED = 6
+MAX_ITEM_CHARS = 90
+
+
+def _referenced_lessons(text: str) -> set[str]:
+    found = {f"lesson_{a}_{b}" for a, b in _LESSON_ID_RE.findall(text)}
+    found |= {f"lesson_{int(a):02d}_{int(b):02d}" for a, b in _LESSON_NUMBER_RE.findall(text)}
+    return found
+
+
+def prerequisite_graph(curriculum: dict) -> dict[str, list[str]]:
+    """Map each lesson ID to the IDs of the earlier lessons it depends on.
+
+    Only references to lessons earlier in curriculum order count, so the
+    graph is acyclic by construction. Position alone creates no edge: a
+    lesson that names no earlier lesson can run at any time.
+    """
+    graph: dict[str, list[str]] = {}
+    seen: set[str] = set()
+    for module in curriculum.get("modules", []):
+        for lesson in module.get("lessons", []):
+            lesson_id = lesson["lesson_id"]
+            graph[lesson_id] = sorted(_referenced_lessons(lesson.get("warmup_callback") or "") & seen)
+            seen.add(lesson_id)
+    return graph
+
+
+def longest_chain(graph: dict[str, list[str]], lessons: list[str]) -> int:
+    """Length of the longest prerequisite chain among ``lessons`` (in curriculum order).
+
+    A batch of these lessons takes at least this many lessons' time, however
+    many run at once.
+    """
+    depth: dict[str, int] = {}
+    for lesson_id in lessons:
+        depth[lesson_id] = 1 + max((depth[d] for d in graph.get(lesson_id, []) if d in depth), default=0)
+    return max(depth.values(), default=0)
+
+
+def _clean(text: str) -> str:
+    return html.unescape(" ".join(re.sub(r"<[^>]+>", " ", text).split()))
+
+
+def _shorten(text: str) -> str:
+    if len(text) <= MAX_ITEM_CHARS:
+        return text
+    return text[:MAX_ITEM_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+def _question(prompt: str) -> str:
+    """The asking sentence of an assessment prompt (scenarios come first)."""
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(prompt) if s.strip()]
+    questions = [s for s in sentences if s.endswith("?")]
+    return (questions[-1] if questions else sentences[0]) if sentences else prompt
+
+
+def _unique(items, limit: int) -> list[str]:
+    kept: list[str] = []
+    for item in items:
+        item = _shorten(item)
+        if item and item not in kept:
+            kept.append(item)
+        if len(kept) == limit:
+            break
+    return kept
+
+
+@dataclass
+class LessonDigest:
+    """What a finished lesson covered, for the lessons that build on it."""
+
+    lesson_id: str
+    title: str = ""
+    concepts: list[str] = field(default_factory=list)
+    notation: list[str] = field(default_factory=list)
+    assessed: list[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        lines = [f"- {self.lesson_id}" + (f": {self.title}" if self.title else "")]
+        if self.concepts:
+            lines.append(f"  - Covered: {'; '.join(self.concepts)}")
+        if self.notation:
+            lines.append(f"  - Notation: {'; '.join(self.notation)}")
+        if self.assessed:
+            lines.append(f"  - Assessed: {'; '.join(self.assessed)}")
+        return "\n".join(lines)
+
+
+def digest_mlai(lesson_id: str, text: str) -> LessonDigest:
+    """Digest a lesson's .mlai source."""
+    title = _TITLE_RE.search(text)
+    equations = (
+        line.strip().strip("-").strip()
+        for block in _PLAINTEXT_CODE_RE.findall(text)
+        for line in html.unescape(block).splitlines()
+        if any(mark in line for mark in ("=", "∈", "≈")) and len(line.strip()) <= MAX_ITEM_CHARS
+    )
+    prompts = (
+        _question(_clean(prompt))
+        for component in split_components(text)
+        if component.name in ASSESSMENTS
+        for prompt in _PROMPT_RE.findall(component.text(text))
+    )
+    return LessonDigest(
+        lesson_id=lesson_id,
+        title=_clean(title.group(1)) if title else "",
+        concepts=_unique(
+            (h for h in map(_clean, _HEADING_RE.findall(text)) if not _GENERIC_HEADING_RE.match(h)),
+            MAX_CONCEPTS,
+        ),
+        notation=_unique(equations, MAX_NOTATION),
+        assessed=_unique(prompts, MAX_ASSESSED),
+    )
+
+
+def render_digests(digests: list[LessonDigest]) -> str:
+    """The prompt section for a lesson's finished prerequisites."""
+    if not digests:
+        return ""
+    return "\n".join([
+        "**Prerequisite lessons (already written)**: refer back to them by ID, reuse their "
+        "notation, and do not re-teach or re-assess what they covered.",
+        *(digest.render() for digest in digests),
+    ])
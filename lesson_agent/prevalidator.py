@@ -0,0 +1,271 @@
+"""
+Fast in-process structural checks for MLAI files.
+
+Catches the mechanical mistakes the system prompt warns about — unescaped
+``<``/``&``, HTML tags in ``<Body>``, a malformed ``<Id>``, duplicate
+assessment IDs, SingleSelect without exactly one correct option, content
+placed directly under ``<Lesson>`` — plus the minimum component counts
+requested by the generation prompt. Everything is found in one pass over
+the file, in microseconds, without node or a model turn.
+
+This is a pre-filter, not a replacement for the node validator: a file
+that passes here still goes through ``validator.validate_mlai_file_async``.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import MIN_COMPONENT_COUNTS
+from diagnostics import Diagnostic
+from validator import ValidationResult
+
+
+@dataclass
+class PrecheckIssue:
+    """A single problem found by the pre-validator."""
+
+    code: str
+    """Stable error class, e.g. ``UNESCAPED_LT``."""
+
+    message: str
+    """Human-readable description."""
+
+    line: int | None = None
+    """1-indexed source line, or None for whole-document issues."""
+
+    element: str | None = None
+    """Element the issue belongs to, if any."""
+
+    def format(self) -> str:
+        where = f"Line {self.line}: " if self.line else ""
+        return f"[error] {where}{self.code} - {self.message}"
+
+
+@dataclass
+class _Frame:
+    """An open element on the parse stack."""
+
+    name: str
+    line: int
+    attrs: dict[str, str]
+    content_start: int
+    children: list[str] = field(default_factory=list)
+    correct_options: int = 0
+
+
+# ---------------------------------------------------------------------------
+# Grammar facts (from prompts/mlai_format_guide.md)
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<\?.*?\?>"
+    r"|<(?P<close>/)?(?P<name>[A-Za-z][\w.:-]*)(?P<attrs>(?:\s[^<>]*?)?)\s*(?P<selfclose>/)?>"
+    r"|(?P<lt><)"
+    r"|(?P<amp>&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);))",
+    re.S,
+)
+_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_ID_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+
+SECTION_CONTENT = {"H1", "H2", "H3", "Body", "Code"}
+ASSESSMENTS = {"SingleSelect", "MultiSelect", "SortQuiz", "MatchPairs", "FillBlanks", "Subjective"}
+CODE_LANGS = {
+    "python", "javascript", "typescript", "java", "c", "cpp", "csharp", "go",
+    "rust", "ruby", "php", "sql", "bash", "html", "css", "json", "xml",
+    "markdown", "plaintext",
+}
+SECTION_TYPES = {"text", "concept", "code", "tip", "video", "example"}
+HTML_TAGS = {
+    "a", "b", "blockquote", "br", "code", "div", "em", "h1", "h2", "h3", "h4",
+    "hr", "i", "img", "li", "ol", "p", "pre", "span", "strong", "sub", "sup",
+    "table", "td", "th", "tr", "u", "ul",
+}
+
+
+# ---------------------------------------------------------------------------
+# Checker
+# ---------------------------------------------------------------------------
+
+
+def check_mlai_text(text: str) -> list[PrecheckIssue]:
+    """Run all structural checks over MLAI source and return every issue found."""
+    issues: list[PrecheckIssue] = []
+    seen: set[tuple[int | None, str]] = set()
+
+    def report(code: str, message: str, line: int | None, element: str | None = None) -> None:
+        # One issue per (line, code) keeps a line full of `<` from flooding the report
+        if (line, code) in seen:
+            return
+        seen.add((line, code))
+        issues.append(PrecheckIssue(code=code, message=message, line=line, element=element))
+
+    stack: list[_Frame] = []
+    counts: Counter[str] = Counter()
+    ids: dict[str, int] = {}
+    root_seen = False
+    line = 1
+    pos = 0
+
+    for match in _TOKEN_RE.finditer(text):
+        line += text.count("\n", pos, match.start())
+        pos = match.start()
+        top = stack[-1] if stack else None
+
+        if match.group("amp"):
+            report("UNESCAPED_AMP", "Literal '&' must be written as '&amp;'", line, top and top.name)
+            continue
+
+        name = match.group("name")
+        if name is None:
+            if match.group("lt"):
+                where = f"<{top.name}>" if top else "text"
+                report("UNESCAPED_LT", f"Literal '<' in {where} must be written as '&lt;'", line,
+                       top and top.name)
+            continue
+
+        closing = bool(match.group("close"))
+
+        # Tags inside text-only containers are either escaping mistakes or HTML
+        if top and top.name in ("Code", "Body") and not (closing and name == top.name):
+            if top.name == "Code":
+                report("UNESCAPED_LT", f"'<{match.group(0)[1:]}' inside <Code> must be escaped "
+                       "as '&lt;'", line, "Code")
+            elif not closing:
+                if name.lower() in HTML_TAGS:
+                    report("HTML_IN_BODY", f"HTML tag <{name}> in <Body>; use Markdown instead",
+                           line, "Body")
+                else:
+                    report("INVALID_CHILD", f"<Body> accepts text only, found <{name}>", line, "Body")
+            continue
+
+        if closing:
+            _close(name, line, match.start(), text, stack, report)
+            continue
+
+        attrs = {m.group(1): m.group(2) if m.group(2) is not None else m.group(3)
+                 for m in _ATTR_RE.finditer(match.group("attrs") or "")}
+
+        if not stack:
+            if root_seen or name != "Lesson":
+                report("INVALID_ROOT", f"Root element must be a single <Lesson>, found <{name}>",
+                       line, name)
+            root_seen = True
+        else:
+            parent = stack[-1]
+            if parent.name == "Lesson":
+                if not parent.children and name != "Meta":
+                    report("META_NOT_FIRST", "<Meta> must be the first child of <Lesson>", line, name)
+                if name in SECTION_CONTENT:
+                    report("CONTENT_OUTSIDE_SECTION",
+                           f"<{name}> must be inside a <Section>, not directly under <Lesson>",
+                           line, name)
+            parent.children.append(name)
+
+        counts[name] += 1
+        _check_attrs(name, attrs, line, ids, stack, report)
+
+        if not match.group("selfclose"):
+            stack.append(_Frame(name=name, line=line, attrs=attrs, content_start=match.end()))
+
+    for frame in reversed(stack):
+        report("UNCLOSED_ELEMENT", f"<{frame.name}> is never closed", frame.line, frame.name)
+    if not root_seen:
+        report("INVALID_ROOT", "Document has no <Lesson> root element", None)
+
+    for component, minimum in MIN_COMPONENT_COUNTS.items():
+        if counts[component] < minimum:
+            report("TOO_FEW_COMPONENTS",
+                   f"Lesson needs at least {minimum} <{component}>, found {counts[component]}",
+                   None, component)
+
+    return issues
+
+
+def _check_attrs(name, attrs, line, ids, stack, report) -> None:
+    """Attribute-level rules for a newly opened element."""
+    if name in ASSESSMENTS and not attrs.get("id"):
+        report("MISSING_ID", f"<{name}> requires an id attribute", line, name)
+
+    element_id = attrs.get("id")
+    if element_id:
+        if element_id in ids:
+            report("DUPLICATE_ID", f"id \"{element_id}\" is already used on line {ids[element_id]}",
+                   line, name)
+        else:
+            ids[element_id] = line
+
+    if name == "Code":
+        lang = attrs.get("lang")
+        if not lang:
+            report("MISSING_ATTRIBUTE", "<Code> requires a lang attribute", line, name)
+        elif lang not in CODE_LANGS:
+            report("INVALID_ATTRIBUTE", f"<Code lang=\"{lang}\"> is not a supported language",
+                   line, name)
+
+    if name == "Section" and attrs.get("type", "text") not in SECTION_TYPES:
+        report("INVALID_ATTRIBUTE", f"<Section type=\"{attrs['type']}\"> is not a supported type",
+               line, name)
+
+    if name == "Option" and attrs.get("correct") == "true":
+        for frame in reversed(stack):
+            if frame.name in ("SingleSelect", "MultiSelect"):
+                frame.correct_options += 1
+                break
+
+
+def _close(name, line, start, text, stack, report) -> None:
+    """Pop ``name`` off the stack and run element-level rules for it."""
+    if not any(frame.name == name for frame in stack):
+        report("UNEXPECTED_CLOSE", f"Closing </{name}> has no matching opening tag", line, name)
+        return
+
+    while stack[-1].name != name:
+        frame = stack.pop()
+        report("UNCLOSED_ELEMENT", f"<{frame.name}> is never closed", frame.line, frame.name)
+    frame = stack.pop()
+
+    if name == "Id":
+        value = text[frame.content_start:start].strip()
+        if not _ID_RE.match(value):
+            report("INVALID_ID", f"<Id> \"{value}\" must start with a letter and contain only "
+                   "letters, numbers, and hyphens", frame.line, name)
+    elif name == "Meta":
+        for required in ("Id", "Title", "Version"):
+            if required not in frame.children:
+                report("MISSING_ELEMENT", f"<Meta> is missing <{required}>", frame.line, name)
+    elif name == "SingleSelect" and frame.correct_options != 1:
+        report("SINGLE_SELECT_CORRECT",
+               f"<SingleSelect> must have exactly one correct=\"true\" option, found "
+               f"{frame.correct_options}", frame.line, name)
+    elif name == "MultiSelect" and frame.correct_options < 1:
+        report("MULTI_SELECT_CORRECT", "<MultiSelect> needs at least one correct=\"true\" option",
+               frame.line, name)
+
+
+def prevalidate_mlai_file(file_path: Path) -> ValidationResult:
+    """Run the structural checks on a file and report like the node validator.
+
+    ``raw_output`` uses the same ``[error] Line N: CODE - message`` lines as
+    the validator workers, so it can be fed straight into the fix prompt.
+    """
+    try:
+        text = file_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ValidationResult(success=False, raw_output=f"File not found: {file_path}", error_count=1)
+    except UnicodeDecodeError as exc:
+        return ValidationResult(success=False, raw_output=f"File is not valid UTF-8: {exc}",
+                                error_count=1)
+
+    issues = check_mlai_text(text)
+    return ValidationResult(
+        success=not issues,
+        raw_output="\n".join(issue.format() for issue in issues),
+        error_count=len(issues),
+        diagnostics=list(dict.fromkeys(
+            Diagnostic(code=i.code, message=i.message, line=i.line, element=i.element)
+            for i in issues
+        )),
+    )
@@ -5,5 +5,15 @@ Prompt builders for the lesson generation agent.
 from prompts.system import build_system_prompt
 from prompts.generation import build_generation_prompt
 from prompts.fix import build_fix_prompt
+from prompts.repair import build_repair_prompt, build_repair_system_prompt
+from prompts.fanout import build_part_prompt, build_part_system_prompt
 
-__all__ = ["build_system_prompt", "build_generation_prompt", "build_fix_prompt"]
\ No newline at end of file
+__all__ = [
+    "build_system_prompt",
+    "build_generation_prompt",
+    "build_fix_prompt",
+    "build_repair_prompt",
+    "build_repair_system_prompt",
+    "build_part_prompt",
+    "build_part_system_prompt",
+]
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Prompts for fan-out generation.
+
+In fan-out mode a lesson is written by several concurrent, tool-free
+calls, one per part (instructional sections, FlashCards, objective
+assessments, subjective questions). Every call gets the same spec and
+context pack and replies with its XML elements only; ``fanout.py``
+assembles them into the lesson.
+"""
+
+from config import MLAI_FORMAT_GUIDE
+from prompts.system import CONTENT_GUIDELINES
+
+
+def build_part_system_prompt() -> str:
+    """System prompt shared by all part generators."""
+    mlai_guide = MLAI_FORMAT_GUIDE.read_text(encoding="utf-8")
+
+    return """You write one part of an interactive educational lesson in MLAI format (XML). Other writers produce the other parts of the same lesson in parallel, and all parts are assembled into one `<Lesson>` with its `<Meta>` afterwards.
+
+Reply with the XML elements of your part only — no `<?xml ?>` declaration, no `<Lesson>` and no `<Meta>` — in a single ```xml fenced block, and nothing else. Do not use any tools.
+
+## MLAI Format Reference
+
+""" + mlai_guide + """
+
+""" + CONTENT_GUIDELINES
+
+
+def build_part_prompt(title: str, instructions: str, spec_text: str, context_pack: str) -> str:
+    """Build the user prompt for one part of a fan-out generation.
+
+    Parameters
+    ----------
+    title:
+        Name of the part, e.g. "FlashCards".
+    instructions:
+        What this part must contain.
+    spec_text:
+        The lesson specification (markdown).
+    context_pack:
+        Compact course context from ``CurriculumContext.context_pack``.
+    """
+    return f"""Write the **{title}** part of an MLAI lesson.
+
+## Course context
+
+{context_pack}
+
+## Lesson specification
+
+{spec_text.strip()}
+
+## Your part: {title}
+
+{instructions}
+
+Reply with the XML elements in a single ```xml block."""
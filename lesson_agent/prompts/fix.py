@@ -7,8 +7,68 @@ generated MLAI file.
 
 from pathlib import Path
 
+from config import FIX_PROMPT_CONTEXT_LINES, FIX_PROMPT_MAX_DIAGNOSTICS
+from diagnostics import Diagnostic, source_excerpt
 
-def build_fix_prompt(output_file: Path, validation_errors: str, attempt: int) -> str:
+_MAX_LINE_NUMBERS = 8  # line numbers listed per group of identical errors
+
+
+def _format_diagnostics(
+    diagnostics: list[Diagnostic],
+    previous: set,
+    source_lines: list[str],
+) -> str:
+    """List errors grouped by ``Diagnostic.key``.
+
+    Only groups the agent has not seen yet get a source excerpt (around
+    their first occurrence).
+    """
+    groups: dict[tuple, list[Diagnostic]] = {}
+    for diagnostic in diagnostics:
+        if diagnostic.severity == "error":
+            groups.setdefault(diagnostic.key, []).append(diagnostic)
+    new = [key for key in groups if key not in previous]
+    unresolved = [key for key in groups if key in previous]
+
+    summary = [f"{len(new)} new", f"{len(unresolved)} still unresolved"]
+    if previous:
+        summary.append(f"{len(previous - groups.keys())} fixed since your last edit")
+    lines = [f"**Validation errors** ({', '.join(summary)}):", ""]
+
+    shown = (new + unresolved)[:FIX_PROMPT_MAX_DIAGNOSTICS]
+    for number, key in enumerate(shown, 1):
+        group = groups[key]
+        first = group[0]
+        numbers = [str(d.line) for d in group if d.line]
+        if not numbers:
+            where = "document"
+        elif len(numbers) == 1:
+            where = f"line {numbers[0]}"
+        elif len(numbers) <= _MAX_LINE_NUMBERS:
+            where = f"lines {', '.join(numbers)}"
+        else:
+            rest = len(numbers) - _MAX_LINE_NUMBERS
+            where = f"lines {', '.join(numbers[:_MAX_LINE_NUMBERS])} (+{rest} more)"
+        status = " (still unresolved)" if key in previous else ""
+        lines.append(f"{number}. `{first.code}` at {where}{status}: {first.message}")
+        if key not in previous and first.line and source_lines:
+            excerpt = source_excerpt(source_lines, first.line, FIX_PROMPT_CONTEXT_LINES)
+            lines += ["   ```", *(f"   {row}" for row in excerpt.splitlines()), "   ```"]
+
+    if len(groups) > len(shown):
+        lines.append(f"\n... and {len(groups) - len(shown)} more kinds of error; fix these first.")
+    return "\n".join(lines)
+
+
+def build_fix_prompt(
+    output_file: Path,
+    validation_errors: str,
+    attempt: int,
+    diagnostics: list[Diagnostic] | None = None,
+    previous: set | None = None,
+    source: str | None = None,
+    rotated: bool = False,
+) -> str:
     """Build a prompt that gives the agent validation errors to fix.
 
     Parameters
@@ -16,18 +76,46 @@ def build_fix_prompt(output_file: Path, validation_errors: str, attempt: int) ->
     output_file:
         Path to the .mlai file that failed validation.
     validation_errors:
-        Raw output from the validator CLI (error messages).
+        Raw output from the validator CLI (error messages). Sent verbatim
+        only when it could not be parsed into ``diagnostics``.
     attempt:
         Current fix attempt number (1-indexed).
+    diagnostics:
+        Parsed errors from the validation result.
+    previous:
+        ``Diagnostic.key`` of every error sent in the previous fix prompt of
+        the same session. Those are listed without source excerpts, since
+        the agent has already seen them.
+    source:
+        Current file content, for the excerpts around new errors.
+    rotated:
+        The fix loop moved to a fresh session to keep its context small.
+        The prompt says so; with ``previous`` empty, every error comes
+        with its excerpt, so the new session starts from the file as it is
+        now rather than from the history of earlier attempts.
     """
-    return f"""The MLAI file you generated failed validation (attempt {attempt}).
+    if any(d.severity == "error" for d in diagnostics or []):
+        errors = _format_diagnostics(
+            diagnostics,
+            previous or set(),
+            source.splitlines() if source else [],
+        )
+    else:
+        errors = f"**Validation errors**:\n```\n{validation_errors}\n```"
+
+    if rotated:
+        opening = (
+            f"This MLAI file still fails validation after earlier fix attempts (now attempt {attempt}). "
+            "The file on disk is the current state; read it before editing."
+        )
+    else:
+        opening = f"The MLAI file you generated failed validation (attempt {attempt})."
+
+    return f"""{opening}
 
 **File**: {output_file}
 
-**Validation errors**:
-```
-{validation_errors}
-```
+{errors}
 
 Read the error messages carefully, then edit the file to fix every error.
-After making your fixes, confirm that you are done."""
\ No newline at end of file
+After making your fixes, confirm that you are done."""
@@ -10,9 +10,34 @@ def build_generation_prompt(
     curriculum_path: str,
     output_file: Path,
     lesson_id: str,
+    spec_text: str | None = None,
+    context_pack: str | None = None,
 ) -> str:
-    """Build the user prompt that instructs the agent to generate an MLAI file."""
-    return f"""Generate an MLAI lesson from the specification.
+    """Build the user prompt that instructs the agent to generate an MLAI file.
+
+    When ``spec_text`` and ``context_pack`` are given they are inlined, so the
+    agent can write the file straight away instead of reading the spec and
+    the whole curriculum with tool calls first.
+    """
+    if spec_text is not None and context_pack is not None:
+        header = f"""Generate an MLAI lesson from the specification below.
+
+**Output file path**: {output_file}
+
+## Course context
+
+{context_pack}
+
+## Lesson specification
+
+{spec_text.strip()}
+
+Steps:
+1. Use the specification and course context above (no need to read any files)
+2. Generate a complete, high-quality .mlai lesson file
+3. Write it to: {output_file}"""
+    else:
+        header = f"""Generate an MLAI lesson from the specification.
 
 **Lesson spec file**: {lesson_spec_path}
 **Curriculum context**: {curriculum_path}
@@ -22,7 +47,9 @@ Steps:
 1. Read the lesson spec: {lesson_spec_path}
 2. Read the curriculum for context: {curriculum_path}
 3. Generate a complete, high-quality .mlai lesson file
-4. Write it to: {output_file}
+4. Write it to: {output_file}"""
+
+    return header + f"""
 
 The lesson should include:
 - Proper <Meta> block with lesson ID "{lesson_id}" and appropriate title/tags
@@ -0,0 +1,53 @@
+"""
+Prompts for targeted component repair.
+
+A repair call sees one broken top-level component and its errors — not the
+lesson, the spec or the generation session — and answers with the
+corrected fragment only.
+"""
+
+from config import MLAI_FORMAT_GUIDE
+from diagnostics import Diagnostic
+
+
+def build_repair_system_prompt() -> str:
+    """System prompt for a one-turn, tool-free fragment repair."""
+    mlai_guide = MLAI_FORMAT_GUIDE.read_text(encoding="utf-8")
+
+    return """You repair individual components of MLAI (XML) lesson files.
+
+You will be given one top-level component from a lesson and the validation errors found in it. Reply with the corrected component only, in a single ```xml fenced block, and nothing else. Keep the same element, attributes and `id`, and change only what is needed to fix the errors. Do not use any tools.
+
+## MLAI Format Reference
+
+""" + mlai_guide
+
+
+def build_repair_prompt(fragment: str, diagnostics: list[Diagnostic], first_line: int) -> str:
+    """Build the user prompt for repairing one component.
+
+    Parameters
+    ----------
+    fragment:
+        Source of the broken component.
+    diagnostics:
+        Errors located in the component (file line numbers).
+    first_line:
+        File line number of the fragment's first line; error lines are
+        given relative to the fragment.
+    """
+    errors = "\n".join(
+        f"- Line {d.line - first_line + 1}: {d.code} - {d.message}"
+        for d in dict.fromkeys(diagnostics)
+    )
+    return f"""This component failed validation.
+
+**Errors** (line numbers are relative to the component):
+{errors}
+
+**Component**:
+```xml
+{fragment}
+```
+
+Reply with the corrected component in a single ```xml block."""
@@ -7,22 +7,8 @@ Validation is handled externally by the orchestration loop.
 
 from config import MLAI_FORMAT_GUIDE
 
-
-def build_system_prompt() -> str:
-    """Build the system prompt with the MLAI format guide embedded."""
-    mlai_guide = MLAI_FORMAT_GUIDE.read_text(encoding="utf-8")
-
-    # Using string concatenation instead of f-string to avoid issues with
-    # backslashes in the mlai_guide content (LaTeX expressions like \frac, \sqrt)
-    return """You are a lesson content generator that produces interactive educational lessons in MLAI format (XML).
-
-You will be given a lesson specification (markdown) and course context (JSON). Your job is to generate a rich, pedagogically sound .mlai lesson file.
-
-## MLAI Format Reference
-
-""" + mlai_guide + """
-
-## Content Generation Guidelines
+# Shared with prompts/fanout.py, whose part generators follow the same rules
+CONTENT_GUIDELINES = """## Content Generation Guidelines
 
 1. **Structure**: Start with <Meta>, then wrap ALL instructional content (H1, H2, H3, Body, Code) in `<Section>` tags. Interactive components (FlashCard, SingleSelect, MultiSelect, SortQuiz, MatchPairs, FillBlanks, Subjective) can be placed directly under `<Lesson>`. NEVER place H1, H2, H3, Body, or Code directly under `<Lesson>` — they must always be inside a `<Section>`.
 
@@ -76,13 +62,29 @@ You will be given a lesson specification (markdown) and course context (JSON). Y
 10. **ID format rules**: The `<Id>` in `<Meta>` must start with a letter and contain ONLY letters, numbers, and hyphens. No underscores, spaces, or special characters. Examples: `lesson-08-01`, `python-101`, `intro-to-loops`. The lesson ID will be provided to you — use it exactly as given.
 
 11. **Quality Bar**: Aim for research-grade content appropriate for the target audience. Questions should test genuine understanding, not just recall.
+"""
+
+
+def build_system_prompt() -> str:
+    """Build the system prompt with the MLAI format guide embedded."""
+    mlai_guide = MLAI_FORMAT_GUIDE.read_text(encoding="utf-8")
+
+    # Using string concatenation instead of f-string to avoid issues with
+    # backslashes in the mlai_guide content (LaTeX expressions like \frac, \sqrt)
+    return """You are a lesson content generator that produces interactive educational lessons in MLAI format (XML).
+
+You will be given a lesson specification (markdown) and course context. Your job is to generate a rich, pedagogically sound .mlai lesson file.
+
+## MLAI Format Reference
+
+""" + mlai_guide + """
 
+""" + CONTENT_GUIDELINES + """
 ## Your Workflow
 
-1. Read the lesson specification markdown file
-2. Read the curriculum.json for course-level context (title, target audience, prerequisites)
-3. Generate a complete .mlai file and write it to the specified output path
-4. Report that you have finished writing the file
+1. Take the lesson specification and course-level context (title, target audience, prerequisites) from the prompt — read the spec and curriculum files only if the prompt gives paths instead of their content
+2. Generate a complete .mlai file and write it to the specified output path
+3. Report that you have finished writing the file
 
 Focus exclusively on generating high-quality content. Do not attempt to validate the file yourself — validation is handled separately.
 """
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Process-wide rate limiting and retry policy for agent calls.
+
+Every agent invocation takes a slot from one ``RateLimiter``:
+
+* a requests-per-minute and a tokens-per-minute token bucket (each
+  optional). Tokens are reserved from an estimate of the prompt size and
+  corrected with the real usage once the call finishes, so the bucket may
+  go negative and make later calls wait;
+* an adaptive cap on concurrent calls (AIMD): it is halved whenever a call
+  is throttled and grows back by one per ``limit`` successful calls, up to
+  ``max_concurrency``, so throughput settles just under the point where
+  the API starts refusing;
+* a shared pause after throttling, so every caller backs off together
+  rather than each discovering the limit separately.
+
+``classify_error`` decides whether a failure is worth retrying, and
+``backoff_delay`` gives the jittered exponential wait before the retry.
+The primitives here create their futures per wait, so a limiter can
+outlive the event loop it was first used on.
+"""
+
+import asyncio
+import contextlib
+import random
+import time
+from collections import deque
+
+from config import AGENT_MAX_CONCURRENT_CALLS, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+import tracing
+
+THROTTLED = {"rate_limit", "overloaded"}
+"""Retry reasons that also mean "send less": they cut concurrency."""
+
+# Waits for a slot shorter than this are left out of traces
+TRACE_MIN_WAIT_S = 0.001
+
+# Substrings of exception text that mark a transient failure, by reason
+_TRANSIENT_MARKERS = (
+    ("rate_limit", ("rate limit", "rate_limit", "429", "too many requests")),
+    ("overloaded", ("overloaded", "529")),
+    ("server_error", ("500", "502", "503", "504", "internal server error", "service unavailable")),
+    ("connection", ("connection reset", "connection refused", "timed out", "timeout", "econnreset")),
+)
+
+
+def classify_error(exc: BaseException) -> str | None:
+    """The retry reason for an exception from an agent call, or None if it is permanent."""
+    if isinstance(exc, (asyncio.CancelledError, KeyboardInterrupt)):
+        return None
+    if isinstance(exc, (ConnectionError, asyncio.TimeoutError)):
+        return "connection"
+    text = f"{type(exc).__name__}: {exc}".lower()
+    for reason, markers in _TRANSIENT_MARKERS:
+        if any(marker in text for marker in markers):
+            return reason
+    return None
+
+
+def status_reason(status: int | None) -> str | None:
+    """The retry reason for an API error status, or None."""
+    if status == 429:
+        return "rate_limit"
+    if status == 529:
+        return "overloaded"
+    if status is not None and status >= 500:
+        return "server_error"
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Seconds to wait before retry number ``attempt`` (0-based).
+
+    Exponential from RETRY_BASE_DELAY, capped at RETRY_MAX_DELAY, with full
+    jitter so concurrent callers do not retry in lockstep. A server-given
+    ``retry_after`` is a floor.
+    """
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_MAX_DELAY))
+    return delay
+
+
+class TokenBucket:
+    """A bucket of ``per_minute`` units that refills continuously."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, amount: float) -> None:
+        """Wait until ``amount`` units are available, then take them."""
+        amount = min(amount, self.capacity)  # a single oversized call must not wait forever
+        while True:
+            self._refill()
+            if self.level >= amount:
+                self.level -= amount
+                return
+            await asyncio.sleep((amount - self.level) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Take ``amount`` more (or give back, if negative) without waiting."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _Permit:
+    """What the caller reports back about one call."""
+
+    def __init__(self, reserved: int) -> None:
+        self.reserved = reserved
+        self.used: int | None = None
+        self.throttled = False
+        self.retry_after: float | None = None
+
+    def settle(self, used_tokens: int, throttled: bool = False, retry_after: float | None = None) -> None:
+        self.used = used_tokens
+        self.throttled = throttled
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Shared admission control for agent calls.
+
+    Parameters
+    ----------
+    requests_per_minute, tokens_per_minute:
+        Bucket sizes; None leaves that dimension unlimited.
+    max_concurrency:
+        Upper bound for the adaptive concurrent-call cap.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int = AGENT_MAX_CONCURRENT_CALLS,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(max_concurrency, 1)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttle_events = 0
+        self.wait_s = 0.0
+        """Total time callers spent waiting for admission."""
+
+        self._waiters: deque[asyncio.Future] = deque()
+        self._resume_at = 0.0
+
+    async def _admit(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def _release_waiters(self) -> None:
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """Record a throttled call: halve the concurrency cap and pause everyone."""
+        self.throttle_events += 1
+        self.limit = max(1.0, self.limit / 2)
+        pause = retry_after if retry_after is not None else RETRY_BASE_DELAY
+        self._resume_at = max(self._resume_at, time.monotonic() + min(pause, RETRY_MAX_DELAY))
+
+    def succeeded(self) -> None:
+        """Record a successful call: grow the cap by one per ``limit`` successes."""
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0):
+        """Admit one call; the caller reports its outcome on the yielded permit."""
+        start = time.perf_counter()
+        if (pause := self._resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(pause)
+        await self._admit()
+        try:
+            if self.requests is not None:
+                await self.requests.take(1)
+            if self.tokens is not None:
+                await self.tokens.take(estimated_tokens)
+        except BaseException:
+            self.in_flight -= 1
+            self._release_waiters()
+            raise
+        waited = time.perf_counter() - start
+        self.wait_s += waited
+        if waited >= TRACE_MIN_WAIT_S:
+            tracing.complete("rate limiter", "wait", start, limit=round(self.limit, 2))
+
+        permit = _Permit(estimated_tokens)
+        try:
+            yield permit
+        finally:
+            self.in_flight -= 1
+            if self.tokens is not None and permit.used is not None:
+                self.tokens.adjust(permit.used - permit.reserved)
+            if permit.throttled:
+                self.throttled(permit.retry_after)
+            elif permit.used is not None:
+                self.succeeded()
+            self._release_waiters()
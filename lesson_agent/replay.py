@@ -0,0 +1,326 @@
+"""
+Recording and offline replay of agent runs.
+
+``Recorder`` wraps ``claude_agent_sdk.query`` and appends every call's
+message stream, with arrival times, to ``<dir>/<lesson_id>.jsonl``,
+together with the lesson's .mlai as it stood when the call ended.
+
+``Replayer`` is a drop-in ``query`` that plays recordings back with no
+network or API key. Messages arrive with their recorded spacing divided
+by ``speed`` (0 means no delay). Write, Edit and MultiEdit calls on the
+lesson's output file are applied as they stream, and when a call ends the
+file is set to its recorded state, which also covers changes the agent
+made through Bash.
+
+Calls are matched to recordings per lesson: by identical prompt first,
+then by the next unused recording of the same kind (agent session or
+tool-free one-shot), so a replay whose validation diverges from the
+recorded run still proceeds. Once a lesson's recordings are used up,
+further calls end with an error result and have no effect.
+
+Install either one with ``agent.use_query``. The lesson a call belongs
+to is taken from ``lesson_output``, which ``generate_lesson`` sets.
+``write_synthetic_recording`` builds a one-call recording that writes a
+finished lesson, for replaying an output tree that was never recorded
+(such as ``test_output``); ``synthetic_call`` builds one such call.
+"""
+
+import asyncio
+import contextvars
+import dataclasses
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import claude_agent_sdk
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from config import DEFAULT_MODEL
+from tiering import estimate_cost
+
+# Output file of the lesson being generated in the current task.
+lesson_output: contextvars.ContextVar[Path | None] = contextvars.ContextVar(
+    "lesson_output", default=None
+)
+
+OUTPUT_PLACEHOLDER = "$OUTPUT"
+"""Stands in for the lesson's output path in recordings, so they replay into any tree."""
+
+UNSCOPED = "_unscoped"
+"""Recording name for calls made outside ``generate_lesson``."""
+
+
+def _call_kind(options) -> str:
+    """``agent`` for tool-using sessions, ``oneshot`` for tool-free calls."""
+    return "oneshot" if options is not None and not options.allowed_tools else "agent"
+
+
+def _prompt_sha(prompt) -> str | None:
+    if not isinstance(prompt, str):
+        return None
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode(value, output: str | None):
+    """SDK messages as JSON-safe data, with the output path replaced by a placeholder."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            "_type": type(value).__name__,
+            **{f.name: _encode(getattr(value, f.name), output) for f in dataclasses.fields(value)},
+        }
+    if isinstance(value, dict):
+        return {str(k): _encode(v, output) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v, output) for v in value]
+    if isinstance(value, str):
+        return value.replace(output, OUTPUT_PLACEHOLDER) if output else value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return repr(value)
+
+
+def _decode(value, output: str | None):
+    """Inverse of ``_encode``; fields the installed SDK does not know are dropped."""
+    if isinstance(value, dict):
+        decoded = {k: _decode(v, output) for k, v in value.items() if k != "_type"}
+        cls = getattr(claude_agent_sdk, value.get("_type", ""), None)
+        if cls is None or not dataclasses.is_dataclass(cls):
+            return decoded
+        known = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in decoded.items() if k in known})
+    if isinstance(value, list):
+        return [_decode(v, output) for v in value]
+    if isinstance(value, str) and output:
+        return value.replace(OUTPUT_PLACEHOLDER, output)
+    return value
+
+
+def _read_output(output: Path | None) -> str | None:
+    if output is None:
+        return None
+    try:
+        return output.read_text(encoding="utf-8")
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+
+
+class Recorder:
+    """A ``query`` stand-in that records every call made through it.
+
+    Each lesson's recording is started afresh the first time this
+    recorder sees the lesson, then appended to call by call. A call that
+    is abandoned part-way (a budget timeout) is saved with what arrived.
+    """
+
+    def __init__(self, directory: str | Path, query=claude_agent_sdk.query) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._query = query
+        self._started: set[str] = set()
+
+    async def __call__(self, *, prompt, options=None, **kwargs):
+        output = lesson_output.get()
+        out = str(output) if output else None
+        start = time.perf_counter()
+        messages: list[dict] = []
+        complete = False
+        try:
+            async for message in self._query(prompt=prompt, options=options, **kwargs):
+                messages.append({
+                    "t": round(time.perf_counter() - start, 4),
+                    "message": _encode(message, out),
+                })
+                yield message
+            complete = True
+        finally:
+            self._save(output, {
+                "kind": _call_kind(options),
+                "prompt_sha": _prompt_sha(prompt),
+                "model": getattr(options, "model", None),
+                "complete": complete,
+                "messages": messages,
+                "output_after": _encode(_read_output(output), out),
+            })
+
+    def _save(self, output: Path | None, record: dict) -> None:
+        name = output.stem if output else UNSCOPED
+        mode = "a" if name in self._started else "w"
+        self._started.add(name)
+        with open(self.directory / f"{name}.jsonl", mode, encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class Replayer:
+    """A ``query`` stand-in that plays back recordings from ``Recorder``.
+
+    Parameters
+    ----------
+    directory:
+        Directory of ``<lesson_id>.jsonl`` recordings.
+    speed:
+        Playback speed relative to the recording; ``0`` plays every call
+        back without delay.
+    """
+
+    def __init__(self, directory: str | Path, speed: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.speed = speed
+        self.calls = 0
+        self.misses = 0
+        """Calls that found no recording left for their lesson."""
+
+        self._recordings: dict[str, list[dict]] = {}
+        self._used: dict[str, set[int]] = {}
+
+    def _load(self, name: str) -> list[dict]:
+        if name not in self._recordings:
+            path = self.directory / f"{name}.jsonl"
+            records = []
+            if path.exists():
+                with open(path, encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+            self._recordings[name] = records
+            self._used[name] = set()
+        return self._recordings[name]
+
+    def _claim(self, name: str, kind: str, prompt_sha: str | None) -> dict | None:
+        """The recording for this call: same prompt first, else next unused of its kind."""
+        records, used = self._load(name), self._used[name]
+        candidates = [i for i, r in enumerate(records) if i not in used and r.get("kind", "agent") == kind]
+        exact = [i for i in candidates if prompt_sha and records[i].get("prompt_sha") == prompt_sha]
+        chosen = (exact or candidates or [None])[0]
+        if chosen is None:
+            return None
+        used.add(chosen)
+        return records[chosen]
+
+    async def __call__(self, *, prompt, options=None, **kwargs):
+        output = lesson_output.get()
+        out = str(output) if output else None
+        self.calls += 1
+        record = self._claim(output.stem if output else UNSCOPED, _call_kind(options), _prompt_sha(prompt))
+
+        if record is None:
+            self.misses += 1
+            yield ResultMessage(
+                subtype="error_during_execution",
+                duration_ms=0,
+                duration_api_ms=0,
+                is_error=True,
+                num_turns=0,
+                session_id="replay",
+                total_cost_usd=0.0,
+                usage={},
+            )
+            return
+
+        elapsed = 0.0
+        for entry in record["messages"]:
+            if self.speed > 0 and entry["t"] > elapsed:
+                await asyncio.sleep((entry["t"] - elapsed) / self.speed)
+            elapsed = max(elapsed, entry["t"])
+            message = _decode(entry["message"], out)
+            if isinstance(message, AssistantMessage) and output is not None:
+                for block in message.content:
+                    if isinstance(block, ToolUseBlock):
+                        _apply_tool(block, output)
+            yield message
+
+        after = _decode(record.get("output_after"), out)
+        if output is not None and after is not None and _read_output(output) != after:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(after, encoding="utf-8")
+
+
+def _apply_tool(block: ToolUseBlock, output: Path) -> None:
+    """Apply a recorded Write/Edit/MultiEdit to the output file; other tools are skipped."""
+    args = block.input or {}
+    if Path(args.get("file_path", "")) != output:
+        return
+    if block.name == "Write":
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(args.get("content", ""), encoding="utf-8")
+        return
+
+    edits = args.get("edits", []) if block.name == "MultiEdit" else [args] if block.name == "Edit" else []
+    text = _read_output(output)
+    if not edits or text is None:
+        return
+    for edit in edits:
+        old, new = edit.get("old_string", ""), edit.get("new_string", "")
+        if old and old in text:
+            text = text.replace(old, new) if edit.get("replace_all") else text.replace(old, new, 1)
+    output.write_text(text, encoding="utf-8")
+
+
+def synthetic_call(
+    mlai_text: str,
+    seconds: float = 60.0,
+    model: str = DEFAULT_MODEL,
+    session_id: str = "replay",
+    usage: dict | None = None,
+) -> dict:
+    """A recorded agent call that writes ``mlai_text`` as the lesson.
+
+    The call takes ``seconds`` (at speed 1), runs in session ``session_id``
+    and reports ``usage``, by default the cost of its output on ``model``
+    with tokens estimated as characters / 4.
+    """
+    usage = usage or {"input_tokens": 0, "output_tokens": len(mlai_text) // 4}
+    timeline = [
+        (0.0, SystemMessage(subtype="init", data={"session_id": session_id})),
+        (seconds * 0.95, AssistantMessage(
+            content=[
+                TextBlock(text="Writing the lesson."),
+                ToolUseBlock(
+                    id="toolu_replay_write",
+                    name="Write",
+                    input={"file_path": OUTPUT_PLACEHOLDER, "content": mlai_text},
+                ),
+            ],
+            model=model,
+        )),
+        (seconds * 0.97, UserMessage(content=[ToolResultBlock(tool_use_id="toolu_replay_write", content="ok")])),
+        (seconds, ResultMessage(
+            subtype="success",
+            duration_ms=int(seconds * 1000),
+            duration_api_ms=int(seconds * 1000),
+            is_error=False,
+            num_turns=2,
+            session_id=session_id,
+            total_cost_usd=estimate_cost(model, usage) or 0.0,
+            usage=usage,
+        )),
+    ]
+    return {
+        "kind": "agent",
+        "prompt_sha": None,
+        "model": model,
+        "complete": True,
+        "messages": [{"t": round(t, 4), "message": _encode(m, None)} for t, m in timeline],
+        "output_after": mlai_text,
+    }
+
+
+def write_synthetic_recording(
+    directory: str | Path,
+    lesson_id: str,
+    mlai_text: str,
+    seconds: float = 60.0,
+    model: str = DEFAULT_MODEL,
+) -> Path:
+    """Record a single generation call that writes ``mlai_text`` as the lesson (see synthetic_call)."""
+    record = synthetic_call(mlai_text, seconds, model, session_id=f"replay-{lesson_id}")
+    path = Path(directory) / f"{lesson_id}.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
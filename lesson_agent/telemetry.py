@@ -0,0 +1,299 @@
+"""
+Structured per-lesson telemetry.
+
+Every agent invocation, validation and auto-fix pass is written as one JSON
+line to a metrics file, tagged with the run, lesson, module and phase:
+
+    {"run_id": "...", "lesson_id": "lesson_01_01", "module_id": "module_01",
+     "phase": "fix", "attempt": 2, "wall_s": 41.2, "cost_usd": 0.31,
+     "input_tokens": 18234, "output_tokens": 2210, "num_turns": 4,
+     "tool_calls": {"Read": 1, "Edit": 3}}
+
+Phases: ``generation`` (and ``generation_part`` under fan-out), ``fix``,
+``component_repair``, ``validation``, ``autofix``, ``escalation``,
+``hedge``, ``cache_hit`` and a final ``lesson`` summary per lesson.
+``summarize_metrics`` aggregates a file into latency percentiles, cost per
+lesson, attempts-to-pass per module and the savings of model tiering
+(``main.py report``).
+"""
+
+import json
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+class Telemetry:
+    """Appends metric records to a JSONL file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, **fields) -> None:
+        entry = {"run_id": self.run_id, "ts": round(time.time(), 3), **fields}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """The ``pct``-th percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def load_metrics(path: Path, run_id: str | None = None) -> list[dict]:
+    """Read metric records, optionally only those from one run."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if run_id is None or entry.get("run_id") == run_id:
+                records.append(entry)
+    return records
+
+
+def summarize_metrics(records: list[dict]) -> dict:
+    """Aggregate metric records into a report dict."""
+    lessons = [r for r in records if r.get("phase") == "lesson"]
+    by_phase: dict[str, list[float]] = defaultdict(list)
+    for r in records:
+        if r.get("phase") not in ("lesson", None) and "wall_s" in r:
+            by_phase[r["phase"]].append(r["wall_s"])
+
+    def latency(samples: list[float]) -> dict:
+        if not samples:
+            return {"n": 0}
+        return {
+            "n": len(samples),
+            "p50_s": round(percentile(samples, 50), 3),
+            "p95_s": round(percentile(samples, 95), 3),
+            "total_s": round(sum(samples), 3),
+        }
+
+    modules: dict[str, dict] = defaultdict(lambda: {"lessons": 0, "passed": 0, "attempts": []})
+    for r in lessons:
+        module = modules[r.get("module_id") or "?"]
+        module["lessons"] += 1
+        if r.get("success"):
+            module["passed"] += 1
+            module["attempts"].append(r.get("attempts", 0))
+
+    costs = [r.get("cost_usd", 0.0) for r in lessons]
+    return {
+        "runs": sorted({r["run_id"] for r in records if "run_id" in r}),
+        "lessons": len(lessons),
+        "passed": sum(1 for r in lessons if r.get("success")),
+        "lesson_latency": latency([r["wall_s"] for r in lessons]),
+        "phase_latency": {phase: latency(samples) for phase, samples in sorted(by_phase.items())},
+        "cost_usd": {
+            "total": round(sum(costs), 4),
+            "per_lesson_mean": round(statistics.mean(costs), 4) if costs else 0.0,
+            "per_lesson_p95": round(percentile(costs, 95), 4) if costs else 0.0,
+        },
+        "attempts_to_pass": {
+            module_id: {
+                "lessons": m["lessons"],
+                "passed": m["passed"],
+                "mean": round(statistics.mean(m["attempts"]), 2) if m["attempts"] else None,
+                "max": max(m["attempts"]) if m["attempts"] else None,
+            }
+            for module_id, m in sorted(modules.items())
+        },
+        "model_tiering": _summarize_tiering(records, lessons),
+        "hedging": {
+            "started": sum(1 for r in records if r.get("phase") == "hedge"),
+            "won": sum(1 for r in records if r.get("phase") == "hedge" and r.get("outcome") == "won"),
+            "extra_cost_usd": round(sum(r.get("cost_usd", 0.0) for r in records if r.get("phase") == "hedge"), 4),
+        },
+        "fix_sessions": _summarize_fix_sessions(records),
+        "agent_retries": {
+            "calls_retried": sum(1 for r in records if r.get("retries")),
+            "retries": sum(r.get("retries", 0) for r in records),
+            "throttled": sum(r.get("throttled", 0) for r in records),
+        },
+        "generation_modes": {
+            mode: {
+                "generation": latency([
+                    r["wall_s"] for r in records
+                    if r.get("phase") == "generation" and r.get("mode", "single") == mode
+                ]),
+                "lesson": latency([r["wall_s"] for r in lessons if r.get("generation_mode") == mode]),
+            }
+            for mode in sorted({r["generation_mode"] for r in lessons if r.get("generation_mode")} - {"resumed"})
+        },
+    }
+
+
+def _summarize_fix_sessions(records: list[dict]) -> dict:
+    """Fix turn latency in resumed sessions vs. fresh ones (mostly rotations)."""
+    fixes = [r for r in records if r.get("phase") == "fix" and "wall_s" in r]
+
+    def stats(group: list[dict]) -> dict:
+        if not group:
+            return {"n": 0}
+        walls = [r["wall_s"] for r in group]
+        return {
+            "n": len(group),
+            "p50_s": round(percentile(walls, 50), 3),
+            "p95_s": round(percentile(walls, 95), 3),
+            "mean_cost_usd": round(statistics.mean(r.get("cost_usd", 0.0) for r in group), 4),
+            "mean_context_tokens": round(statistics.mean(r.get("session_tokens", 0) for r in group)),
+        }
+
+    return {
+        "rotations": sum(1 for r in fixes if r.get("rotated")),
+        "resumed": stats([r for r in fixes if not r.get("fresh_session")]),
+        "fresh": stats([r for r in fixes if r.get("fresh_session")]),
+    }
+
+
+def _summarize_tiering(records: list[dict], lessons: list[dict]) -> dict:
+    """Fix work per model, and what running it below the flagship saved.
+
+    Latency saved by a run on a cheaper model is estimated as the flagship's
+    p50 for the same phase minus the run's wall time, so it is only known
+    once the metrics contain some flagship fix work to compare against.
+    """
+    flagship = {r["lesson_id"]: r.get("model") for r in lessons if "lesson_id" in r}
+    work = [r for r in records if r.get("phase") in ("fix", "component_repair") and "wall_s" in r]
+
+    walls: dict[tuple[str, str], list[float]] = defaultdict(list)
+    by_model: dict[str, dict] = defaultdict(lambda: {"n": 0, "walls": [], "cost_usd": 0.0})
+    for r in work:
+        walls[(r["phase"], r.get("model"))].append(r["wall_s"])
+        stats = by_model[r.get("model") or "?"]
+        stats["n"] += 1
+        stats["walls"].append(r["wall_s"])
+        stats["cost_usd"] += r.get("cost_usd", 0.0)
+
+    latency_saved, latency_known = 0.0, False
+    for r in work:
+        if "flagship_cost_usd" not in r:
+            continue
+        reference = walls.get((r["phase"], flagship.get(r.get("lesson_id"))))
+        if reference:
+            latency_known = True
+            latency_saved += max(0.0, percentile(reference, 50) - r["wall_s"])
+
+    cost_saved = sum(r.get("cost_saved_usd", 0.0) for r in lessons)
+    count = max(len(lessons), 1)
+    return {
+        "fix_models": {
+            model: {
+                "n": stats["n"],
+                "p50_s": round(percentile(stats["walls"], 50), 3),
+                "cost_usd": round(stats["cost_usd"], 4),
+            }
+            for model, stats in sorted(by_model.items())
+        },
+        "cost_saved_usd": {"total": round(cost_saved, 4), "per_lesson_mean": round(cost_saved / count, 4)},
+        "latency_saved_s": {
+            "total": round(latency_saved, 3),
+            "per_lesson_mean": round(latency_saved / count, 3),
+        } if latency_known else None,
+    }
+
+
+def format_report(summary: dict) -> str:
+    """Render a summary from ``summarize_metrics`` for the terminal."""
+    lines = [
+        f"Runs: {', '.join(summary['runs']) or '-'}",
+        f"Lessons: {summary['passed']}/{summary['lessons']} passed",
+        "",
+        "Latency (seconds)",
+    ]
+    rows = [("lesson", summary["lesson_latency"]), *summary["phase_latency"].items()]
+    for name, stats in rows:
+        if stats["n"]:
+            lines.append(
+                f"  {name:<12} n={stats['n']:<5} p50={stats['p50_s']:>9.2f}  "
+                f"p95={stats['p95_s']:>9.2f}  total={stats['total_s']:>10.2f}"
+            )
+
+    cost = summary["cost_usd"]
+    lines += [
+        "",
+        f"Cost: ${cost['total']:.4f} total, ${cost['per_lesson_mean']:.4f} mean/lesson, "
+        f"${cost['per_lesson_p95']:.4f} p95/lesson",
+        "",
+        "Attempts to pass",
+    ]
+    for module_id, stats in summary["attempts_to_pass"].items():
+        mean = "-" if stats["mean"] is None else f"{stats['mean']:.2f}"
+        worst = "-" if stats["max"] is None else stats["max"]
+        lines.append(
+            f"  {module_id:<12} passed {stats['passed']}/{stats['lessons']}  "
+            f"mean={mean}  max={worst}"
+        )
+
+    hedging = summary["hedging"]
+    if hedging["started"]:
+        lines += ["", f"Hedged generations: {hedging['started']} started, {hedging['won']} won, "
+                      f"${hedging['extra_cost_usd']:.4f} extra"]
+
+    retries = summary["agent_retries"]
+    if retries["retries"]:
+        lines += ["", f"Agent retries: {retries['retries']} over {retries['calls_retried']} calls, "
+                      f"{retries['throttled']} throttled"]
+
+    sessions = summary["fix_sessions"]
+    if sessions["rotations"]:
+        lines += ["", f"Fix turns by session ({sessions['rotations']} rotated to a fresh session)"]
+        for name in ("resumed", "fresh"):
+            stats = sessions[name]
+            if stats["n"]:
+                lines.append(
+                    f"  {name:<12} n={stats['n']:<5} p50={stats['p50_s']:>9.2f}  p95={stats['p95_s']:>9.2f}  "
+                    f"cost=${stats['mean_cost_usd']:.4f}/turn  context~{stats['mean_context_tokens']:,}"
+                )
+
+    modes = summary["generation_modes"]
+    if len(modes) > 1 or "fanout" in modes:
+        lines += ["", "Generation mode (p50 seconds)"]
+        for mode, stats in modes.items():
+            generation = stats["generation"].get("p50_s", float("nan"))
+            lesson = stats["lesson"].get("p50_s", float("nan"))
+            lines.append(f"  {mode:<12} n={stats['lesson']['n']:<5} generation={generation:>9.2f}  "
+                         f"lesson={lesson:>9.2f}")
+
+    tiering = summary["model_tiering"]
+    if tiering["fix_models"]:
+        lines += ["", "Fix models"]
+        for model, stats in tiering["fix_models"].items():
+            lines.append(
+                f"  {model:<20} n={stats['n']:<5} p50={stats['p50_s']:>9.2f}  cost=${stats['cost_usd']:.4f}"
+            )
+        saved = tiering["cost_saved_usd"]
+        lines.append(f"  Est. cost saved vs flagship: ${saved['total']:.4f} total, "
+                     f"${saved['per_lesson_mean']:.4f} mean/lesson")
+        latency = tiering["latency_saved_s"]
+        if latency is None:
+            lines.append("  Est. latency saved: n/a (no flagship fix runs to compare against)")
+        else:
+            lines.append(f"  Est. latency saved: {latency['total']:.2f}s total, "
+                         f"{latency['per_lesson_mean']:.2f}s mean/lesson")
+    return "\n".join(lines)
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+import api
+from api import JobManager, serve_api
+
+INPUT = "test_curriculum/module_01/lesson_01_01.md"
+
+
+@pytest.mark.parametrize("job_id", [5, [1], "", "a/b"])
+def test_submit_rejects_unusable_ids(job_id):
+    manager = JobManager()
+    with pytest.raises(ValueError, match='"id"'):
+        manager.submit({"id": job_id, "input": INPUT})
+    assert manager.jobs == {}
+
+
+async def _request(port: int, method: str, path: str, body: bytes = b"") -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_handler_answers_bad_ids_and_unexpected_errors(monkeypatch, capsys):
+    async def scenario():
+        port = _free_port()
+        server = asyncio.create_task(serve_api(JobManager(), "127.0.0.1", port))
+        await asyncio.sleep(0.1)
+        try:
+            status, body = await _request(port, "POST", "/jobs", json.dumps({"id": [1], "input": INPUT}).encode())
+            assert status == 400 and '"id"' in body["error"]
+
+            async def broken(*args):
+                raise RuntimeError("boom")
+
+            monkeypatch.setattr(api, "_route", broken)
+            status, body = await _request(port, "GET", "/jobs")
+            assert status == 500 and "boom" in body["error"]
+        finally:
+            server.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await server
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+import pytest
+
+import autofix
+from autofix import autofix_mlai_file
+from prevalidator import PrecheckIssue
+
+ORIGINAL = "<Lesson>original</Lesson>\n"
+FIXED = "<Lesson>fixed</Lesson>\n"
+
+
+def _issues(*codes: str) -> list[PrecheckIssue]:
+    return [PrecheckIssue(code=code, message=code) for code in codes]
+
+
+@pytest.fixture
+def lesson(tmp_path, monkeypatch):
+    monkeypatch.setattr(autofix, "autofix_text", lambda text: (FIXED, ["rewrote something"]))
+    path = tmp_path / "lesson.mlai"
+    path.write_text(ORIGINAL, encoding="utf-8")
+    return path
+
+
+def _check(before: list[PrecheckIssue], after: list[PrecheckIssue]):
+    return lambda text: before if text == ORIGINAL else after
+
+
+def test_rewrite_that_raises_an_existing_code_is_rejected(lesson, monkeypatch):
+    # Fewer issues overall and no new code, but more UNESCAPED_LT than before
+    before = _issues("UNESCAPED_LT", "BAD_ID", "BAD_ID")
+    monkeypatch.setattr(autofix, "check_mlai_text", _check(before, _issues("UNESCAPED_LT", "UNESCAPED_LT")))
+
+    result = autofix_mlai_file(lesson)
+
+    assert result.fixes == [] and result.issues_after == result.issues_before == 3
+    assert lesson.read_text(encoding="utf-8") == ORIGINAL
+
+
+def test_rewrite_that_lowers_every_code_is_kept(lesson, monkeypatch):
+    before = _issues("UNESCAPED_LT", "BAD_ID", "BAD_ID")
+    monkeypatch.setattr(autofix, "check_mlai_text", _check(before, _issues("UNESCAPED_LT")))
+
+    result = autofix_mlai_file(lesson)
+
+    assert result.fixes == ["rewrote something"] and (result.issues_before, result.issues_after) == (3, 1)
+    assert lesson.read_text(encoding="utf-8") == FIXED
@@ -0,0 +1,62 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from bundle import split_lesson
+from config import PROJECT_ROOT
+
+LESSON = PROJECT_ROOT / "test_output" / "module_09" / "lesson_09_01.mlai"
+
+
+@pytest.fixture(scope="module")
+def source() -> str:
+    return LESSON.read_text(encoding="utf-8")
+
+
+def _find(node: list, tag: str, id_: str | None = None) -> list:
+    name, attrs, children = node
+    if name == tag and (id_ is None or attrs.get("id") == id_):
+        return node
+    for child in children:
+        if isinstance(child, list) and (found := _find(child, tag, id_)):
+            return found
+    return []
+
+
+def _texts(node: list) -> list[str]:
+    return ["".join(c for c in child[2] if isinstance(c, str)) for child in node[2] if isinstance(child, list)]
+
+
+def _source(source: str, tag: str, id_: str) -> ET.Element:
+    return next(e for e in ET.fromstring(source) if e.tag == tag and e.get("id") == id_)
+
+
+def test_sort_quiz_content_is_shuffled_and_key_restores_order(source):
+    expected = ["".join(item.itertext()) for item in _source(source, "SortQuiz", "q4").iter("Item")]
+    content, key = split_lesson(source)
+    shown = _texts(_find(_find(content, "SortQuiz", "q4"), "SortedItems"))
+
+    assert sorted(shown) == sorted(expected)
+    assert shown != expected
+    assert key["q4"]["order"] != list(range(len(expected)))
+    assert [shown[position] for position in key["q4"]["order"]] == expected
+
+
+def test_match_pairs_content_does_not_reveal_pairing(source):
+    element = _source(source, "MatchPairs", "q5")
+    pairs = {pair.findtext("Left"): pair.findtext("Right") for pair in element.iter("Pair")}
+    distractors = [d.text for d in element.iter("Distractor")]
+    content, key = split_lesson(source)
+    match = _find(content, "MatchPairs", "q5")
+    lefts, rights = _texts(_find(match, "Lefts")), _texts(_find(match, "Rights"))
+
+    # Distractors are shown among the rights, not apart from them
+    assert not _find(match, "RightDistractors")
+    assert sorted(rights) == sorted([*pairs.values(), *distractors])
+    assert rights[: len(lefts)] != [pairs[left] for left in lefts]
+    assert {lefts[left]: rights[right] for left, right in key["q5"]["pairs"]} == pairs
+
+
+def test_shuffle_differs_between_compiles(source):
+    orders = {tuple(_texts(_find(_find(split_lesson(source)[0], "MatchPairs", "q5"), "Rights"))) for _ in range(20)}
+    assert len(orders) > 1
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+import journal
+from journal import FAILED, GENERATING, SUCCEEDED, ProgressJournal, load_journal
+
+
+def test_record_does_not_wait_for_fsync(tmp_path, monkeypatch):
+    synced = threading.Event()
+
+    def slow_fsync(fd):
+        time.sleep(0.2)
+        synced.set()
+
+    monkeypatch.setattr(journal.os, "fsync", slow_fsync)
+    progress = ProgressJournal(tmp_path / "journal.jsonl", fresh=True)
+
+    async def scenario() -> tuple[float, int]:
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        for n in range(5):
+            progress.record(f"lesson_{n}", GENERATING)
+        blocked = time.perf_counter() - start
+        await asyncio.sleep(0.3)
+        task.cancel()
+        return blocked, ticks
+
+    blocked, ticks = asyncio.run(scenario())
+    assert blocked < 0.05
+    assert ticks >= 10  # the loop kept running while the fsync slept
+    assert synced.is_set()
+
+    progress.record("lesson_0", SUCCEEDED)
+    progress.record("lesson_1", FAILED, stop_reason="error")
+    progress.close()
+    states = load_journal(tmp_path / "journal.jsonl")
+    assert [states[f"lesson_{n}"]["state"] for n in range(5)] == [SUCCEEDED, FAILED, *[GENERATING] * 3]
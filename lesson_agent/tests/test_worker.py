@@ -0,0 +1,16 @@
+import re
+
+from worker import _safe_id
+
+
+def test_safe_id_is_distinct_for_distinct_ids():
+    long = "x" * 200
+    ids = ["a/b", "a_b", "a b", long, long + "y", long + "z"]
+    stems = [_safe_id(job_id) for job_id in ids]
+    assert len(set(stems)) == len(ids)
+    assert all(re.fullmatch(r"[A-Za-z0-9._-]{1,113}", stem) for stem in stems)
+
+
+def test_safe_id_is_stable_and_readable():
+    assert _safe_id("intro-1") == _safe_id("intro-1")
+    assert _safe_id("intro-1").startswith("intro-1-")
@@ -0,0 +1,61 @@
+"""
+Model tiering for the fix loop.
+
+Generation uses the flagship model, but most validation fixes are
+mechanical. Fixes start on the first (cheapest, fastest) model of a
+``ModelLadder`` and move up a rung each time the loop stops converging,
+ending at the flagship.
+
+``estimate_cost`` prices a run's token usage for any model in
+``MODEL_PRICES``. The orchestrator uses it to record, for every fix run on a
+cheaper rung, what the same tokens would have cost on the flagship. That
+flagship price is an estimate: a stronger model might have needed fewer
+turns.
+"""
+
+from config import MODEL_PRICES
+
+# Multipliers on the input price for prompt-cache reads and writes
+_CACHE_READ = 0.1
+_CACHE_WRITE = 1.25
+
+
+def estimate_cost(model: str, usage: dict[str, int]) -> float | None:
+    """USD cost of ``usage`` on ``model``, or None if its price is unknown."""
+    if model not in MODEL_PRICES:
+        return None
+    input_price, output_price = MODEL_PRICES[model]
+    per_token = (
+        usage.get("input_tokens", 0) * input_price
+        + usage.get("output_tokens", 0) * output_price
+        + usage.get("cache_read_input_tokens", 0) * input_price * _CACHE_READ
+        + usage.get("cache_creation_input_tokens", 0) * input_price * _CACHE_WRITE
+    )
+    return per_token / 1_000_000
+
+
+class ModelLadder:
+    """Fix models from cheapest to the flagship, with the current rung."""
+
+    def __init__(self, models: list[str], flagship: str) -> None:
+        self.models = [m for m in dict.fromkeys(models) if m != flagship] + [flagship]
+        self.rung = 0
+
+    @property
+    def current(self) -> str:
+        return self.models[self.rung]
+
+    @property
+    def flagship(self) -> str:
+        return self.models[-1]
+
+    @property
+    def at_top(self) -> bool:
+        return self.rung == len(self.models) - 1
+
+    def escalate(self) -> bool:
+        """Move up one rung; False if already on the flagship."""
+        if self.at_top:
+            return False
+        self.rung += 1
+        return True
@@ -0,0 +1,205 @@
+"""
+Timeline traces of a run, in Chrome's trace-event format.
+
+``main.py --trace out.json`` records where the time of a run goes, as
+spans on a timeline:
+
+    phase      generation, validation, autofix, component repair, fix, lesson
+    agent      one agent call (``_run_agent``), with a ``tool`` span from each
+               tool use streamed in an AssistantMessage to its result
+    validator  the in-process pre-validator and the node validator
+    wait       queued for a batch slot, for prerequisites, or for the rate limiter
+
+The file loads in chrome://tracing or https://ui.perfetto.dev. Each lesson
+is a process row, named after the lesson (a hedged run gets its own row).
+When tasks of one lesson overlap, as fan-out parts or component repairs
+do, each gets its own thread row inside it, so spans always nest.
+
+Tracing is off unless a ``Tracer`` is active. With none active, ``span``
+hands back one shared no-op context manager and the other helpers return
+at once, so instrumented code pays a global lookup per call.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# The track (process row) spans of the current task are drawn on
+_track: contextvars.ContextVar[str | None] = contextvars.ContextVar("_trace_track", default=None)
+
+# The tracer currently recording, if any.
+_active: "Tracer | None" = None
+
+_MAIN_TRACK = "main"
+
+
+class _Discard(dict):
+    """Span args of a span nobody records."""
+
+    def __setitem__(self, key, value) -> None:
+        pass
+
+    def update(self, *args, **kwargs) -> None:
+        pass
+
+
+_NOOP = contextlib.nullcontext(_Discard())
+
+
+def _owner():
+    """What a lane belongs to: the running task, or the thread outside one."""
+    try:
+        return asyncio.current_task() or threading.get_ident()
+    except RuntimeError:
+        return threading.get_ident()
+
+
+class Tracer:
+    """Collects trace events; written to ``path`` when the ``with`` block exits."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.events: list[dict] = []
+        self._origin = time.perf_counter()
+        self._pids: dict[str, int] = {}
+        # track -> lanes, each [owner, open spans]
+        self._lanes: dict[str, list[list]] = {}
+        self._previous: Tracer | None = None
+
+    def __enter__(self) -> "Tracer":
+        global _active
+        self._previous, _active = _active, self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _active
+        _active = self._previous
+        self.write()
+
+    def _us(self, at: float) -> float:
+        return round((at - self._origin) * 1e6, 1)
+
+    def _pid(self, track: str) -> int:
+        pid = self._pids.get(track)
+        if pid is None:
+            pid = self._pids[track] = len(self._pids) + 1
+            self.events += [
+                {"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": track}},
+                {"ph": "M", "name": "process_sort_index", "pid": pid, "tid": 0, "args": {"sort_index": pid}},
+            ]
+        return pid
+
+    def acquire(self, track: str) -> tuple[int, int]:
+        """(pid, tid) for a span starting now in the current task.
+
+        A task keeps its lane while it has spans open there; a task that
+        starts while another holds the lane gets the next free one.
+        """
+        owner = _owner()
+        pid = self._pid(track)
+        lanes = self._lanes.setdefault(track, [])
+        for tid, lane in enumerate(lanes):
+            if lane[0] is owner:
+                lane[1] += 1
+                return pid, tid
+        for tid, lane in enumerate(lanes):
+            if not lane[1]:
+                lane[:] = [owner, 1]
+                return pid, tid
+        lanes.append([owner, 1])
+        tid = len(lanes) - 1
+        name = track if not tid else f"{track} [{tid + 1}]"
+        self.events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}})
+        return pid, tid
+
+    def release(self, track: str, tid: int) -> None:
+        lane = self._lanes[track][tid]
+        lane[1] -= 1
+        if not lane[1]:
+            lane[0] = None
+
+    def complete(self, name: str, cat: str, start: float, end: float, pid: int, tid: int, args: dict) -> None:
+        self.events.append({
+            "ph": "X", "name": name, "cat": cat, "pid": pid, "tid": tid,
+            "ts": self._us(start), "dur": self._us(end) - self._us(start), "args": args,
+        })
+
+    def instant(self, name: str, cat: str, at: float, pid: int, tid: int, args: dict) -> None:
+        self.events.append({
+            "ph": "i", "s": "t", "name": name, "cat": cat, "pid": pid, "tid": tid,
+            "ts": self._us(at), "args": args,
+        })
+
+    def write(self) -> None:
+        """Atomically write the trace file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def current_track() -> str | None:
+    return _track.get()
+
+
+def set_track(name: str) -> contextvars.Token | None:
+    """Draw the current task's spans on track ``name``; a token for ``reset_track``."""
+    if _active is None:
+        return None
+    return _track.set(name)
+
+
+def reset_track(token: contextvars.Token | None) -> None:
+    if token is not None:
+        _track.reset(token)
+
+
+@contextlib.contextmanager
+def _span(tracer: Tracer, name: str, cat: str, args: dict):
+    track = _track.get() or _MAIN_TRACK
+    pid, tid = tracer.acquire(track)
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        tracer.complete(name, cat, start, time.perf_counter(), pid, tid, args)
+        tracer.release(track, tid)
+
+
+def span(name: str, cat: str, **args):
+    """Context manager recording a span; yields its args dict to add results to."""
+    if _active is None:
+        return _NOOP
+    return _span(_active, name, cat, args)
+
+
+def complete(name: str, cat: str, start: float, **args) -> None:
+    """Record a span from ``start`` (a ``time.perf_counter()`` reading) to now."""
+    tracer = _active
+    if tracer is None:
+        return
+    track = _track.get() or _MAIN_TRACK
+    pid, tid = tracer.acquire(track)
+    tracer.complete(name, cat, start, time.perf_counter(), pid, tid, args)
+    tracer.release(track, tid)
+
+
+def instant(name: str, cat: str, **args) -> None:
+    """Record a point event, such as a tool use."""
+    tracer = _active
+    if tracer is None:
+        return
+    track = _track.get() or _MAIN_TRACK
+    pid, tid = tracer.acquire(track)
+    tracer.instant(name, cat, time.perf_counter(), pid, tid, args)
+    tracer.release(track, tid)
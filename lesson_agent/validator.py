@@ -3,13 +3,29 @@ External MLAI validator.
 
 Runs the vibely-v2-parser CLI via subprocess and parses results.
 This is the mechanically enforced validation — the agent cannot skip it.
+
+``validate_mlai_file_async`` is the variant used by the orchestration
+loop: it runs node as an asyncio subprocess so other lessons keep making
+progress while one is being validated. Inside an ``async with
+ValidatorPool(...)`` block it is served by long-lived node workers
+(``validator_daemon.mjs``) instead of a fresh process per call, falling
+back to the one-shot CLI whenever no worker is available.
 """
 
+import asyncio
+import json
 import subprocess
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from config import VALIDATOR_CLI
+from config import (
+    VALIDATOR_CLI,
+    VALIDATOR_DAEMON,
+    VALIDATOR_TIMEOUT,
+    VALIDATOR_STARTUP_TIMEOUT,
+)
+from diagnostics import Diagnostic, parse_diagnostics
+import tracing
 
 
 @dataclass
@@ -25,25 +41,23 @@ class ValidationResult:
     error_count: int
     """Number of errors detected."""
 
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+    """Parsed, deduplicated problems (empty if the output had none to parse)."""
 
-def validate_mlai_file(file_path: Path) -> ValidationResult:
-    """Run the MLAI validator CLI against a file.
+    validator_error: bool = False
+    """True if the validator itself could not run or finish (not installed,
+    timed out, crashed); the result then says nothing about the file."""
 
-    Parameters
-    ----------
-    file_path:
-        Path to the .mlai file to validate.
 
-    Returns
-    -------
-    ValidationResult with success flag, raw output, and error count.
-    """
+def _precheck(file_path: Path) -> ValidationResult | None:
+    """Return a failed result if the validator cannot run on ``file_path``."""
     if not VALIDATOR_CLI.exists():
         return ValidationResult(
             success=False,
             raw_output=f"Validator CLI not found at {VALIDATOR_CLI}. "
             "Build it with: cd vibely-v2/vibely-v2-parser && npm run build",
             error_count=1,
+            validator_error=True,
         )
 
     if not file_path.exists():
@@ -51,50 +65,307 @@ def validate_mlai_file(file_path: Path) -> ValidationResult:
             success=False,
             raw_output=f"File not found: {file_path}",
             error_count=1,
+            validator_error=True,
         )
 
+    return None
+
+
+def _parse_cli_output(returncode: int, stdout: str, stderr: str) -> ValidationResult:
+    """Turn the validator CLI's exit code and output into a ValidationResult."""
+    combined_output = stdout
+    if stderr:
+        combined_output += "\n" + stderr
+
+    # The validator CLI exits with 0 on success, non-zero on errors.
+    is_success = returncode == 0
+    diagnostics = parse_diagnostics(combined_output)
+    errors = [d for d in diagnostics if d.severity == "error"]
+    return ValidationResult(
+        success=is_success,
+        raw_output=combined_output.strip(),
+        error_count=0 if is_success else max(len(errors), 1),
+        diagnostics=diagnostics,
+    )
+
+
+def validate_mlai_file(file_path: Path) -> ValidationResult:
+    """Run the MLAI validator CLI against a file.
+
+    Parameters
+    ----------
+    file_path:
+        Path to the .mlai file to validate.
+
+    Returns
+    -------
+    ValidationResult with success flag, raw output, and error count.
+    """
+    failed = _precheck(file_path)
+    if failed:
+        return failed
+
     try:
         result = subprocess.run(
             ["node", str(VALIDATOR_CLI), str(file_path)],
             capture_output=True,
             text=True,
-            timeout=30,
+            timeout=VALIDATOR_TIMEOUT,
         )
+        return _parse_cli_output(result.returncode, result.stdout, result.stderr)
 
-        combined_output = result.stdout
-        if result.stderr:
-            combined_output += "\n" + result.stderr
-
-        # The validator CLI exits with 0 on success, non-zero on errors.
-        # Count error lines for reporting (lines containing "error" or "Error").
-        error_lines = [
-            line
-            for line in combined_output.splitlines()
-            if "error" in line.lower() and not line.strip().startswith("#")
-        ]
-
-        is_success = result.returncode == 0
+    except subprocess.TimeoutExpired:
         return ValidationResult(
-            success=is_success,
-            raw_output=combined_output.strip(),
-            error_count=0 if is_success else max(len(error_lines), 1),
+            success=False,
+            raw_output=f"Validator timed out after {VALIDATOR_TIMEOUT} seconds.",
+            error_count=1,
+            validator_error=True,
         )
-
-    except subprocess.TimeoutExpired:
+    except FileNotFoundError:
+        return ValidationResult(
+            success=False,
+            raw_output="Node.js not found. Ensure 'node' is on your PATH.",
+            error_count=1,
+            validator_error=True,
+        )
+    except Exception as exc:
         return ValidationResult(
             success=False,
-            raw_output="Validator timed out after 30 seconds.",
+            raw_output=f"Unexpected error running validator: {exc}",
             error_count=1,
+            validator_error=True,
+        )
+
+
+async def validate_mlai_file_async(
+    file_path: Path,
+    timeout: float = VALIDATOR_TIMEOUT,
+) -> ValidationResult:
+    """Run the MLAI validator CLI against a file without blocking the event loop.
+
+    Behaves like ``validate_mlai_file``. If the validator exceeds ``timeout``
+    seconds, or the calling task is cancelled, the node process is killed
+    and reaped before returning (or re-raising ``CancelledError``).
+
+    When a ``ValidatorPool`` is active, the request goes to one of its
+    workers; the one-shot CLI is used if the pool cannot serve it.
+    """
+    failed = _precheck(file_path)
+    if failed:
+        return failed
+
+    with tracing.span("node validator", "validator") as span:
+        if _active_pool is not None and _active_pool.available:
+            result = await _active_pool.validate(file_path, timeout)
+            if result is not None:
+                span.update(worker="pool", success=result.success)
+                return result
+
+        result = await _validate_oneshot_async(file_path, timeout)
+        span.update(worker="oneshot", success=result.success)
+        return result
+
+
+async def _validate_oneshot_async(file_path: Path, timeout: float) -> ValidationResult:
+    """Spawn a fresh ``node cli.js <file>`` process for a single validation."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "node", str(VALIDATOR_CLI), str(file_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
     except FileNotFoundError:
         return ValidationResult(
             success=False,
             raw_output="Node.js not found. Ensure 'node' is on your PATH.",
             error_count=1,
+            validator_error=True,
         )
     except Exception as exc:
         return ValidationResult(
             success=False,
             raw_output=f"Unexpected error running validator: {exc}",
             error_count=1,
-        )
\ No newline at end of file
+            validator_error=True,
+        )
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        await _kill(proc)
+        return ValidationResult(
+            success=False,
+            raw_output=f"Validator timed out after {timeout:g} seconds.",
+            error_count=1,
+            validator_error=True,
+        )
+    except asyncio.CancelledError:
+        await _kill(proc)
+        raise
+
+    return _parse_cli_output(
+        proc.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def _kill(proc: asyncio.subprocess.Process) -> None:
+    """Kill a validator process and wait for it so no zombie is left behind."""
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    await proc.wait()
+
+
+# ---------------------------------------------------------------------------
+# Persistent validator workers
+# ---------------------------------------------------------------------------
+
+# The pool currently serving validate_mlai_file_async, if any.
+_active_pool: "ValidatorPool | None" = None
+
+# A worker that fails to restart this many times in a row is retired.
+_MAX_RESTART_FAILURES = 3
+
+
+class _DaemonWorker:
+    """One ``node validator_daemon.mjs`` process speaking line-delimited JSON."""
+
+    def __init__(self) -> None:
+        self.proc: asyncio.subprocess.Process | None = None
+        self.restart_failures = 0
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    @property
+    def retired(self) -> bool:
+        return self.restart_failures >= _MAX_RESTART_FAILURES
+
+    async def start(self) -> str | None:
+        """Start the worker. Returns an error message, or None on success."""
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                "node", str(VALIDATOR_DAEMON), str(VALIDATOR_CLI),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=2**24,
+            )
+            line = await asyncio.wait_for(
+                self.proc.stdout.readline(), timeout=VALIDATOR_STARTUP_TIMEOUT
+            )
+            hello = json.loads(line) if line else {"ready": False, "error": "worker exited"}
+        except (OSError, asyncio.TimeoutError, json.JSONDecodeError) as exc:
+            hello = {"ready": False, "error": str(exc) or type(exc).__name__}
+
+        if hello.get("ready"):
+            self.restart_failures = 0
+            return None
+
+        await self.stop()
+        self.restart_failures += 1
+        return hello.get("error", "unknown startup error")
+
+    async def stop(self) -> None:
+        if self.proc is None:
+            return
+        if self.proc.returncode is None and self.proc.stdin is not None:
+            self.proc.stdin.close()
+            try:
+                await asyncio.wait_for(self.proc.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                pass
+        await _kill(self.proc)
+        self.proc = None
+
+    async def validate(self, file_path: Path, timeout: float) -> ValidationResult:
+        """Validate one file. Raises on timeout, crash or protocol errors."""
+        self._next_id += 1
+        request_id = self._next_id
+        request = json.dumps({"id": request_id, "path": str(file_path.resolve())})
+        self.proc.stdin.write(request.encode("utf-8") + b"\n")
+        await self.proc.stdin.drain()
+
+        line = await asyncio.wait_for(self.proc.stdout.readline(), timeout=timeout)
+        if not line:
+            raise ConnectionError("validator worker exited")
+        response = json.loads(line)
+        if response.get("id") != request_id:
+            raise ConnectionError("validator worker answered out of order")
+
+        return _parse_cli_output(0 if response["ok"] else 1, response.get("output", ""), "")
+
+
+class ValidatorPool:
+    """A small pool of persistent validator workers.
+
+    Use as an async context manager around a run; while active,
+    ``validate_mlai_file_async`` routes through it. Workers that crash or
+    time out are restarted; a request that hits a broken worker is retried
+    through the one-shot CLI so it never fails because of the pool itself.
+
+    Parameters
+    ----------
+    size:
+        Number of worker processes. ``0`` disables the pool.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.available = False
+        self._workers = [_DaemonWorker() for _ in range(max(size, 0))]
+        self._idle: asyncio.Queue[_DaemonWorker] = asyncio.Queue()
+        self._previous: ValidatorPool | None = None
+
+    async def __aenter__(self) -> "ValidatorPool":
+        global _active_pool
+        await self.start()
+        self._previous, _active_pool = _active_pool, self
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        global _active_pool
+        _active_pool = self._previous
+        await self.close()
+
+    async def start(self) -> None:
+        if not self._workers or not VALIDATOR_CLI.exists() or not VALIDATOR_DAEMON.exists():
+            return
+
+        errors = await asyncio.gather(*(w.start() for w in self._workers))
+        for worker, error in zip(self._workers, errors):
+            if error is None:
+                self._idle.put_nowait(worker)
+
+        self.available = not self._idle.empty()
+        if not self.available:
+            print(f"⚠️  Validator workers unavailable ({errors[0]}); using one-shot CLI.")
+
+    async def close(self) -> None:
+        self.available = False
+        await asyncio.gather(*(w.stop() for w in self._workers))
+
+    async def validate(self, file_path: Path, timeout: float) -> ValidationResult | None:
+        """Validate via a worker, or return None if the caller should fall back."""
+        worker = await self._idle.get()
+        try:
+            if not worker.alive:
+                if worker.retired or await worker.start() is not None:
+                    return None
+            try:
+                return await worker.validate(file_path, timeout)
+            except asyncio.CancelledError:
+                # The worker may be mid-request; its next reply would be stale.
+                await worker.stop()
+                raise
+            except (asyncio.TimeoutError, ConnectionError, OSError, ValueError, KeyError):
+                await worker.stop()
+                return None
+        finally:
+            self._idle.put_nowait(worker)
@@ -0,0 +1,76 @@
+// Long-lived MLAI validator worker.
+//
+// Loads the vibely-v2-parser once and validates files on request, so the
+// Python orchestrator does not pay node startup + parser load per attempt.
+//
+// Usage: node validator_daemon.mjs <path/to/vibely-v2-parser/dist/cli.js>
+//
+// Protocol (line-delimited JSON over stdin/stdout):
+//   startup  -> {"ready": true} or {"ready": false, "error": "..."}
+//   request  <- {"id": 1, "path": "/abs/lesson.mlai"}
+//   response -> {"id": 1, "ok": false, "output": "[error] Line 3: CODE - message"}
+//
+// The worker exits when stdin closes.
+
+import { readFile } from "node:fs/promises";
+import path from "node:path";
+import { createInterface } from "node:readline";
+import { pathToFileURL } from "node:url";
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+const cliPath = process.argv[2];
+let parser;
+let registry;
+
+try {
+  const entry = path.join(path.dirname(cliPath), "index.js");
+  parser = await import(pathToFileURL(entry).href);
+  if (typeof parser.parse !== "function" && parser.default) {
+    parser = parser.default;
+  }
+  registry = parser.createFullRegistry();
+} catch (err) {
+  send({ ready: false, error: String(err) });
+  process.exit(1);
+}
+
+send({ ready: true });
+
+function formatMessages(messages) {
+  return messages
+    .map((m) => {
+      const line = m.location?.line ?? "?";
+      return `[${m.severity}] Line ${line}: ${m.code} - ${m.message}`;
+    })
+    .join("\n");
+}
+
+const rl = createInterface({ input: process.stdin });
+
+for await (const line of rl) {
+  if (!line.trim()) continue;
+
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch {
+    continue;
+  }
+
+  try {
+    const content = await readFile(request.path, "utf8");
+    const result = parser.parse(content, registry);
+    const messages = result.messages ?? [];
+    const hasErrors = messages.some((m) => m.severity === "error");
+    send({
+      id: request.id,
+      ok: Boolean(result.success) && !hasErrors,
+      output: formatMessages(messages),
+    });
+  } catch (err) {
+    send({ id: request.id, ok: false, output: `[error] Unexpected error: ${err}` });
+  }
+}
@@ -0,0 +1,523 @@
+"""
+Long-running worker that consumes a queue of generation jobs.
+
+A job is a JSON object naming a lesson spec or a curriculum, with optional
+overrides of the CLI options:
+
+    {"id": "intro-1", "input": "test_curriculum/module_01/lesson_01_01.md"}
+    {"id": "neuro", "input": "test_curriculum/curriculum.json", "module": "module_02",
+     "output": "output", "concurrency": 4}
+
+The queue is either a JSONL file, with one job per line and new lines
+picked up as they are appended, or a spool directory of ``*.json`` files,
+one job each. Producers should create spool files under another name and
+rename them into place. A job without an ``id`` is identified by a hash of
+its line, or by its file name in a spool.
+
+Any number of workers, on any machines sharing the filesystem, may serve
+the same queue. Coordination happens entirely in the state directory:
+
+    leases/<job>.json       -> who is running the job, and until when
+    results/<job>.json      -> the job's result; its presence acknowledges the job
+    results/<job>.log       -> the job's console output
+    done/<file>             -> spool files of acknowledged jobs
+    metrics/<worker>.jsonl  -> telemetry, one file per worker
+
+``<job>`` is the job id made file-name safe, plus a short hash of the id
+itself so that distinct ids never share a file.
+
+A worker takes a job by creating its lease file exclusively (``O_EXCL``),
+renews it while the job runs, and acknowledges by atomically renaming the
+result into place before removing the lease. A lease that is not renewed
+within ``lease_seconds`` (the worker died) can be taken over. A worker
+that finds its lease taken cancels its run and does not acknowledge it.
+Lock files are used rather than SQLite because SQLite's locking is not
+reliable on network filesystems. Worker clocks should agree to well within
+the lease time.
+
+Failed jobs are acknowledged too, with ``"success": false``. To run a job
+again, delete its result file and submit it again: append its line to the
+JSONL queue once more, or put it back in the spool under a new file name.
+A running worker has already read past the old line or file.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import signal
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent import _output_buffer, generate_all_lessons, generate_lesson
+from cache import GenerationCache, ValidationCache
+from config import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_FIX_MODELS,
+    DEFAULT_MAX_TURNS,
+    DEFAULT_MODEL,
+    PROJECT_ROOT,
+    WORKER_LEASE_SECONDS,
+    WORKER_POLL_SECONDS,
+)
+from telemetry import Telemetry
+
+JOB_FIELDS = {"id", "input", "output", "module", "model", "max_turns", "concurrency", "fanout", "fix_models"}
+
+
+def _safe_id(job_id: str) -> str:
+    """File name stem for a job id: readable, and distinct for distinct ids."""
+    digest = hashlib.sha256(job_id.encode("utf-8")).hexdigest()[:12]
+    return f"{re.sub(r'[^A-Za-z0-9._-]', '_', job_id)[:100]}-{digest}"
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Write ``data`` to ``path`` atomically (temp file, fsync, rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _resolve(path: str) -> Path:
+    """Paths in jobs are relative to the project root, like on the command line."""
+    return Path(path) if Path(path).is_absolute() else (PROJECT_ROOT / path).resolve()
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Job:
+    """One queued job."""
+
+    id: str
+    spec: dict
+
+    source: Path | None = None
+    """Spool file the job came from; moved to ``done/`` once acknowledged."""
+
+
+def parse_job(spec: dict) -> dict:
+    """Check a job's fields; raises ValueError for an unusable job."""
+    if isinstance(spec, str):
+        raise ValueError("not valid JSON")
+    if not isinstance(spec, dict):
+        raise ValueError("a job must be a JSON object")
+    unknown = set(spec) - JOB_FIELDS
+    if unknown:
+        raise ValueError(f"unknown job field(s): {', '.join(sorted(unknown))}")
+    if not isinstance(spec.get("input"), str):
+        raise ValueError('a job needs an "input": a lesson spec (.md) or curriculum (.json)')
+    if not _resolve(spec["input"]).exists():
+        raise ValueError(f"input not found: {spec['input']}")
+    return spec
+
+
+async def run_job(
+    spec: dict,
+    cache: GenerationCache | None = None,
+    validation_cache: ValidationCache | None = None,
+    telemetry: Telemetry | None = None,
+) -> dict:
+    """Run one job to completion and return its result.
+
+    A curriculum (``.json`` input) runs as ``generate_all_lessons``,
+    anything else as ``generate_lesson``.
+    """
+    spec = parse_job(spec)
+    input_path = _resolve(spec["input"])
+    output_dir = _resolve(spec.get("output", "output"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    options = dict(
+        model=spec.get("model", DEFAULT_MODEL),
+        max_turns=spec.get("max_turns", DEFAULT_MAX_TURNS),
+        cache=cache,
+        telemetry=telemetry,
+        fix_models=tuple(spec.get("fix_models", DEFAULT_FIX_MODELS)),
+        fanout=bool(spec.get("fanout", False)),
+        validation_cache=validation_cache,
+    )
+
+    if input_path.suffix == ".json":
+        results = await generate_all_lessons(
+            curriculum_path=str(input_path),
+            output_dir=str(output_dir),
+            module_filter=spec.get("module"),
+            concurrency=spec.get("concurrency", DEFAULT_CONCURRENCY),
+            **options,
+        )
+        return {"success": not results["failed"], **results}
+
+    # Same lookup as single-lesson mode in main.py
+    curriculum_path = input_path.parent.parent / "curriculum.json"
+    if not curriculum_path.exists():
+        curriculum_path = input_path.parent / "curriculum.json"
+    lesson = await generate_lesson(
+        lesson_spec_path=str(input_path),
+        curriculum_path=str(curriculum_path) if curriculum_path.exists() else "",
+        output_dir=str(output_dir),
+        **options,
+    )
+    return {
+        "success": lesson.success,
+        "stop_reason": lesson.stop_reason,
+        "attempts": lesson.attempts,
+        "cost_usd": lesson.cost_usd,
+        "cached": lesson.cached,
+        "output_file": str(output_dir / f"{input_path.stem}.mlai"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Queues
+# ---------------------------------------------------------------------------
+
+
+class JsonlQueue:
+    """Jobs appended to a JSONL file; each ``poll`` returns the new ones."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._offset = 0
+
+    def poll(self) -> list[Job]:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        if size < self._offset:
+            self._offset = 0  # truncated or replaced: read it again
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Only complete lines; a line still being written is read next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+
+        jobs = []
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError:
+                spec = line
+            job_id = spec.get("id") if isinstance(spec, dict) else None
+            if not isinstance(job_id, str) or not job_id:
+                job_id = "job-" + hashlib.sha256(line.strip().encode("utf-8")).hexdigest()[:16]
+            jobs.append(Job(id=job_id, spec=spec))
+        return jobs
+
+
+class SpoolQueue:
+    """One job per ``*.json`` file in a directory, taken in file-name order."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._seen: set[str] = set()
+
+    def poll(self) -> list[Job]:
+        jobs = []
+        for path in sorted(self.directory.glob("*.json")):
+            if path.name in self._seen:
+                continue
+            try:
+                spec = json.loads(path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                continue  # taken and moved aside by another worker
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                spec = path.name
+            self._seen.add(path.name)
+            job_id = spec.get("id") if isinstance(spec, dict) else None
+            jobs.append(Job(id=job_id if isinstance(job_id, str) and job_id else path.stem, spec=spec, source=path))
+        return jobs
+
+
+def open_queue(path: Path) -> JsonlQueue | SpoolQueue:
+    return SpoolQueue(path) if path.is_dir() else JsonlQueue(path)
+
+
+# ---------------------------------------------------------------------------
+# Leases
+# ---------------------------------------------------------------------------
+
+
+class LeaseStore:
+    """Exclusive, expiring job leases as files in a shared directory.
+
+    Parameters
+    ----------
+    directory:
+        Lease directory, shared by all workers.
+    owner:
+        This worker's unique name.
+    ttl:
+        Seconds a lease stays valid without renewal.
+    """
+
+    def __init__(self, directory: Path, owner: str, ttl: float) -> None:
+        self.directory = directory
+        self.owner = owner
+        self.ttl = ttl
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{_safe_id(job_id)}.json"
+
+    def _lease(self, job_id: str) -> dict:
+        return {
+            "job_id": job_id,
+            "owner": self.owner,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "expires": time.time() + self.ttl,
+        }
+
+    def _read(self, path: Path) -> dict | None:
+        """The lease at ``path``, or None if there is none."""
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Being written right now: valid until its mtime plus ttl
+            try:
+                return {"owner": None, "expires": path.stat().st_mtime + self.ttl}
+            except FileNotFoundError:
+                return None
+
+    def acquire(self, job_id: str) -> bool:
+        """Take the lease on ``job_id``; False if another worker holds it."""
+        path = self._path(job_id)
+        current = self._read(path)
+        if current is not None:
+            if current.get("expires", 0) > time.time():
+                return False
+            # Expired: move it aside. Only one worker's rename can succeed.
+            stale = path.with_name(f".{path.name}.stale-{uuid.uuid4().hex[:8]}")
+            try:
+                os.rename(path, stale)
+            except FileNotFoundError:
+                return False
+            moved = self._read(stale)
+            stale.unlink(missing_ok=True)
+            if moved != current:
+                # Someone renewed or took over in between; put theirs back
+                with contextlib.suppress(FileExistsError):
+                    _write_exclusive(path, moved)
+                return False
+
+        try:
+            _write_exclusive(path, self._lease(job_id))
+        except FileExistsError:
+            return False
+        return True
+
+    def renew(self, job_id: str) -> bool:
+        """Extend our lease; False if it is no longer ours."""
+        path = self._path(job_id)
+        current = self._read(path)
+        if current is None or current.get("owner") != self.owner:
+            return False
+        _write_json(path, self._lease(job_id))
+        return True
+
+    def release(self, job_id: str) -> None:
+        path = self._path(job_id)
+        current = self._read(path)
+        if current is not None and current.get("owner") == self.owner:
+            path.unlink(missing_ok=True)
+
+
+def _write_exclusive(path: Path, data: dict) -> None:
+    """Create ``path`` with ``data``; raises FileExistsError if it exists."""
+    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+
+class Worker:
+    """Serves a queue: leases jobs, runs up to ``concurrency`` at once, acknowledges them.
+
+    Parameters
+    ----------
+    queue:
+        A ``JsonlQueue`` or ``SpoolQueue``.
+    state_dir:
+        Shared directory for leases, results and metrics.
+    concurrency:
+        Jobs run at once by this worker.
+    once:
+        Exit when every job seen so far is acknowledged instead of waiting
+        for more.
+    """
+
+    def __init__(
+        self,
+        queue: JsonlQueue | SpoolQueue,
+        state_dir: Path,
+        concurrency: int = 1,
+        poll_seconds: float = WORKER_POLL_SECONDS,
+        lease_seconds: float = WORKER_LEASE_SECONDS,
+        cache: GenerationCache | None = None,
+        validation_cache: ValidationCache | None = None,
+        once: bool = False,
+    ) -> None:
+        self.queue = queue
+        self.state_dir = state_dir
+        self.concurrency = max(concurrency, 1)
+        self.poll_seconds = poll_seconds
+        self.once = once
+        self.cache = cache
+        self.validation_cache = validation_cache
+        self.name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.leases = LeaseStore(state_dir / "leases", self.name, lease_seconds)
+        self.results_dir = state_dir / "results"
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.telemetry = Telemetry(state_dir / "metrics" / f"{_safe_id(self.name)}.jsonl")
+        self.completed = 0
+        self._signals = 0
+        self._stop = asyncio.Event()
+        self._running: dict[str, asyncio.Task] = {}
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.results_dir / f"{_safe_id(job_id)}.json"
+
+    def _acknowledged(self, job_id: str) -> bool:
+        return self._result_path(job_id).exists()
+
+    def _on_signal(self) -> None:
+        """First signal: finish running jobs, take no new ones. Second: cancel them."""
+        self._signals += 1
+        self._stop.set()
+        if self._signals == 1:
+            print(f"\n🛑 Finishing {len(self._running)} running job(s); signal again to cancel them")
+        else:
+            for task in self._running.values():
+                task.cancel()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(sig, self._on_signal)
+
+        print(f"👷 Worker {self.name} serving (up to {self.concurrency} job(s) at once)")
+        pending: dict[str, Job] = {}
+        try:
+            while not self._stop.is_set():
+                for job in self.queue.poll():
+                    if job.id not in self._running:
+                        pending.setdefault(job.id, job)
+                self._start_jobs(pending)
+
+                if self.once and not pending and not self._running:
+                    break
+                stop_wait = asyncio.create_task(self._stop.wait())
+                await asyncio.wait(
+                    [stop_wait, *self._running.values()],
+                    timeout=self.poll_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                stop_wait.cancel()
+                self._running = {k: t for k, t in self._running.items() if not t.done()}
+
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        finally:
+            self.telemetry.close()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                with contextlib.suppress(NotImplementedError, RuntimeError):
+                    loop.remove_signal_handler(sig)
+        print(f"👷 Worker {self.name} stopped after {self.completed} job(s)")
+
+    def _start_jobs(self, pending: dict[str, Job]) -> None:
+        """Lease and start pending jobs while there are free slots.
+
+        Jobs leased by other workers stay pending, and are retried on every
+        poll until they are acknowledged or their lease expires.
+        """
+        for job_id in list(pending):
+            if len(self._running) >= self.concurrency:
+                return
+            if self._acknowledged(job_id):
+                del pending[job_id]
+                continue
+            if not self.leases.acquire(job_id):
+                continue
+            if self._acknowledged(job_id):  # finished between our check and the lease
+                self.leases.release(job_id)
+                del pending[job_id]
+                continue
+            job = pending.pop(job_id)
+            self._running[job_id] = asyncio.create_task(self._run(job))
+
+    async def _execute(self, job: Job, lines: list[str]) -> dict:
+        _output_buffer.set(lines)
+        return await run_job(job.spec, self.cache, self.validation_cache, self.telemetry)
+
+    async def _run(self, job: Job) -> None:
+        print(f"▶️  {job.id}")
+        started = time.time()
+        lines: list[str] = []
+        work = asyncio.create_task(self._execute(job, lines))
+        try:
+            while True:
+                done, _ = await asyncio.wait({work}, timeout=self.leases.ttl / 3)
+                if done:
+                    break
+                if not self.leases.renew(job.id):
+                    print(f"⚠️  {job.id}: lease lost to another worker; abandoning it")
+                    work.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await work
+                    return
+        except asyncio.CancelledError:
+            # Cancelled by a second signal: leave it unacknowledged for another worker
+            work.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await work
+            self.leases.release(job.id)
+            print(f"⏹️  {job.id}: cancelled, released for another worker")
+            return
+
+        try:
+            result = work.result()
+        except Exception as exc:
+            result = {"success": False, "error": f"{type(exc).__name__}: {exc}"}
+
+        (self.results_dir / f"{_safe_id(job.id)}.log").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        _write_json(self._result_path(job.id), {
+            "id": job.id,
+            "job": job.spec,
+            "worker": self.name,
+            "started": round(started, 3),
+            "wall_s": round(time.time() - started, 3),
+            **result,
+        })
+        self.leases.release(job.id)
+        if job.source is not None:
+            with contextlib.suppress(FileNotFoundError):
+                done_dir = self.state_dir / "done"
+                done_dir.mkdir(exist_ok=True)
+                os.replace(job.source, done_dir / job.source.name)
+        self.completed += 1
+        print(f"{'✅' if result.get('success') else '❌'} {job.id}"
+              + (f": {result['error']}" if "error" in result else ""))